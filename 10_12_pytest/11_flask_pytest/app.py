@@ -1,11 +1,33 @@
-from flask import Flask, jsonify, abort, make_response, request
+import os
+import threading
+import time
+from itertools import islice
+
+from flask import Flask, Response, abort, g, request, stream_with_context
+
+import codec
+
+from backends import SQLiteStore, LogStore
+from cache import ResponseCache
+from metrics import registry, instrument
+from profiler import SamplingProfiler
+from store import ItemStore, BatchError, DuplicateItem, MISSING
+from validation import create_fields, update_fields, batch_operation
 
 NOT_FOUND = 'Not found'
 BAD_REQUEST = 'Bad request'
 
+MAX_PAGE_SIZE = 1000
+MAX_BATCH_SIZE = 10000
+FIELDS = ('id', 'name', 'value')
+STORE_OPERATIONS = ('get', 'create', 'update', 'delete', 'apply_batch', 'by_value', 'top', 'stats')
+
 app = Flask(__name__)
 
-items = [
+# set to a directory to allow per request profiling with an 'X-Profile: 1' header
+app.config['PROFILE_DIR'] = os.environ.get('ITEMS_PROFILE_DIR')
+
+SEED_ITEMS = [
     {
         'id': 1,
         'name': 'laptop',
@@ -24,77 +46,358 @@ items = [
 ]
 
 
-def _get_item(id):
-    return [item for item in items if item['id'] == id]
+def open_store(url=None):
+    """
+    opens the item store described by url, seeding it if it is empty
+
+    :param url: 'sqlite:<path>' or 'log:<directory>' for a durable store,
+        defaults to the ITEMS_STORE environment variable, else an in-memory store
+    :return: the store
+    """
+    url = url or os.environ.get('ITEMS_STORE', 'memory:')
+    kind, _, path = url.partition(':')
+    if kind == 'memory':
+        return ItemStore(SEED_ITEMS)
+    if kind == 'sqlite':
+        store = SQLiteStore(path)
+    elif kind == 'log':
+        store = LogStore(path)
+    else:
+        raise ValueError('unknown item store: {}'.format(url))
+    if not len(store):
+        store.apply_batch([('create', None, item['name'], item['value']) for item in SEED_ITEMS])
+    return store
+
+
+store = instrument(open_store(), STORE_OPERATIONS)
+cache = ResponseCache()
+
+
+def _json_response(payload, status=200):
+    return Response(codec.dumps(payload) + b'\n', status, mimetype='application/json')
 
 
-def _record_exists(name):
-    return [item for item in items if item["name"] == name]
+def _request_json():
+    """
+    returns the decoded JSON body of the request, or None if it isn't JSON,
+    is malformed, or is too large, in which case it is not read at all
+    """
+    if not request.is_json:
+        return None
+    if request.content_length is not None and request.content_length > codec.MAX_BODY_SIZE:
+        return None
+    return codec.decode_body(request.get_data(cache=False))
 
 
 @app.errorhandler(404)
 def not_found(error):
-    return make_response(jsonify({'error': NOT_FOUND}), 404)
+    registry.inc('http_errors_total', error='not_found')
+    return _json_response({'error': NOT_FOUND}, 404)
 
 
 @app.errorhandler(400)
 def bad_request(error):
-    return make_response(jsonify({'error': BAD_REQUEST}), 400)
+    registry.inc('http_errors_total', error='bad_request')
+    return _json_response({'error': BAD_REQUEST}, 400)
+
+
+# (method, route) -> latency histogram, saves building label keys per request
+_route_histograms = {}
+
+
+@app.before_request
+def start_request():
+    g.started = time.perf_counter()
+    if app.config['PROFILE_DIR'] and request.headers.get('X-Profile') == '1':
+        g.profiler = SamplingProfiler(threading.get_ident()).start()
+
+
+@app.after_request
+def finish_request(response):
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        path = profiler.stop().dump(app.config['PROFILE_DIR'], request.endpoint or 'unmatched')
+        response.headers['X-Profile-File'] = os.path.basename(path)
+    if registry.enabled:
+        rule = request.url_rule
+        key = request.method, rule.rule if rule is not None else 'unmatched'
+        histogram = _route_histograms.get(key)
+        if histogram is None:
+            histogram = _route_histograms[key] = registry.histogram('http_request_duration_seconds',
+                                                                    method=key[0], route=key[1])
+        histogram.observe(time.perf_counter() - g.started)
+    return response
+
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
+
+def _int_arg(name, default=None):
+    value = request.args.get(name)
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        abort(400)
+
+
+def _sort_arg():
+    sort = request.args.get('sort', 'id')
+    if sort not in ('id', 'value'):
+        abort(400)
+    return sort
+
+
+def _value_cursor():
+    """parses a 'value,id' cursor, as used when items are sorted by value"""
+    cursor = request.args.get('cursor')
+    if cursor is None:
+        return None
+    try:
+        value, id = cursor.split(',')
+        return int(value), int(id)
+    except ValueError:
+        abort(400)
+
+
+def _query_items():
+    """
+    builds a generator of items matching the listing query parameters
+
+    sort: 'id' (the default) or 'value', value ordered queries are answered
+        from the store's value index instead of a scan
+    cursor: only return items after this, an id, or 'value,id' if sorted by value
+    min_value / max_value: inclusive bounds on the item value
+    prefix: only return items whose name starts with this
+    """
+    min_value = _int_arg('min_value')
+    max_value = _int_arg('max_value')
+    prefix = request.args.get('prefix')
+
+    if _sort_arg() == 'value':
+        query = store.scan_by_value(min_value, max_value, _value_cursor())
+    else:
+        query = store.scan(_int_arg('cursor', 0))
+        if min_value is not None:
+            query = (item for item in query if item['value'] >= min_value)
+        if max_value is not None:
+            query = (item for item in query if item['value'] <= max_value)
+
+    if prefix is not None:
+        query = (item for item in query if item['name'].startswith(prefix))
+    return query
+
+
+def _project(query):
+    """
+    restricts items to the comma separated list of 'fields', if given
+    """
+    fields = request.args.get('fields')
+    if fields is None:
+        return query
+    fields = fields.split(',')
+    if any(field not in FIELDS for field in fields):
+        abort(400)
+    return ({field: item[field] for field in fields} for item in query)
+
+
+def _stream_ndjson(query):
+    for item in query:
+        yield codec.dumps(item) + b'\n'
+
+
+def _stream_json(query):
+    yield b'{"items":['
+    separator = b''
+    for item in query:
+        yield separator + codec.dumps(item)
+        separator = b','
+    yield b']}\n'
+
+
+def listing_key(version, limit=None, sort='id', cursor=None, min_value=None, max_value=None,
+                prefix=None, fields=None):
+    """
+    the cache key of a listing, from its parsed parameters only, so
+    unknown parameters or different spellings of the same query share
+    an entry instead of each caching a copy, also used by the ASGI app
+    """
+    return 'items', version, limit, sort, cursor, min_value, max_value, prefix, fields
+
+
+def _listing_key():
+    sort = _sort_arg()
+    cursor = _value_cursor() if sort == 'value' else _int_arg('cursor')
+    return listing_key(store.version, _int_arg('limit'), sort, cursor, _int_arg('min_value'),
+                       _int_arg('max_value'), request.args.get('prefix'), request.args.get('fields'))
+
+
+def _cached_response(key, build):
+    """
+    returns the response cached under key, building it on a miss, and
+    answers with a 304 if the client already holds the same ETag
+    """
+    entry = cache.get(key)
+    if entry is None:
+        entry = cache.put(key, build().get_data())
+    body, etag = entry
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    return response
+
+
+def _list_items():
+    if not request.args:
+        return _json_response({'items': list(store)})
+
+    limit = _int_arg('limit')
+    if limit is not None and not 0 < limit <= MAX_PAGE_SIZE:
+        abort(400)
+
+    query = _query_items()
+
+    if limit is None:
+        return _json_response({'items': list(_project(query))})
+
+    # fetch one extra item to know if there is a next page
+    page = list(islice(query, limit + 1))
+    next_cursor = None
+    if len(page) > limit:
+        page = page[:limit]
+        next_cursor = page[-1]['id']
+        if _sort_arg() == 'value':
+            next_cursor = '{},{}'.format(page[-1]['value'], next_cursor)
+    return _json_response({'items': list(_project(page)), 'next_cursor': next_cursor})
+
+
+def _stream_items(stream):
+    limit = _int_arg('limit')
+    if limit is not None and not 0 < limit <= MAX_PAGE_SIZE:
+        abort(400)
+
+    query = _project(islice(_query_items(), limit))
+    if stream == 'ndjson':
+        return Response(stream_with_context(_stream_ndjson(query)),
+                        mimetype='application/x-ndjson')
+    return Response(stream_with_context(_stream_json(query)),
+                    mimetype='application/json')
 
 
 @app.route('/api/v1.0/items', methods=['GET'])
 def get_items():
-    return jsonify({'items': items})
+    stream = request.args.get('stream')
+    if stream is None:
+        return _cached_response(_listing_key(), _list_items)
+    if stream not in ('ndjson', 'json'):
+        abort(400)
+    return _stream_items(stream)
 
 
 @app.route('/api/v1.0/items/<int:id>', methods=['GET'])
 def get_item(id):
-    item = _get_item(id)
-    if not item:
+    # read the version before the item, so the item is never older than its cache key
+    version = store.item_version(id)
+    item = store.get(id)
+    if item is None:
         abort(404)
-    return jsonify({'items': item})
+    return _cached_response(('item', id, version),
+                            lambda: _json_response({'items': [item]}))
+
+
+@app.route('/api/v1.0/items/top', methods=['GET'])
+def get_top_items():
+    k = _int_arg('k', 10)
+    if not 0 < k <= MAX_PAGE_SIZE:
+        abort(400)
+    return _cached_response(('top', store.version, k),
+                            lambda: _json_response({'items': store.top(k)}))
+
+
+@app.route('/api/v1.0/items/stats', methods=['GET'])
+def get_item_stats():
+    return _cached_response(('stats', store.version),
+                            lambda: _json_response({'stats': store.stats()}))
 
 
 @app.route('/api/v1.0/items', methods=['POST'])
 def create_item():
-    if not request.json or 'name' not in request.json or 'value' not in request.json:
-        abort(400)
-    item_id = items[-1].get("id") + 1
-    name = request.json.get('name')
-    if _record_exists(name):
+    fields = create_fields(_request_json())
+    if fields is None:
         abort(400)
-    value = request.json.get('value')
-    if type(value) is not int:
+    try:
+        item = store.create(*fields)
+    except DuplicateItem:
         abort(400)
-    item = {"id": item_id, "name": name,
-            "value": value}
-    items.append(item)
-    return jsonify({'item': item}), 201
+    return _json_response({'item': item}, 201)
 
 
 @app.route('/api/v1.0/items/<int:id>', methods=['PUT'])
 def update_item(id):
-    item = _get_item(id)
-    if len(item) == 0:
+    if store.get(id) is None:
         abort(404)
-    if not request.json:
+    fields = update_fields(_request_json())
+    if fields is None:
         abort(400)
-    name = request.json.get('name', item[0]['name'])
-    value = request.json.get('value', item[0]['value'])
-    if type(value) is not int:
-        abort(400)
-    item[0]['name'] = name
-    item[0]['value'] = value
-    return jsonify({'item': item[0]}), 200
+    try:
+        item = store.update(id, *fields)
+    except KeyError:
+        abort(404)
+    return _json_response({'item': item})
 
 
 @app.route('/api/v1.0/items/<int:id>', methods=['DELETE'])
 def delete_item(id):
-    item = _get_item(id)
-    if len(item) == 0:
+    try:
+        store.delete(id)
+    except KeyError:
         abort(404)
-    items.remove(item[0])
-    return jsonify({}), 204
+    return _json_response({}, 204)
+
+
+def _batch_error(index, status):
+    error = NOT_FOUND if status == 404 else BAD_REQUEST
+    return {'index': index, 'status': status, 'error': error}
+
+
+@app.route('/api/v1.0/items:batch', methods=['POST'])
+def batch_items():
+    """
+    applies a list of create, update & delete operations atomically, either
+    all of them succeed or none are applied
+    """
+    data = _request_json()
+    if not isinstance(data, list) or not 0 < len(data) <= MAX_BATCH_SIZE:
+        abort(400)
+
+    operations = [batch_operation(operation) for operation in data]
+    errors = [_batch_error(index, 400)
+              for index, operation in enumerate(operations) if operation is None]
+
+    if not errors:
+        try:
+            items = store.apply_batch(operations)
+        except BatchError as e:
+            errors = [_batch_error(index, 404 if reason == MISSING else 400)
+                      for index, reason in e.errors]
+
+    if errors:
+        return _json_response({'error': BAD_REQUEST, 'errors': errors}, 400)
+
+    results = []
+    for (op, id, name, value), item in zip(operations, items):
+        if op == 'create':
+            results.append({'status': 201, 'item': item})
+        elif op == 'update':
+            results.append({'status': 200, 'item': item})
+        else:
+            results.append({'status': 204})
+    return _json_response({'results': results})
 
 
 if __name__ == '__main__':
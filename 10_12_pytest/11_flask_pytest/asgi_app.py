@@ -0,0 +1,241 @@
+"""
+asyncio-native (ASGI) version of the items API
+
+It serves the same /api/v1.0/items routes with the same responses as the
+Flask app, sharing its store, validation and response cache. The hot
+routes, plain item & listing reads and single item writes, are handled
+natively. Everything else, listings with query parameters, the batch,
+top & stats routes, other methods and unknown paths, is handed to the
+Flask app itself in a worker thread, so a URL behaves the same whichever
+server answers it. Streamed listings are passed on as Flask yields them,
+read a chunk at a time in the worker thread.
+
+Run it with an ASGI server:
+
+    uvicorn asgi_app:app
+"""
+import asyncio
+import re
+
+from flask import Response
+from werkzeug.http import parse_etags, quote_etag
+from werkzeug.test import EnvironBuilder
+
+import app as sync_app
+import codec
+from store import DuplicateItem
+from validation import create_fields, update_fields
+
+ITEMS_PATH = '/api/v1.0/items'
+ITEM_PATH = re.compile(r'^/api/v1\.0/items/(\d+)$')
+# bytes of a streamed Flask response sent per message
+STREAM_CHUNK = 64 * 1024
+
+
+def _body(payload):
+    return codec.dumps(payload) + b'\n'
+
+
+def not_found():
+    return 404, _body({'error': sync_app.NOT_FOUND})
+
+
+def bad_request():
+    return 400, _body({'error': sync_app.BAD_REQUEST})
+
+
+async def _write(method, *args):
+    # durable stores can block on disk, so keep writes off the event loop
+    return await asyncio.get_running_loop().run_in_executor(None, method, *args)
+
+
+def _header(scope, name):
+    for key, value in scope['headers']:
+        if key == name:
+            return value.decode('latin-1')
+    return None
+
+
+def _cached(scope, key, build):
+    """
+    returns the response cached under key in the Flask app's cache,
+    building its body on a miss, or a 304 if the client holds its ETag
+    """
+    entry = sync_app.cache.get(key)
+    if entry is None:
+        entry = sync_app.cache.put(key, build())
+    body, etag = entry
+    header = (b'etag', quote_etag(etag).encode())
+    if parse_etags(_header(scope, b'if-none-match')).contains(etag):
+        return 304, b'', header
+    return 200, body, header
+
+
+def get_items(scope):
+    return _cached(scope, sync_app.listing_key(sync_app.store.version),
+                   lambda: _body({'items': list(sync_app.store)}))
+
+
+def get_item(scope, id):
+    # read the version before the item, as the Flask app does
+    version = sync_app.store.item_version(id)
+    item = sync_app.store.get(id)
+    if item is None:
+        return not_found()
+    return _cached(scope, ('item', id, version), lambda: _body({'items': [item]}))
+
+
+def _call_flask(scope, body):
+    environ = EnvironBuilder(path=scope['path'], method=scope['method'],
+                             query_string=scope.get('query_string', b'').decode('latin-1'),
+                             headers=[(key.decode('latin-1'), value.decode('latin-1'))
+                                      for key, value in scope['headers']],
+                             data=body).get_environ()
+    response = Response.from_app(sync_app.app.wsgi_app, environ)
+    headers = [(key.lower().encode('latin-1'), value.encode('latin-1'))
+               for key, value in response.headers if key.lower() in ('etag', 'content-type')]
+    if response.content_length is None:
+        # a streamed response, its body is read as it is sent
+        return (response.status_code, response.response, *headers)
+    body = response.get_data()
+    response.close()
+    return (response.status_code, body, *headers)
+
+
+def _next_chunk(chunks):
+    """joins the next parts of a streamed response up to about STREAM_CHUNK bytes, b'' once it is done"""
+    parts = []
+    size = 0
+    for part in chunks:
+        parts.append(part)
+        size += len(part)
+        if size >= STREAM_CHUNK:
+            break
+    return b''.join(parts)
+
+
+async def flask_fallback(scope, body):
+    """answers a request with the Flask app, in a worker thread as it may block"""
+    return await asyncio.get_running_loop().run_in_executor(None, _call_flask, scope, body)
+
+
+async def create_item(data):
+    fields = create_fields(data)
+    if fields is None:
+        return bad_request()
+    try:
+        item = await _write(sync_app.store.create, *fields)
+    except DuplicateItem:
+        return bad_request()
+    return 201, _body({'item': item})
+
+
+async def update_item(id, data):
+    if sync_app.store.get(id) is None:
+        return not_found()
+    fields = update_fields(data)
+    if fields is None:
+        return bad_request()
+    try:
+        item = await _write(sync_app.store.update, id, *fields)
+    except KeyError:
+        return not_found()
+    return 200, _body({'item': item})
+
+
+async def delete_item(id):
+    try:
+        await _write(sync_app.store.delete, id)
+    except KeyError:
+        return not_found()
+    return 204, b''
+
+
+async def _read_body(receive):
+    """
+    reads the request body, giving up once it is too large, so an
+    oversized body is cut short past codec.MAX_BODY_SIZE and turned away
+    by whichever handler decodes it
+    """
+    body = b''
+    more_body = True
+    while more_body and len(body) <= codec.MAX_BODY_SIZE:
+        message = await receive()
+        body += message.get('body', b'')
+        more_body = message.get('more_body', False)
+    return body
+
+
+def _is_json(scope):
+    content_type = _header(scope, b'content-type')
+    return content_type is not None and content_type.split(';')[0].strip() == 'application/json'
+
+
+async def dispatch(scope, receive):
+    """
+    routes a request to its handler
+
+    :return: the status, body & any extra (name, value) headers of the
+             response, the body being bytes or, streamed, an iterable of them
+    """
+    method = scope['method']
+    path = scope['path']
+    body = b''
+    data = None
+    if method in ('POST', 'PUT'):
+        body = await _read_body(receive)
+        if _is_json(scope):
+            data = codec.decode_body(body)
+
+    if path == ITEMS_PATH and method in ('GET', 'POST') and not scope.get('query_string'):
+        if method == 'GET':
+            return get_items(scope)
+        return await create_item(data)
+    match = ITEM_PATH.match(path)
+    if match is None or method not in ('GET', 'PUT', 'DELETE'):
+        return await flask_fallback(scope, body)
+
+    id = int(match.group(1))
+    if method == 'GET':
+        return get_item(scope, id)
+    if method == 'PUT':
+        return await update_item(id, data)
+    return await delete_item(id)
+
+
+async def _send_streamed(send, status, chunks, headers):
+    """sends a streamed Flask response, reading each chunk of it in a worker thread"""
+    loop = asyncio.get_running_loop()
+    try:
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        while True:
+            chunk = await loop.run_in_executor(None, _next_chunk, chunks)
+            if not chunk:
+                break
+            await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b''})
+    finally:
+        chunks.close()
+
+
+async def app(scope, receive, send):
+    """the ASGI entry point"""
+    if scope['type'] == 'lifespan':
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    status, body, *extra_headers = await dispatch(scope, receive)
+    if not isinstance(body, bytes):
+        await _send_streamed(send, status, body, extra_headers)
+        return
+    headers = [(b'content-length', str(len(body)).encode())]
+    if body and not any(name == b'content-type' for name, value in extra_headers):
+        headers.append((b'content-type', b'application/json'))
+    headers += extra_headers
+    await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': body})
@@ -0,0 +1,149 @@
+import json
+import mmap
+import os
+import sqlite3
+import threading
+
+from store import ItemStore
+
+
+class SQLiteStore(ItemStore):
+    """
+    Item store persisted to a SQLite database
+
+    The database runs in WAL mode so readers don't block the writer, and
+    every thread gets its own connection. Items are loaded into the
+    in-memory indexes at startup and reads are served from there, while
+    each change is committed in a single transaction before it is applied.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        conn = self._connection()
+        with conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS items '
+                         '(id INTEGER PRIMARY KEY, name TEXT, value INTEGER)')
+            conn.execute('CREATE TABLE IF NOT EXISTS meta '
+                         '(key TEXT PRIMARY KEY, value INTEGER)')
+        super().__init__()
+        for id, name, value in conn.execute('SELECT id, name, value FROM items ORDER BY id'):
+            self._put({'id': id, 'name': name, 'value': value})
+        row = conn.execute("SELECT value FROM meta WHERE key = 'next_id'").fetchone()
+        if row is not None:
+            self._next_id = max(self._next_id, row[0])
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _persist(self, changes):
+        puts = [(item['id'], item['name'], item['value'])
+                for op, item in changes if op == 'put']
+        deletes = [(id,) for op, id in changes if op == 'delete']
+        next_id = max([self._next_id] + [id + 1 for id, name, value in puts])
+
+        # the statements are constant, so sqlite3 prepares each only once
+        # per connection and executemany() reuses it for every row
+        conn = self._connection()
+        with conn:
+            conn.executemany('INSERT OR REPLACE INTO items (id, name, value) VALUES (?, ?, ?)', puts)
+            conn.executemany('DELETE FROM items WHERE id = ?', deletes)
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('next_id', ?)", (next_id,))
+
+    def close(self):
+        """closes the calling thread's connection"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class LogStore(ItemStore):
+    """
+    Item store persisted as a snapshot plus an append-only log
+
+    directory: holds 'snapshot' and 'log', both as newline delimited JSON.
+    snapshot_every: the number of log records after which a new snapshot
+        is written and the log truncated
+    fsync: whether every append is flushed to disk before it is applied
+
+    The snapshot starts with a header line holding the next id, followed by
+    one item per line. Each log line holds the changes of one write, so a
+    batch is all or nothing, and a torn last line is ignored on replay.
+    Replaying changes that are already in the snapshot is harmless, which
+    makes the snapshot rename + log truncate safe to interrupt.
+    """
+
+    def __init__(self, directory, snapshot_every=10000, fsync=True):
+        self.directory = directory
+        self.snapshot_every = snapshot_every
+        self.fsync = fsync
+        os.makedirs(directory, exist_ok=True)
+        self._snapshot_path = os.path.join(directory, 'snapshot')
+        self._log_path = os.path.join(directory, 'log')
+        super().__init__()
+        self._load_snapshot()
+        self._records = self._replay_log()
+        self._log = open(self._log_path, 'ab')
+
+    def _lines(self, path):
+        """yields the lines of a file through mmap, without reading it all in"""
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            yield from iter(mm.readline, b'')
+
+    def _load_snapshot(self):
+        lines = self._lines(self._snapshot_path)
+        header = next(lines, None)
+        if header is not None:
+            self._next_id = json.loads(header)['next_id']
+        for line in lines:
+            self._put(json.loads(line))
+
+    def _replay_log(self):
+        records = 0
+        valid = 0
+        for line in self._lines(self._log_path):
+            if not line.endswith(b'\n'):
+                break
+            super()._apply([tuple(change) for change in json.loads(line)])
+            records += 1
+            valid += len(line)
+        if os.path.exists(self._log_path) and os.path.getsize(self._log_path) > valid:
+            os.truncate(self._log_path, valid)
+        return records
+
+    def _persist(self, changes):
+        self._log.write(json.dumps(changes).encode() + b'\n')
+        self._log.flush()
+        if self.fsync:
+            os.fsync(self._log.fileno())
+        self._records += 1
+
+    def _apply(self, changes):
+        super()._apply(changes)
+        if self._records >= self.snapshot_every:
+            self.snapshot()
+
+    def snapshot(self):
+        """writes every item to a new snapshot and truncates the log"""
+        tmp_path = self._snapshot_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(json.dumps({'next_id': self._next_id}).encode() + b'\n')
+            for item in self.scan():
+                f.write(json.dumps(item).encode() + b'\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._snapshot_path)
+        self._log.truncate(0)
+        self._records = 0
+
+    def close(self):
+        self._log.close()
@@ -0,0 +1,120 @@
+"""
+Load tests the Flask (threaded WSGI) and ASGI versions of the items API
+
+Each server runs in its own process on localhost, then a single asyncio
+client opens many keep-alive connections that each send a run of GET
+requests, reporting requests/sec and latency percentiles. A server that
+answers with 'Connection: close' is reconnected to, and the connect time
+counts towards the request. The ASGI run needs uvicorn installed.
+
+usage: python bench_asgi.py [connections] [requests per connection]
+"""
+import asyncio
+import multiprocessing
+import resource
+import socket
+import sys
+import time
+
+HOST = '127.0.0.1'
+PATH = '/api/v1.0/items/1'
+
+
+def serve_wsgi(port):
+    import logging
+    from werkzeug.serving import run_simple
+    import app
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    run_simple(HOST, port, app.app, threaded=True)
+
+
+def serve_asgi(port):
+    import uvicorn
+    uvicorn.run('asgi_app:app', host=HOST, port=port, log_level='warning',
+                backlog=16384, limit_concurrency=None)
+
+
+def wait_for_port(port, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            socket.create_connection((HOST, port)).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError('server on port {} did not start'.format(port))
+
+
+async def connection(port, requests, latencies):
+    request = 'GET {} HTTP/1.1\r\nHost: {}\r\n\r\n'.format(PATH, HOST).encode()
+    reader, writer = await asyncio.open_connection(HOST, port)
+    for _ in range(requests):
+        start = time.perf_counter()
+        if writer is None:
+            # the server closed the last connection, pay for a new one
+            reader, writer = await asyncio.open_connection(HOST, port)
+        writer.write(request)
+        headers = (await reader.readuntil(b'\r\n\r\n')).lower()
+        length = 0
+        for line in headers.split(b'\r\n'):
+            if line.startswith(b'content-length:'):
+                length = int(line.split(b':')[1])
+        await reader.readexactly(length)
+        latencies.append(time.perf_counter() - start)
+        if b'connection: close' in headers:
+            writer.close()
+            writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def load(port, connections, requests):
+    latencies = []
+    start = time.perf_counter()
+    results = await asyncio.gather(*(connection(port, requests, latencies) for _ in range(connections)),
+                                   return_exceptions=True)
+    elapsed = time.perf_counter() - start
+    errors = sum(1 for result in results if isinstance(result, Exception))
+    return latencies, elapsed, errors
+
+
+def percentile(samples, pct):
+    return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+
+def run(name, target, port, connections, requests):
+    server = multiprocessing.Process(target=target, args=(port,), daemon=True)
+    server.start()
+    try:
+        wait_for_port(port)
+        latencies, elapsed, errors = asyncio.run(load(port, connections, requests))
+    finally:
+        server.terminate()
+        server.join()
+
+    latencies.sort()
+    print('{:<6} {:>6} conns  {:>8.0f} req/s  p50 {:7.2f}ms  p99 {:7.2f}ms  p99.9 {:7.2f}ms  {} failed conns'.format(
+        name, connections, len(latencies) / elapsed,
+        percentile(latencies, 50) * 1e3, percentile(latencies, 99) * 1e3,
+        percentile(latencies, 99.9) * 1e3, errors))
+
+
+def main():
+    connections = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    requests = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    # every connection needs a file descriptor on both ends
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (min(hard, max(soft, 2 * connections + 1024)), hard))
+
+    run('wsgi', serve_wsgi, 5001, connections, requests)
+    try:
+        import uvicorn  # noqa: F401
+    except ImportError:
+        print('asgi   skipped, uvicorn is not installed')
+        return
+    run('asgi', serve_asgi, 5002, connections, requests)
+
+
+if __name__ == '__main__':
+    main()
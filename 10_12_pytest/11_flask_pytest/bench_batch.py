@@ -0,0 +1,47 @@
+"""
+Compares the throughput of seeding items one POST at a time against the batch endpoint
+
+usage: python bench_batch.py [number of items]
+"""
+import json
+import sys
+import time
+
+import app
+from store import ItemStore
+
+BATCH_SIZE = 1000
+
+
+def single(client, count):
+    for i in range(count):
+        client.post('/api/v1.0/items',
+                    data=json.dumps({'name': 'single-{}'.format(i), 'value': i}),
+                    content_type='application/json')
+
+
+def batched(client, count):
+    for start in range(0, count, BATCH_SIZE):
+        operations = [{'op': 'create', 'name': 'batch-{}'.format(i), 'value': i}
+                      for i in range(start, min(count, start + BATCH_SIZE))]
+        client.post('/api/v1.0/items:batch',
+                    data=json.dumps(operations),
+                    content_type='application/json')
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    client = app.app.test_client()
+
+    for name, seed in (('single POST', single), ('batch', batched)):
+        app.store = ItemStore()
+        start = time.perf_counter()
+        seed(client, count)
+        elapsed = time.perf_counter() - start
+        assert len(app.store) == count
+        print('{:<12} {:>8} items in {:6.2f}s  {:>10.0f} items/s'.format(
+            name, count, elapsed, count / elapsed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,28 @@
+"""
+Microbenchmarks for the JSON backends: encoding large item lists and decoding POST bodies
+
+usage: python bench_codec.py [number of items]
+"""
+import sys
+import timeit
+
+import codec
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    payload = {'items': [{'id': i, 'name': 'item-{}'.format(i), 'value': i * 7} for i in range(count)]}
+    body = codec.STDLIB.dumps({'name': 'box', 'value': 340})
+
+    for name in sorted(codec.BACKENDS):
+        codec.use(name)
+        runs = 5
+        encode = timeit.timeit(lambda: codec.dumps(payload), number=runs) / runs
+        decodes = 100000
+        decode = timeit.timeit(lambda: codec.CREATE_ITEM(codec.decode_body(body)), number=decodes) / decodes
+        print('{:<7} encode {} items {:8.2f}ms   decode + validate POST body {:6.2f}us'.format(
+            name, count, encode * 1e3, decode * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+Benchmarks GET, PUT & DELETE latency on the items API as the store grows
+
+usage: python bench_store.py [requests per size]
+"""
+import json
+import sys
+import time
+
+import app
+
+SIZES = [1000, 10000, 100000, 1000000]
+
+
+def fill(store, size):
+    """tops the store up to the given number of items"""
+    for i in range(len(store), size):
+        store.create('item-{}'.format(i), i)
+
+
+def percentile(samples, pct):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+
+def run(client, size, requests):
+    ids = [item['id'] for item in app.store][-requests:]
+    body = json.dumps({'value': 1})
+    timings = {'GET': [], 'PUT': [], 'DELETE': []}
+
+    for id in ids:
+        url = '/api/v1.0/items/{}'.format(id)
+        for method, call in (('GET', lambda: client.get(url)),
+                             ('PUT', lambda: client.put(url, data=body, content_type='application/json')),
+                             ('DELETE', lambda: client.delete(url))):
+            start = time.perf_counter()
+            call()
+            timings[method].append(time.perf_counter() - start)
+
+    for method, samples in timings.items():
+        print('{:>9} items  {:<6}  p50 {:7.1f}us  p99 {:7.1f}us'.format(
+            size, method, percentile(samples, 50) * 1e6, percentile(samples, 99) * 1e6))
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    client = app.app.test_client()
+
+    for size in SIZES:
+        fill(app.store, size + requests)
+        run(client, size, requests)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+class ResponseCache:
+    """
+    LRU cache of serialised response bodies, bounded by entries & bytes
+
+    Keys should include the store version they were built from, so a
+    write makes the old entries unreachable and they age out of the cache.
+    Each body is kept with a strong ETag taken from its content.
+
+    max_bytes: the total size of the cached bodies
+    max_body: bodies larger than this are not cached, so a few full
+        listings of a large store can't push everything else out
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=32 * 1024 * 1024, max_body=1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_body = max_body
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """returns the (body, etag) cached under key, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, body):
+        """
+        caches body under key, evicting the least recently used entries
+        until the cache is back within its bounds
+
+        :return: the (body, etag) entry, even if body was too large to cache
+        """
+        entry = body, hashlib.sha1(body).hexdigest()
+        if len(body) > self.max_body:
+            return entry
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= len(old[0])
+            self._entries[key] = entry
+            self.size += len(body)
+            while len(self._entries) > self.max_entries or self.size > self.max_bytes:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+        return entry
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,128 @@
+"""
+JSON codec and item schemas for the items API
+
+Encoding & decoding go through a pluggable backend, orjson when it is
+installed and the stdlib json module otherwise. Both produce the same
+compact, key sorted bytes that jsonify does, so switching backend never
+changes a response.
+"""
+import json
+
+MAX_BODY_SIZE = 1024 * 1024
+
+
+class StdlibJSON:
+    name = 'json'
+
+    def dumps(self, obj):
+        return json.dumps(obj, separators=(',', ':'), sort_keys=True).encode()
+
+    def loads(self, data):
+        return json.loads(data)
+
+
+class OrJSON:
+    name = 'orjson'
+
+    def __init__(self):
+        import orjson
+        self._orjson = orjson
+        self._options = orjson.OPT_SORT_KEYS
+
+    def dumps(self, obj):
+        try:
+            data = self._orjson.dumps(obj, option=self._options)
+        except TypeError:
+            # orjson only handles 64 bit integers, the stdlib has no limit
+            return STDLIB.dumps(obj)
+        if not data.isascii():
+            # orjson writes non-ASCII text as UTF-8, the stdlib escapes it
+            return STDLIB.dumps(obj)
+        return data
+
+    def loads(self, data):
+        return self._orjson.loads(data)
+
+
+STDLIB = StdlibJSON()
+BACKENDS = {'json': STDLIB}
+
+try:
+    BACKENDS['orjson'] = OrJSON()
+except ImportError:
+    pass
+
+backend = BACKENDS.get('orjson', STDLIB)
+
+
+def use(name):
+    """
+    selects the JSON backend, 'json' or 'orjson'
+
+    :raises KeyError: if that backend is not installed
+    """
+    global backend
+    backend = BACKENDS[name]
+
+
+def dumps(obj):
+    """encodes obj to compact, key sorted JSON bytes"""
+    return backend.dumps(obj)
+
+
+def decode_body(body, max_size=MAX_BODY_SIZE):
+    """
+    decodes a JSON request body holding an object or an array
+
+    Oversized bodies, and bodies that don't start like an object or an
+    array, are turned away before they are parsed.
+
+    :return: the decoded body, or None if it is too large or malformed
+    """
+    if not body or len(body) > max_size:
+        return None
+    start = body.lstrip()[:1]
+    if start != b'{' and start != b'[':
+        return None
+    try:
+        return backend.loads(body)
+    except ValueError:
+        return None
+
+
+def compile_schema(fields, required=()):
+    """
+    compiles a schema into a validator function
+
+    :param fields: a dict of field name -> type, a value must be exactly of
+        that type, so bools are not accepted as ints
+    :param required: the names of the fields that must be present
+    :return: a function taking a decoded body and returning a tuple of its
+        field values, in the order of fields, with None for missing optional
+        fields, or None if the body does not match the schema, which includes
+        a field that is present but null
+    """
+    fields = tuple(fields.items())
+    required = frozenset(required)
+
+    def validate(data):
+        if type(data) is not dict or not data:
+            return None
+        values = []
+        for name, field_type in fields:
+            if name in data:
+                value = data[name]
+                if type(value) is not field_type:
+                    return None
+            elif name in required:
+                return None
+            else:
+                value = None
+            values.append(value)
+        return tuple(values)
+
+    return validate
+
+
+CREATE_ITEM = compile_schema({'name': str, 'value': int}, required=('name', 'value'))
+UPDATE_ITEM = compile_schema({'name': str, 'value': int})
@@ -0,0 +1,188 @@
+"""
+Request metrics for the items API, exposed in the Prometheus text format
+
+Latencies go into HDR style histograms: every power of two between about
+1us and 64s is split into SUB_BUCKETS linear buckets, so the relative
+error stays under 1 / SUB_BUCKETS at any scale, and recording a value is
+a bisect plus an increment.
+"""
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+
+SUB_BUCKETS = 4
+
+
+def _hdr_bounds(low_exponent=-20, high_exponent=6):
+    bounds = []
+    for exponent in range(low_exponent, high_exponent):
+        base = 2.0 ** exponent
+        for step in range(SUB_BUCKETS):
+            bounds.append(base + base * step / SUB_BUCKETS)
+    bounds.append(2.0 ** high_exponent)
+    return bounds
+
+
+BOUNDS = _hdr_bounds()
+
+
+class Histogram:
+    """
+    Counts observations into fixed buckets
+
+    bounds: the sorted upper bound of each bucket, values above the last
+        bound go into an overflow bucket
+    """
+
+    def __init__(self, bounds=BOUNDS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def reset(self):
+        with self._lock:
+            self.counts = [0] * (len(self.bounds) + 1)
+            self.sum = 0.0
+            self.count = 0
+
+    def observe(self, value):
+        i = bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+
+    def quantile(self, q):
+        """returns the upper bound of the bucket holding the q-th quantile"""
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.bounds + [float('inf')], self.counts):
+            seen += count
+            if seen >= rank and seen:
+                return bound
+        return None
+
+
+def _key(name, labels):
+    # label order is whatever the call site uses, so each metric should
+    # always be recorded with its labels in the same order
+    return name, tuple(labels.items())
+
+
+def _labels(labels):
+    return ','.join('{}="{}"'.format(name, value) for name, value in labels)
+
+
+class Registry:
+    """
+    Holds named counters & histograms, each identified by a name plus labels
+
+    enabled: when False nothing is recorded, so instrumentation costs a
+        single attribute check
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self._counters = {}
+        self._histograms = {}
+        self._help = {}
+        self._lock = threading.Lock()
+
+    def describe(self, name, text):
+        self._help[name] = text
+
+    def inc(self, name, amount=1, **labels):
+        if not self.enabled:
+            return
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, value, **labels):
+        if not self.enabled:
+            return
+        self.histogram(name, **labels).observe(value)
+
+    def counter(self, name, **labels):
+        return self._counters.get(_key(name, labels), 0)
+
+    def histogram(self, name, **labels):
+        """
+        returns the histogram for name & labels, creating it if needed, hot
+        paths can hold on to it and observe into it directly
+        """
+        key = _key(name, labels)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, Histogram())
+        return histogram
+
+    def clear(self):
+        """zeroes every metric, histograms are reset in place so held references stay valid"""
+        with self._lock:
+            self._counters.clear()
+            for histogram in self._histograms.values():
+                histogram.reset()
+
+    def render(self):
+        """returns every metric in the Prometheus text exposition format"""
+        lines = []
+        typed = set()
+
+        def header(name, kind):
+            if name not in typed:
+                typed.add(name)
+                if name in self._help:
+                    lines.append('# HELP {} {}'.format(name, self._help[name]))
+                lines.append('# TYPE {} {}'.format(name, kind))
+
+        for (name, labels), value in sorted(self._counters.items()):
+            header(name, 'counter')
+            lines.append('{}{{{}}} {}'.format(name, _labels(labels), value))
+
+        for (name, labels), histogram in sorted(self._histograms.items()):
+            header(name, 'histogram')
+            label_text = _labels(labels)
+            prefix = label_text + ',' if label_text else ''
+            cumulative = 0
+            for bound, count in zip(histogram.bounds, histogram.counts):
+                cumulative += count
+                lines.append('{}_bucket{{{}le="{:.9g}"}} {}'.format(name, prefix, bound, cumulative))
+            lines.append('{}_bucket{{{}le="+Inf"}} {}'.format(name, prefix, histogram.count))
+            lines.append('{}_sum{{{}}} {}'.format(name, label_text, histogram.sum))
+            lines.append('{}_count{{{}}} {}'.format(name, label_text, histogram.count))
+
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+registry.describe('http_request_duration_seconds', 'Time spent handling a request, by route')
+registry.describe('http_errors_total', 'Error responses sent by the bad_request & not_found handlers')
+registry.describe('store_operation_duration_seconds', 'Time spent in item store operations')
+
+
+def instrument(store, operations):
+    """
+    times the given methods of a store, shadowing each with a wrapper that
+    records its duration under store_operation_duration_seconds
+    """
+    for operation in operations:
+        method = getattr(store, operation)
+        histogram = registry.histogram('store_operation_duration_seconds', operation=operation)
+
+        @wraps(method)
+        def timed(*args, _method=method, _histogram=histogram, **kwargs):
+            if not registry.enabled:
+                return _method(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return _method(*args, **kwargs)
+            finally:
+                _histogram.observe(time.perf_counter() - start)
+
+        setattr(store, operation, timed)
+    return store
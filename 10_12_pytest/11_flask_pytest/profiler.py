@@ -0,0 +1,68 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from itertools import count
+
+# numbers the dumps of this process, next() on it is atomic
+_dumps = count(1)
+
+
+class SamplingProfiler:
+    """
+    Samples the stack of one thread from a background thread
+
+    thread_id: the ident of the thread to profile
+    interval: seconds between samples
+
+    Sampling reads sys._current_frames(), so the profiled thread runs
+    untouched between samples. The result is written in the collapsed
+    stack format ('outer;inner count' per line) that flamegraph tools read.
+    """
+
+    def __init__(self, thread_id, interval=0.001):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _sample(self):
+        frame = sys._current_frames().get(self.thread_id)
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append('{}:{}'.format(os.path.basename(code.co_filename), code.co_name))
+            frame = frame.f_back
+        if stack:
+            self.stacks[';'.join(reversed(stack))] += 1
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self
+
+    def collapsed(self):
+        """returns the samples in the collapsed stack format"""
+        return ''.join('{} {}\n'.format(stack, count) for stack, count in self.stacks.most_common())
+
+    def dump(self, directory, name):
+        """
+        writes the collapsed stacks to <directory>/<name>-<time>-<pid>-<n>.folded,
+        n counting this process's dumps so no two share a file, and returns its path
+        """
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, '{}-{}-{}-{}.folded'.format(
+            name, time.strftime('%Y%m%d-%H%M%S'), os.getpid(), next(_dumps)))
+        with open(path, 'x') as f:
+            f.write(self.collapsed())
+        return path
@@ -0,0 +1,400 @@
+import threading
+from bisect import bisect_left, bisect_right, insort
+from itertools import chain, islice
+
+MISSING = 'missing'
+DUPLICATE = 'duplicate'
+
+# the first & largest number of items scan_by_value reads at a time
+SCAN_CHUNK = 64
+MAX_SCAN_CHUNK = 4096
+
+
+class BatchError(Exception):
+    """
+    Raised when a batch cannot be applied
+
+    errors: a list of (index, reason) pairs, reason being MISSING or DUPLICATE
+    """
+
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = errors
+
+
+class DuplicateItem(Exception):
+    """Raised when creating an item whose name is already in the store"""
+
+
+class SortedList:
+    """
+    A sorted list kept as a list of chunks of at most 2 * load values
+
+    Adding or removing a value bisects the chunk maxes and then one chunk,
+    so it only moves O(load) values however long the list gets, instead of
+    O(n) for insort & del on one flat list. A chunk is split in two when
+    it grows past 2 * load and dropped when it empties.
+    """
+
+    def __init__(self, load=512):
+        self._load = load
+        self._chunks = []
+        self._maxes = []
+        self._len = 0
+
+    def add(self, value):
+        chunks, maxes = self._chunks, self._maxes
+        self._len += 1
+        if not chunks:
+            chunks.append([value])
+            maxes.append(value)
+            return
+        i = bisect_right(maxes, value)
+        if i == len(chunks):
+            i -= 1
+            chunks[i].append(value)
+            maxes[i] = value
+        else:
+            insort(chunks[i], value)
+        chunk = chunks[i]
+        if len(chunk) > 2 * self._load:
+            chunks.insert(i + 1, chunk[self._load:])
+            del chunk[self._load:]
+            maxes.insert(i, chunk[-1])
+
+    def remove(self, value):
+        """removes value, raising ValueError if it is not in the list"""
+        i = bisect_left(self._maxes, value)
+        chunk = self._chunks[i] if i < len(self._chunks) else []
+        j = bisect_left(chunk, value)
+        if j == len(chunk) or chunk[j] != value:
+            raise ValueError('{!r} not in list'.format(value))
+        del chunk[j]
+        self._len -= 1
+        if chunk:
+            self._maxes[i] = chunk[-1]
+        else:
+            del self._chunks[i]
+            del self._maxes[i]
+
+    def irange(self, low=None, high=None, inclusive=True):
+        """
+        yields the values from low to high, both ends inclusive unless
+        inclusive is False, which excludes low
+        """
+        if low is None:
+            i = j = 0
+        else:
+            search = bisect_left if inclusive else bisect_right
+            i = search(self._maxes, low)
+            j = search(self._chunks[i], low) if i < len(self._chunks) else 0
+        for chunk in chain([self._chunks[i][j:]] if i < len(self._chunks) else [], self._chunks[i + 1:]):
+            for value in chunk:
+                if high is not None and value > high:
+                    return
+                yield value
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError('list index out of range')
+        for chunk in self._chunks:
+            if index < len(chunk):
+                return chunk[index]
+            index -= len(chunk)
+
+    def __reversed__(self):
+        for chunk in reversed(self._chunks):
+            yield from reversed(chunk)
+
+    def __iter__(self):
+        return chain.from_iterable(self._chunks)
+
+    def __len__(self):
+        return self._len
+
+
+class ItemStore:
+    """
+    In-memory item store backing the items API
+
+    Items are kept in an id -> item dict alongside a name -> count index,
+    so lookups by id or name, creates, updates and removes are all O(1).
+    Ids come from a monotonic counter and are never reused, so an
+    append-only list of ids stays sorted and lets scan() seek to a cursor
+    with bisect. Deleted ids are left in that list and compacted away
+    once they make up half of it.
+
+    Every change is handed to _persist() as a list of ('put', item) and
+    ('delete', id) records before it is applied in memory. This store
+    keeps nothing, durable backends override it to write ahead.
+
+    version is bumped once per applied write, and each changed item
+    records the version it was last written at, so callers can tell
+    whether anything they cached has changed. Both are bumped only once
+    the write is visible, so anything read after a version was read is
+    at least that new.
+
+    A SortedList of (value, id) pairs, kept up to date on every write,
+    answers value range and top-k queries in O(log n + k), and a running
+    sum answers aggregates without scanning.
+
+    Writes are serialised by a lock and never modify an item in place,
+    they swap in a new dict instead. Readers take no lock: a dict lookup
+    is atomic, and an item they hold never changes under them.
+    """
+
+    def __init__(self, items=None):
+        self._items = {}
+        self._names = {}
+        self._order = []
+        self._versions = {}
+        self._by_value = SortedList()
+        self._sum = 0
+        self._next_id = 1
+        self._lock = threading.RLock()
+        self.version = 0
+        for item in sorted(items or [], key=lambda item: item['id']):
+            self._put(dict(item))
+
+    def _persist(self, changes):
+        """writes a list of changes ahead of applying them, a no-op in memory"""
+
+    def _apply(self, changes):
+        version = self.version + 1
+        for op, change in changes:
+            if op == 'put':
+                self._put(change)
+                self._versions[change['id']] = version
+            elif change in self._items:
+                self._remove(change)
+                self._versions.pop(change, None)
+        self.version = version
+
+    def _write(self, changes):
+        """persists then applies a single change, returning the item it touched"""
+        self._persist(changes)
+        self._apply(changes)
+        op, change = changes[0]
+        return self._items[change['id']] if op == 'put' else None
+
+    def _put(self, item):
+        current = self._items.get(item['id'])
+        if current is None:
+            self._items[item['id']] = item
+            self._order.append(item['id'])
+            self._add_name(item['name'])
+            self._add_value(item)
+            self._next_id = max(self._next_id, item['id'] + 1)
+            return item
+        if item['name'] != current['name']:
+            self._remove_name(current['name'])
+            self._add_name(item['name'])
+        if item['value'] != current['value']:
+            self._remove_value(current)
+            self._add_value(item)
+        self._items[item['id']] = item
+        return item
+
+    def _remove(self, id):
+        item = self._items.pop(id)
+        self._remove_name(item['name'])
+        self._remove_value(item)
+        if len(self._order) > 2 * len(self._items) + 64:
+            self._order = [id for id in self._order if id in self._items]
+        return item
+
+    def _add_value(self, item):
+        self._by_value.add((item['value'], item['id']))
+        self._sum += item['value']
+
+    def _remove_value(self, item):
+        self._by_value.remove((item['value'], item['id']))
+        self._sum -= item['value']
+
+    def _add_name(self, name):
+        self._names[name] = self._names.get(name, 0) + 1
+
+    def _remove_name(self, name):
+        count = self._names.pop(name)
+        if count > 1:
+            self._names[name] = count - 1
+
+    def get(self, id):
+        """returns the item with the given id, or None"""
+        return self._items.get(id)
+
+    def item_version(self, id):
+        """returns the version the item was last written at"""
+        return self._versions.get(id, 0)
+
+    def exists(self, name):
+        """checks if an item with the given name is in the store"""
+        return name in self._names
+
+    def create(self, name, value):
+        """
+        adds a new item, allocating the next id, and returns it
+
+        :raises DuplicateItem: if an item already has this name
+        """
+        with self._lock:
+            if name in self._names:
+                raise DuplicateItem(name)
+            return self._write([('put', {'id': self._next_id, 'name': name, 'value': value})])
+
+    def update(self, id, name=None, value=None):
+        """
+        updates the name & value of an existing item and returns it, a name
+        or value of None keeps the current one
+
+        :raises KeyError: if there is no item with this id
+        """
+        with self._lock:
+            item = self._items[id]
+            return self._write([('put', {'id': id,
+                                         'name': item['name'] if name is None else name,
+                                         'value': item['value'] if value is None else value})])
+
+    def delete(self, id):
+        """removes the item with the given id, raises KeyError if missing"""
+        with self._lock:
+            item = self._items[id]
+            self._write([('delete', id)])
+            return item
+
+    def scan(self, after=0):
+        """
+        yields items in id order, starting after the given id
+
+        The id list is read by position, so items created while a scan is
+        in progress are picked up and deletes don't break the iteration.
+        """
+        order = self._order
+        i = bisect_right(order, after)
+        while i < len(order):
+            item = self._items.get(order[i])
+            if item is not None:
+                yield item
+            i += 1
+
+    def by_value(self, min_value=None, max_value=None, after=None, limit=None):
+        """
+        returns the items with min_value <= value <= max_value, sorted by
+        value and then id
+
+        :param after: a (value, id) pair, only items sorting after it are returned
+        :param limit: the most items to return, None for all of them
+        """
+        low = None if min_value is None else (min_value,)
+        inclusive = True
+        # after excludes itself, and wins when it is past min_value
+        if after is not None and (low is None or after >= low):
+            low, inclusive = tuple(after), False
+        high = None if max_value is None else (max_value, float('inf'))
+        with self._lock:
+            return [self._items[id] for value, id in islice(self._by_value.irange(low, high, inclusive), limit)]
+
+    def scan_by_value(self, min_value=None, max_value=None, after=None):
+        """
+        yields the items by_value would return, reading them in chunks that
+        start small and grow, so a caller that stops early only reads a
+        little more than it used, and writers are only held off per chunk
+        """
+        chunk = SCAN_CHUNK
+        while True:
+            items = self.by_value(min_value, max_value, after, chunk)
+            yield from items
+            if len(items) < chunk:
+                return
+            after = items[-1]['value'], items[-1]['id']
+            chunk = min(2 * chunk, MAX_SCAN_CHUNK)
+
+    def top(self, k):
+        """returns the k items with the highest values, highest first"""
+        with self._lock:
+            return [self._items[id] for value, id in islice(reversed(self._by_value), max(k, 0))]
+
+    def stats(self):
+        """returns the count, sum, min & max of the item values"""
+        with self._lock:
+            index = self._by_value
+            return {'count': len(index),
+                    'sum': self._sum,
+                    'min': index[0][0] if index else None,
+                    'max': index[-1][0] if index else None}
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        return self.scan()
+
+    def apply_batch(self, operations):
+        """
+        validates and applies a batch of operations atomically
+
+        :param operations: a list of (op, id, name, value) tuples, op being
+            'create', 'update' or 'delete'. create ignores id, delete ignores
+            name & value, and update keeps the current name or value if None
+        :return: a list with the created, updated or deleted item per operation
+        :raises BatchError: if any operation fails, nothing is applied
+        """
+
+        with self._lock:
+            return self._apply_batch(operations)
+
+    def _apply_batch(self, operations):
+        # replay the batch against a view of the pending changes first, so
+        # every operation is checked against the state it will really see
+        pending = {}
+        name_counts = {}
+        changes = []
+        results = []
+        errors = []
+        next_id = self._next_id
+
+        def count(name):
+            return name_counts.get(name, self._names.get(name, 0))
+
+        for index, (op, id, name, value) in enumerate(operations):
+            if op == 'create':
+                if count(name):
+                    errors.append((index, DUPLICATE))
+                    continue
+                name_counts[name] = 1
+                item = {'id': next_id, 'name': name, 'value': value}
+                pending[next_id] = item
+                next_id += 1
+                changes.append(('put', item))
+                results.append(dict(item))
+                continue
+
+            current = pending[id] if id in pending else self._items.get(id)
+            if current is None:
+                errors.append((index, MISSING))
+                continue
+
+            if op == 'delete':
+                pending[id] = None
+                name_counts[current['name']] = count(current['name']) - 1
+                changes.append(('delete', id))
+                results.append(dict(current))
+            else:
+                name = current['name'] if name is None else name
+                value = current['value'] if value is None else value
+                item = {'id': id, 'name': name, 'value': value}
+                pending[id] = item
+                if name != current['name']:
+                    name_counts[current['name']] = count(current['name']) - 1
+                    name_counts[name] = count(name) + 1
+                changes.append(('put', item))
+                results.append(dict(item))
+
+        if errors:
+            raise BatchError(errors)
+
+        self._persist(changes)
+        self._apply(changes)
+        return results
@@ -249,6 +249,22 @@ def test_update_item_incorrect_value_type(test_client, item_with_bad_value):
     assert response.status_code == 400
     assert data['error'] == app.BAD_REQUEST
 
+def test_update_item_null_value(test_client):
+    """
+    GIVEN a flask application
+    WHEN a user updates an item, setting its value to null
+    THEN check that a valid 400 response is provided
+    """
+
+    response = test_client.put(GOOD_ITEM_URL,
+                               data=json.dumps({'value': None}),
+                               content_type='application/json')
+
+    data = json.loads(response.get_data())
+
+    assert response.status_code == 400
+    assert data['error'] == app.BAD_REQUEST
+
 def test_delete_item(test_client):
     """
     GIVEN a flask application
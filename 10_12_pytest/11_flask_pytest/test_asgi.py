@@ -0,0 +1,185 @@
+import asyncio
+import json
+
+import pytest
+
+import app
+import asgi_app
+from cache import ResponseCache
+from store import ItemStore
+
+BASE_URL = '/api/v1.0/items'
+
+
+@pytest.fixture(scope='function')
+def client(monkeypatch):
+    """
+    returns a function sending one request through the ASGI app, over a fresh
+    copy of the default store, and giving back (status, data)
+    """
+    monkeypatch.setattr(app, 'store', ItemStore(app.SEED_ITEMS))
+    monkeypatch.setattr(app, 'cache', ResponseCache())
+
+    def _request(method, path, payload=None, content_type='application/json', headers=None, body=None):
+        if body is None:
+            body = json.dumps(payload).encode() if payload is not None else b''
+        path, _, query_string = path.partition('?')
+        scope = {'type': 'http', 'method': method, 'path': path, 'query_string': query_string.encode(),
+                 'headers': [(b'content-type', content_type.encode())] +
+                            [(name.encode(), value.encode()) for name, value in (headers or {}).items()]}
+        sent = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': body, 'more_body': False}
+
+        async def send(message):
+            sent.append(message)
+
+        asyncio.run(asgi_app.app(scope, receive, send))
+        data = b''.join(message['body'] for message in sent[1:])
+        _request.headers = {name.decode(): value.decode() for name, value in sent[0]['headers']}
+        _request.data = data
+        if not data or _request.headers.get('content-type') != 'application/json':
+            return sent[0]['status'], None
+        return sent[0]['status'], json.loads(data)
+
+    return _request
+
+
+def test_get_items(client):
+    """
+    GIVEN the ASGI application containing 3 items
+    WHEN a user requests all items and then a single item
+    THEN check that the same payloads as the flask app are returned
+    """
+
+    assert client('GET', BASE_URL) == (200, {'items': app.SEED_ITEMS})
+    assert client('GET', BASE_URL + '/3') == (200, {'items': [app.SEED_ITEMS[2]]})
+    assert client('GET', BASE_URL + '/5') == (404, {'error': app.NOT_FOUND})
+
+
+def test_create_update_delete(client):
+    """
+    GIVEN the ASGI application
+    WHEN a user creates, updates & deletes an item
+    THEN check that each step succeeds and the store follows
+    """
+
+    status, data = client('POST', BASE_URL, {'name': 'box', 'value': 340})
+    assert status == 201
+    assert data['item'] == {'id': 4, 'name': 'box', 'value': 340}
+
+    assert client('PUT', BASE_URL + '/4', {'value': 300}) == (200, {'item': {'id': 4, 'name': 'box', 'value': 300}})
+    assert client('DELETE', BASE_URL + '/4') == (204, None)
+    assert client('DELETE', BASE_URL + '/4') == (404, {'error': app.NOT_FOUND})
+
+
+@pytest.mark.parametrize('method, path, payload, content_type',
+                         [('POST', BASE_URL, {'value': 340}, 'application/json'),
+                          ('POST', BASE_URL, {'name': 'chair', 'value': 300}, 'application/json'),
+                          ('POST', BASE_URL, {'name': 'box', 'value': 'thirty'}, 'application/json'),
+                          ('PUT', BASE_URL + '/3', {'name': 'box', 'value': 340}, 'text/plain'),
+                          ('PUT', BASE_URL + '/3', {'value': 'thirty'}, 'application/json'),
+                          ('PUT', BASE_URL + '/3', {'value': None}, 'application/json')])
+def test_bad_requests(client, method, path, payload, content_type):
+    """
+    GIVEN the ASGI application
+    WHEN a user sends an invalid item, duplicate name or wrong content type
+    THEN check that the bad request response is provided
+    """
+
+    assert client(method, path, payload, content_type) == (400, {'error': app.BAD_REQUEST})
+
+
+@pytest.mark.parametrize('path', [BASE_URL + '?limit=1&min_value=100',
+                                  BASE_URL + '?sort=value&fields=name',
+                                  BASE_URL + '/top?k=2',
+                                  BASE_URL + '/stats',
+                                  BASE_URL + '?limit=0',
+                                  BASE_URL + '/missing'])
+def test_same_response_as_flask(client, path):
+    """
+    GIVEN the ASGI application and the flask app over the same store
+    WHEN a user requests a listing with query parameters or another route
+    THEN check that both answer with the same status, payload & ETag
+    """
+
+    flask_response = app.app.test_client().get(path)
+
+    assert client('GET', path) == (flask_response.status_code, flask_response.get_json())
+    assert client.headers.get('etag') == flask_response.headers.get('ETag')
+
+
+def test_batch(client):
+    """
+    GIVEN the ASGI application
+    WHEN a user sends a batch of operations
+    THEN check that it is applied as the flask app applies it
+    """
+
+    status, data = client('POST', BASE_URL + ':batch', [{'op': 'create', 'name': 'box', 'value': 340},
+                                                       {'op': 'delete', 'id': 1}])
+
+    assert status == 200
+    assert [result['status'] for result in data['results']] == [201, 204]
+    assert client('GET', BASE_URL + '/1')[0] == 404
+
+
+def test_conditional_get(client):
+    """
+    GIVEN the ASGI application
+    WHEN a user repeats a GET with the ETag from the first response
+    THEN check that a 304 is returned, and the ETag matches the flask app's
+    """
+
+    for path in (BASE_URL, BASE_URL + '/1'):
+        client('GET', path)
+        etag = client.headers['etag']
+        assert client('GET', path, headers={'if-none-match': etag}) == (304, None)
+        assert app.app.test_client().get(path).headers['ETag'] == etag
+
+
+@pytest.mark.parametrize('method', ['HEAD', 'OPTIONS', 'PATCH'])
+def test_other_methods_as_flask(client, method):
+    """
+    GIVEN the ASGI application and the flask app over the same store
+    WHEN a user sends an item a method neither serves it with
+    THEN check that both answer with the same status
+    """
+
+    flask_response = app.app.test_client().open(BASE_URL + '/1', method=method)
+
+    assert client(method, BASE_URL + '/1')[0] == flask_response.status_code
+
+
+@pytest.mark.parametrize('path, status', [(BASE_URL, 400), (BASE_URL + '/1', 400),
+                                          (BASE_URL + '/9', 404), ('/nothere', 404)])
+def test_oversized_body(client, path, status):
+    """
+    GIVEN the ASGI application
+    WHEN a user sends a body over the size limit
+    THEN check that it is answered as its route answers it, a 404 when
+         there is no such item or route and a bad request otherwise
+    """
+
+    body = b'{"name": "' + b'x' * (2 * 1024 * 1024) + b'"}'
+    method = 'POST' if path in (BASE_URL, '/nothere') else 'PUT'
+
+    assert client(method, path, body=body)[0] == status
+
+
+@pytest.mark.parametrize('stream', ['ndjson', 'json'])
+def test_streamed_listing(client, stream):
+    """
+    GIVEN the ASGI application and the flask app over the same store
+    WHEN a user requests a streamed listing
+    THEN check that it is sent without a length and with flask's body
+    """
+
+    path = BASE_URL + '?stream=' + stream
+    flask_response = app.app.test_client().get(path)
+
+    assert client('GET', path)[0] == 200
+    assert 'content-length' not in client.headers
+    assert client.headers['content-type'] == flask_response.headers['Content-Type']
+    assert client.data == flask_response.get_data()
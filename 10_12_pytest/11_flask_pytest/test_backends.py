@@ -0,0 +1,83 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from backends import SQLiteStore, LogStore
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+@pytest.fixture(scope='function', params=['sqlite', 'log'])
+def open_store(request, tmp_path):
+    """
+    returns a function (re)opening a durable store of each kind in a temporary directory
+    """
+    def _open(**kwargs):
+        if request.param == 'sqlite':
+            return SQLiteStore(str(tmp_path / 'items.db'))
+        return LogStore(str(tmp_path / 'items'), **kwargs)
+
+    return _open
+
+
+def test_changes_survive_reopen(open_store):
+    """
+    GIVEN a durable store
+    WHEN items are created, updated, deleted & batched and the store is reopened
+    THEN check that the reopened store holds the same items and id counter
+    """
+
+    store = open_store()
+    store.create('laptop', 1000)
+    store.create('chair', 300)
+    store.update(1, 'laptop', 900)
+    store.apply_batch([('create', None, 'book', 20), ('delete', 2, None, None),
+                       ('create', None, 'box', 340), ('delete', 4, None, None)])
+    store.close()
+
+    store = open_store()
+
+    assert list(store) == [{'id': 1, 'name': 'laptop', 'value': 900},
+                           {'id': 3, 'name': 'book', 'value': 20}]
+    assert store.exists('book')
+    assert store.create('lamp', 15)['id'] == 5
+
+
+def test_log_store_snapshot_and_torn_tail(tmp_path):
+    """
+    GIVEN a log store that snapshots every 3 writes
+    WHEN more writes are made and the last log line is torn
+    THEN check that the store reloads the snapshot, replays the intact log and drops the torn line
+    """
+
+    directory = str(tmp_path / 'items')
+    store = LogStore(directory, snapshot_every=3)
+    for i in range(5):
+        store.create('item{}'.format(i), i)
+    store.close()
+
+    assert os.path.exists(os.path.join(directory, 'snapshot'))
+    with open(os.path.join(directory, 'log'), 'ab') as log:
+        log.write(b'[["put", {"id": 9, "na')
+
+    store = LogStore(directory, snapshot_every=3)
+
+    assert [item['id'] for item in store] == [1, 2, 3, 4, 5]
+    assert store.create('item5', 5)['id'] == 6
+
+
+@pytest.mark.parametrize('url', ['sqlite:{}/items.db', 'log:{}/items'])
+def test_app_suite_on_durable_store(tmp_path, url):
+    """
+    GIVEN the flask application backed by a durable store
+    WHEN the test_app.py suite runs against it
+    THEN check that every test passes
+    """
+
+    env = dict(os.environ, ITEMS_STORE=url.format(tmp_path))
+    result = subprocess.run([sys.executable, '-m', 'pytest', '-q', '-p', 'no:cacheprovider', 'test_app.py'],
+                            cwd=HERE, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+
+    assert result.returncode == 0, result.stdout.decode()
@@ -0,0 +1,100 @@
+import app
+import pytest
+
+import json
+
+from store import ItemStore
+
+BATCH_URL = 'http://127.0.0.1:5000/api/v1.0/items:batch'
+
+
+@pytest.fixture(scope='function')
+def test_client(monkeypatch):
+    """
+    Create a flask test client over a fresh store holding the 3 default items
+    """
+    monkeypatch.setattr(app, 'store', ItemStore([{'id': 1, 'name': 'laptop', 'value': 1000},
+                                                 {'id': 2, 'name': 'chair', 'value': 300},
+                                                 {'id': 3, 'name': 'book', 'value': 20}]))
+
+    testing_client = app.app.test_client()
+    testing_client.testing = True
+
+    yield testing_client
+
+
+def post_batch(test_client, operations):
+    response = test_client.post(BATCH_URL,
+                                data=json.dumps(operations),
+                                content_type='application/json')
+    return response, json.loads(response.get_data())
+
+
+def test_batch_good(test_client):
+    """
+    GIVEN a flask application containing 3 items
+    WHEN a user sends a batch of creates, an update and a delete
+    THEN check that all are applied and a result is returned per operation
+    """
+
+    response, data = post_batch(test_client, [{'op': 'create', 'name': 'box', 'value': 340},
+                                              {'op': 'update', 'id': 3, 'value': 25},
+                                              {'op': 'delete', 'id': 2},
+                                              {'op': 'create', 'name': 'chair', 'value': 150}])
+
+    assert response.status_code == 200
+    assert [result['status'] for result in data['results']] == [201, 200, 204, 201]
+    assert data['results'][0]['item'] == {'id': 4, 'name': 'box', 'value': 340}
+    assert data['results'][1]['item'] == {'id': 3, 'name': 'book', 'value': 25}
+    assert data['results'][3]['item']['id'] == 5
+    assert len(app.store) == 4
+
+
+def test_batch_is_atomic(test_client):
+    """
+    GIVEN a flask application containing 3 items
+    WHEN a user sends a batch where some operations conflict with earlier ones
+    THEN check that each failure is reported and nothing is applied
+    """
+
+    response, data = post_batch(test_client, [{'op': 'create', 'name': 'box', 'value': 340},
+                                              {'op': 'create', 'name': 'box', 'value': 1},
+                                              {'op': 'delete', 'id': 2},
+                                              {'op': 'update', 'id': 2, 'value': 1}])
+
+    assert response.status_code == 400
+    assert data['errors'] == [{'index': 1, 'status': 400, 'error': app.BAD_REQUEST},
+                              {'index': 3, 'status': 404, 'error': app.NOT_FOUND}]
+    assert len(app.store) == 3
+    assert not app.store.exists('box')
+
+
+def test_batch_invalid_value(test_client):
+    """
+    GIVEN a flask application containing 3 items
+    WHEN a user sends a batch containing an item with an invalid value
+    THEN check that the operation is reported and nothing is applied
+    """
+
+    response, data = post_batch(test_client, [{'op': 'delete', 'id': 2},
+                                              {'op': 'update', 'id': 1, 'value': 'thirty'}])
+
+    assert response.status_code == 400
+    assert data['errors'] == [{'index': 1, 'status': 400, 'error': app.BAD_REQUEST}]
+    assert app.store.get(2) is not None
+
+
+@pytest.mark.parametrize('body', [[], {'op': 'delete', 'id': 1}, [{'op': 'rename', 'id': 1}],
+                                  [{'op': 'delete'}], [{'op': 'create', 'name': 'box'}]])
+def test_batch_malformed(test_client, body):
+    """
+    GIVEN a flask application
+    WHEN a user sends a malformed batch
+    THEN check that a bad request response is provided
+    """
+
+    response, data = post_batch(test_client, body)
+
+    assert response.status_code == 400
+    assert data['error'] == app.BAD_REQUEST
+    assert len(app.store) == 3
@@ -0,0 +1,137 @@
+import app
+import pytest
+
+import json
+
+from cache import ResponseCache
+from store import ItemStore
+
+BASE_URL = 'http://127.0.0.1:5000/api/v1.0/items'
+ITEM_URL = '{}/1'.format(BASE_URL)
+
+
+@pytest.fixture(scope='function')
+def test_client(monkeypatch):
+    """
+    Create a flask test client over a fresh store and an empty response cache
+    """
+    monkeypatch.setattr(app, 'store', ItemStore([{'id': 1, 'name': 'laptop', 'value': 1000},
+                                                 {'id': 2, 'name': 'chair', 'value': 300}]))
+    monkeypatch.setattr(app, 'cache', ResponseCache())
+
+    testing_client = app.app.test_client()
+    testing_client.testing = True
+
+    yield testing_client
+
+
+def test_cache_evicts_least_recently_used():
+    """
+    GIVEN a cache holding at most 2 entries
+    WHEN a third entry is added after reading the first
+    THEN check that the second, least recently used, entry is evicted
+    """
+
+    cache = ResponseCache(max_entries=2)
+    cache.put('a', b'1')
+    cache.put('b', b'2')
+    cache.get('a')
+    cache.put('c', b'3')
+
+    assert len(cache) == 2
+    assert cache.get('b') is None
+    assert cache.get('a')[0] == b'1'
+
+
+@pytest.mark.parametrize('url', [BASE_URL, ITEM_URL, '{}?limit=1'.format(BASE_URL)])
+def test_conditional_get_not_modified(test_client, url):
+    """
+    GIVEN a flask application
+    WHEN a user repeats a GET with the ETag from the first response
+    THEN check that a 304 with no body is returned
+    """
+
+    response = test_client.get(url)
+    etag = response.headers['ETag']
+
+    repeat = test_client.get(url, headers={'If-None-Match': etag})
+
+    assert response.status_code == 200
+    assert repeat.status_code == 304
+    assert repeat.get_data() == b''
+    assert repeat.headers['ETag'] == etag
+
+
+def test_write_changes_etag(test_client):
+    """
+    GIVEN a flask application
+    WHEN a user updates an item after reading it
+    THEN check that the item and the listing are served fresh with new ETags
+    """
+
+    item_etag = test_client.get(ITEM_URL).headers['ETag']
+    list_etag = test_client.get(BASE_URL).headers['ETag']
+
+    test_client.put(ITEM_URL, data=json.dumps({'value': 900}), content_type='application/json')
+
+    item = test_client.get(ITEM_URL, headers={'If-None-Match': item_etag})
+    listing = test_client.get(BASE_URL, headers={'If-None-Match': list_etag})
+
+    assert item.status_code == 200
+    assert json.loads(item.get_data())['items'][0]['value'] == 900
+    assert listing.status_code == 200
+    assert listing.headers['ETag'] != list_etag
+
+
+def test_unrelated_write_keeps_item_etag(test_client):
+    """
+    GIVEN a flask application
+    WHEN a different item is updated
+    THEN check that the first item still answers 304
+    """
+
+    etag = test_client.get(ITEM_URL).headers['ETag']
+
+    test_client.put('{}/2'.format(BASE_URL), data=json.dumps({'value': 1}), content_type='application/json')
+
+    assert test_client.get(ITEM_URL, headers={'If-None-Match': etag}).status_code == 304
+
+
+def test_cache_bounded_by_bytes():
+    """
+    GIVEN a cache holding at most 10 bytes, and bodies of at most 6
+    WHEN bodies are added past those bounds
+    THEN check that the oldest are evicted and oversized ones are not kept
+    """
+
+    cache = ResponseCache(max_bytes=10, max_body=6)
+    cache.put('a', b'1234')
+    cache.put('b', b'5678')
+    cache.put('c', b'90')
+    assert cache.size == 10
+
+    body, etag = cache.put('big', b'1234567')
+    assert body == b'1234567' and etag
+    assert cache.get('big') is None
+
+    cache.put('d', b'123')
+    assert cache.get('a') is None
+    assert cache.size == 9
+    assert len(cache) == 3
+
+
+def test_unknown_query_parameters_share_entry(test_client):
+    """
+    GIVEN a flask application
+    WHEN the listing is requested with different unknown query parameters
+    THEN check that they are answered from one cache entry
+    """
+
+    for i in range(5):
+        response = test_client.get('{}?junk={}'.format(BASE_URL, i))
+        assert response.status_code == 200
+
+    test_client.get('{}?limit=1&junk=1'.format(BASE_URL))
+    test_client.get('{}?limit=01'.format(BASE_URL))
+
+    assert len(app.cache) == 2
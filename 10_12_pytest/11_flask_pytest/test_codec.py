@@ -0,0 +1,82 @@
+import app
+import pytest
+
+import json
+
+import codec
+
+BASE_URL = 'http://127.0.0.1:5000/api/v1.0/items'
+ITEMS = {'items': [{'value': 1000, 'name': 'laptop', 'id': 1}, {'id': 2, 'name': 'chäir', 'value': 2 ** 70}]}
+
+
+@pytest.fixture(scope='function', params=sorted(codec.BACKENDS))
+def backend(request):
+    """
+    selects each installed JSON backend in turn
+    """
+    previous = codec.backend
+    codec.use(request.param)
+    yield request.param
+    codec.backend = previous
+
+
+@pytest.mark.parametrize('payload', [ITEMS, {'item': {'id': 3, 'name': 'café ☕', 'value': 5}}])
+def test_dumps_matches_stdlib(backend, payload):
+    """
+    GIVEN each JSON backend
+    WHEN a payload, with huge integers or non-ASCII names, is encoded
+    THEN check that the bytes are the compact, key sorted stdlib encoding
+    """
+
+    assert codec.dumps(payload) == json.dumps(payload, separators=(',', ':'), sort_keys=True).encode()
+
+
+@pytest.mark.parametrize('body', [b'', b'"box"', b'42', b'{"name": ', b'[1, 2',
+                                  b'{"name": "' + b'x' * codec.MAX_BODY_SIZE + b'"}'])
+def test_decode_body_rejects(backend, body):
+    """
+    GIVEN each JSON backend
+    WHEN a body that is empty, not an object or array, malformed or too large is decoded
+    THEN check that None is returned
+    """
+
+    assert codec.decode_body(body) is None
+
+
+@pytest.mark.parametrize('data, expected',
+                         [({'name': 'box', 'value': 340}, ('box', 340)),
+                          ({'name': 'box'}, None),
+                          ({'name': 'box', 'value': None}, None),
+                          ({'name': 'box', 'value': True}, None),
+                          ({'name': 'box', 'value': 3.4}, None),
+                          ({'name': ['box'], 'value': 340}, None),
+                          ([{'name': 'box', 'value': 340}], None)])
+def test_create_item_schema(data, expected):
+    assert codec.CREATE_ITEM(data) == expected
+
+
+@pytest.mark.parametrize('data, expected',
+                         [({'value': 340}, (None, 340)),
+                          ({'name': 'box'}, ('box', None)),
+                          ({}, None),
+                          ({'value': None}, None),
+                          ({'name': None, 'value': 340}, None),
+                          ({'value': 'thirty'}, None)])
+def test_update_item_schema(data, expected):
+    assert codec.UPDATE_ITEM(data) == expected
+
+
+@pytest.mark.parametrize('body', [json.dumps({'name': 'box', 'value': 'x' * codec.MAX_BODY_SIZE}),
+                                  json.dumps({'name': {'box': 1}, 'value': 340}),
+                                  '{"name": "box", "value": 340'])
+def test_create_item_bad_body(body):
+    """
+    GIVEN a flask application
+    WHEN a user posts an oversized, badly typed or malformed body
+    THEN check that a bad request response is provided
+    """
+
+    response = app.app.test_client().post(BASE_URL, data=body, content_type='application/json')
+
+    assert response.status_code == 400
+    assert json.loads(response.get_data())['error'] == app.BAD_REQUEST
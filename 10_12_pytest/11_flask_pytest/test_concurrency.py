@@ -0,0 +1,75 @@
+import app
+import pytest
+
+import json
+import random
+import sys
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from store import ItemStore
+
+BASE_URL = 'http://127.0.0.1:5000/api/v1.0/items'
+REQUESTS = 3000
+THREADS = 16
+
+
+@pytest.fixture(scope='function')
+def store(monkeypatch):
+    """
+    replaces the app store with an empty one, and makes threads switch
+    as often as possible so that races actually show up
+    """
+    store = ItemStore()
+    monkeypatch.setattr(app, 'store', store)
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield store
+    sys.setswitchinterval(interval)
+
+
+def request(i):
+    """
+    sends one random POST, PUT or DELETE, names & ids are drawn from small
+    pools so that requests collide, returns (method, status, body)
+    """
+    rnd = random.Random(i)
+    client = app.app.test_client()
+    method = rnd.choice(['POST', 'POST', 'PUT', 'DELETE'])
+
+    if method == 'POST':
+        body = {'name': 'item{}'.format(rnd.randrange(500)), 'value': i}
+        response = client.post(BASE_URL, data=json.dumps(body), content_type='application/json')
+    elif method == 'PUT':
+        body = {'value': i}
+        response = client.put('{}/{}'.format(BASE_URL, rnd.randrange(1, 1000)),
+                              data=json.dumps(body), content_type='application/json')
+    else:
+        response = client.delete('{}/{}'.format(BASE_URL, rnd.randrange(1, 1000)))
+
+    data = response.get_data()
+    return method, response.status_code, json.loads(data) if data else None
+
+
+def test_concurrent_mutations_keep_invariants(store):
+    """
+    GIVEN a flask application on an empty store
+    WHEN thousands of POST, PUT & DELETE requests run from a thread pool
+    THEN check that ids & names stay unique and the indexes match the items
+    """
+
+    with ThreadPoolExecutor(THREADS) as pool:
+        results = list(pool.map(request, range(REQUESTS)))
+
+    statuses = Counter((method, status) for method, status, body in results)
+    created = [body['item'] for method, status, body in results if status == 201]
+    items = list(store)
+
+    assert set(statuses) <= {('POST', 201), ('POST', 400), ('PUT', 200), ('PUT', 404),
+                             ('DELETE', 204), ('DELETE', 404)}
+    assert len(set(item['id'] for item in created)) == len(created)
+    assert len(items) == len(created) - statuses['DELETE', 204]
+    assert len(set(item['name'] for item in items)) == len(items)
+    assert store._names == Counter(item['name'] for item in items)
+    assert [item['id'] for item in items] == sorted(item['id'] for item in items)
+    assert store.version == len(created) + statuses['PUT', 200] + statuses['DELETE', 204]
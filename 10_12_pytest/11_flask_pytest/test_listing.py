@@ -0,0 +1,191 @@
+import app
+import pytest
+
+import json
+
+from store import ItemStore
+
+BASE_URL = 'http://127.0.0.1:5000/api/v1.0/items'
+
+
+@pytest.fixture(scope='function')
+def test_client(monkeypatch):
+    """
+    Create a flask test client over a fresh store of 25 items, item<n> having value n * 10
+    """
+    store = ItemStore()
+    for i in range(1, 26):
+        store.create('item{}'.format(i), i * 10)
+    monkeypatch.setattr(app, 'store', store)
+
+    testing_client = app.app.test_client()
+    testing_client.testing = True
+
+    yield testing_client
+
+
+def test_get_items_default_is_unpaginated(test_client):
+    """
+    GIVEN a flask application containing 25 items
+    WHEN a user requests all items without query parameters
+    THEN check that every item is returned without a cursor
+    """
+
+    data = json.loads(test_client.get(BASE_URL).get_data())
+
+    assert len(data['items']) == 25
+    assert 'next_cursor' not in data
+
+
+def test_get_items_paginated(test_client):
+    """
+    GIVEN a flask application containing 25 items
+    WHEN a user follows the cursor through pages of 10
+    THEN check that every item is returned once, in id order
+    """
+
+    ids = []
+    cursor = 0
+    pages = 0
+
+    while cursor is not None:
+        response = test_client.get('{}?limit=10&cursor={}'.format(BASE_URL, cursor))
+        data = json.loads(response.get_data())
+        assert response.status_code == 200
+        ids.extend(item['id'] for item in data['items'])
+        cursor = data['next_cursor']
+        pages += 1
+
+    assert pages == 3
+    assert ids == list(range(1, 26))
+
+
+def test_get_items_filtered_and_projected(test_client):
+    """
+    GIVEN a flask application containing 25 items
+    WHEN a user filters on value range & name prefix and asks for names only
+    THEN check that only the matching names are returned
+    """
+
+    response = test_client.get('{}?min_value=100&max_value=200&prefix=item1&fields=name'.format(BASE_URL))
+
+    data = json.loads(response.get_data())
+
+    assert response.status_code == 200
+    assert data['items'] == [{'name': 'item{}'.format(i)} for i in range(10, 20)]
+
+
+@pytest.mark.parametrize('query', ['limit=0', 'limit=x', 'cursor=x', 'max_value=x',
+                                   'fields=id,colour', 'stream=xml'])
+def test_get_items_bad_query(test_client, query):
+    """
+    GIVEN a flask application
+    WHEN a user lists items with an invalid query parameter
+    THEN check that a bad request response is provided
+    """
+
+    response = test_client.get('{}?{}'.format(BASE_URL, query))
+
+    data = json.loads(response.get_data())
+
+    assert response.status_code == 400
+    assert data['error'] == app.BAD_REQUEST
+
+
+def test_get_items_streamed_ndjson(test_client):
+    """
+    GIVEN a flask application containing 25 items
+    WHEN a user streams items as NDJSON
+    THEN check that each line holds one item
+    """
+
+    response = test_client.get('{}?stream=ndjson&min_value=200'.format(BASE_URL))
+
+    lines = response.get_data(as_text=True).splitlines()
+
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    assert [json.loads(line)['id'] for line in lines] == list(range(20, 26))
+
+
+def test_get_items_streamed_json(test_client):
+    """
+    GIVEN a flask application containing 25 items
+    WHEN a user streams items as chunked JSON
+    THEN check that the body matches the buffered response
+    """
+
+    streamed = json.loads(test_client.get('{}?stream=json'.format(BASE_URL)).get_data())
+    buffered = json.loads(test_client.get(BASE_URL).get_data())
+
+    assert streamed == buffered
+
+
+def test_get_items_sorted_by_value(test_client):
+    """
+    GIVEN a flask application containing 25 items
+    WHEN a user pages through a value range sorted by value
+    THEN check that the items come back in value order, one page at a time
+    """
+
+    app.store.update(3, value=500)
+    url = '{}?sort=value&min_value=100&max_value=500&limit=5&fields=id'.format(BASE_URL)
+
+    first = json.loads(test_client.get(url).get_data())
+    ids = [item['id'] for item in first['items']]
+    cursor = first['next_cursor']
+    while cursor is not None:
+        data = json.loads(test_client.get('{}&cursor={}'.format(url, cursor)).get_data())
+        ids.extend(item['id'] for item in data['items'])
+        cursor = data['next_cursor']
+
+    assert first['next_cursor'] == '140,14'
+    assert ids == list(range(10, 26)) + [3]
+
+
+def test_value_page_reads_only_what_it_needs(monkeypatch):
+    """
+    GIVEN a flask application containing 5000 items
+    WHEN a user asks for a page & streams the whole listing sorted by value
+    THEN check that the page reads a small part of the value index, and the
+         stream, read in chunks, still returns every item in order
+    """
+    store = ItemStore()
+    for i in range(5000):
+        store.create('item{}'.format(i), (i * 7919) % 1000)
+    monkeypatch.setattr(app, 'store', store)
+    client = app.app.test_client()
+
+    index = store._by_value
+    irange = index.irange
+    read = []
+
+    def counting_irange(*args):
+        for value in irange(*args):
+            read.append(value)
+            yield value
+
+    monkeypatch.setattr(index, 'irange', counting_irange)
+
+    data = json.loads(client.get('{}?sort=value&limit=10'.format(BASE_URL)).get_data())
+    assert len(data['items']) == 10
+    assert len(read) < 100
+
+    streamed = client.get('{}?sort=value&stream=ndjson&fields=id'.format(BASE_URL)).get_data().splitlines()
+    expected = sorted(store, key=lambda item: (item['value'], item['id']))
+    assert [json.loads(line)['id'] for line in streamed] == [item['id'] for item in expected]
+
+
+def test_get_top_items_and_stats(test_client):
+    """
+    GIVEN a flask application containing 25 items
+    WHEN a user asks for the top 3 items and the value aggregates
+    THEN check that they match the items
+    """
+
+    top = json.loads(test_client.get('{}/top?k=3'.format(BASE_URL)).get_data())
+    stats = json.loads(test_client.get('{}/stats'.format(BASE_URL)).get_data())
+
+    assert [item['value'] for item in top['items']] == [250, 240, 230]
+    assert stats['stats'] == {'count': 25, 'sum': 3250, 'min': 10, 'max': 250}
+    assert test_client.get('{}/top?k=0'.format(BASE_URL)).status_code == 400
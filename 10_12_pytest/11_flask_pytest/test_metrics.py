@@ -0,0 +1,99 @@
+import app
+import pytest
+
+import os
+import threading
+
+from metrics import Histogram, Registry, registry
+from profiler import SamplingProfiler
+
+BASE_URL = 'http://127.0.0.1:5000/api/v1.0/items'
+
+
+@pytest.fixture(scope='function')
+def test_client():
+    """
+    Create a flask test client with the metrics registry cleared
+    """
+    registry.clear()
+
+    testing_client = app.app.test_client()
+    testing_client.testing = True
+
+    yield testing_client
+
+
+def test_histogram_buckets():
+    """
+    GIVEN a histogram
+    WHEN latencies over several orders of magnitude are observed
+    THEN check that each quantile is within one sub-bucket of the true value
+    """
+
+    histogram = Histogram()
+    for us in range(1, 10001):
+        histogram.observe(us / 1e6)
+
+    assert histogram.count == 10000
+    assert 0.005 <= histogram.quantile(0.5) <= 0.005 * 1.25
+    assert 0.0099 <= histogram.quantile(0.99) <= 0.0099 * 1.25
+
+
+def test_disabled_registry_records_nothing():
+    metrics = Registry()
+    metrics.enabled = False
+    metrics.inc('hits')
+    metrics.observe('latency', 0.1)
+
+    assert metrics.render() == '\n'
+
+
+def test_metrics_endpoint(test_client):
+    """
+    GIVEN a flask application
+    WHEN a user makes good and bad requests and then scrapes /metrics
+    THEN check that route latencies, error counts & store timings are exported
+    """
+
+    test_client.get(BASE_URL + '/1')
+    test_client.get(BASE_URL + '/999')
+    test_client.post(BASE_URL, data='{}', content_type='application/json')
+
+    response = test_client.get('/metrics')
+    text = response.get_data(as_text=True)
+
+    assert response.status_code == 200
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/v1.0/items/<int:id>"} 2' in text
+    assert 'http_errors_total{error="not_found"} 1' in text
+    assert 'http_errors_total{error="bad_request"} 1' in text
+    assert 'store_operation_duration_seconds_count{operation="get"}' in text
+    assert '# TYPE http_request_duration_seconds histogram' in text
+
+
+def test_profile_header(test_client, monkeypatch, tmp_path):
+    """
+    GIVEN a flask application with profiling allowed
+    WHEN a user sends a request with the X-Profile header
+    THEN check that a collapsed stack file is written for that request only
+    """
+
+    monkeypatch.setitem(app.app.config, 'PROFILE_DIR', str(tmp_path))
+
+    plain = test_client.get(BASE_URL)
+    profiled = test_client.get(BASE_URL, headers={'X-Profile': '1'})
+
+    assert 'X-Profile-File' not in plain.headers
+    assert os.listdir(str(tmp_path)) == [profiled.headers['X-Profile-File']]
+
+
+def test_profiles_in_the_same_second(tmp_path):
+    """
+    GIVEN two profiles of the same route
+    WHEN they are dumped within the same second
+    THEN check that each gets its own file
+    """
+
+    paths = [SamplingProfiler(threading.get_ident()).dump(str(tmp_path), 'get_items') for _ in range(2)]
+
+    assert paths[0] != paths[1]
+    assert sorted(os.listdir(str(tmp_path))) == sorted(os.path.basename(path) for path in paths)
@@ -0,0 +1,144 @@
+import random
+
+import pytest
+from store import ItemStore, SortedList
+
+
+@pytest.fixture(scope='function')
+def store():
+    """
+    returns a store seeded with 3 items
+    """
+    return ItemStore([{'id': 1, 'name': 'laptop', 'value': 1000},
+                      {'id': 2, 'name': 'chair', 'value': 300},
+                      {'id': 3, 'name': 'book', 'value': 20}])
+
+
+def test_create_allocates_next_id(store):
+    """
+    GIVEN a store containing 3 items
+    WHEN an item is created
+    THEN check that it gets the next id and can be found by id and name
+    """
+
+    item = store.create('box', 340)
+
+    assert item == {'id': 4, 'name': 'box', 'value': 340}
+    assert store.get(4) is item
+    assert store.exists('box')
+    assert len(store) == 4
+
+
+def test_ids_are_not_reused(store):
+    """
+    GIVEN a store
+    WHEN the last item is deleted, or every item is deleted
+    THEN check that new items never reuse an old id
+    """
+
+    store.delete(3)
+    assert store.create('box', 340)['id'] == 4
+
+    for item in list(store):
+        store.delete(item['id'])
+
+    assert len(store) == 0
+    assert store.create('lamp', 15)['id'] == 5
+
+
+def test_update_and_delete_maintain_name_index(store):
+    """
+    GIVEN a store
+    WHEN items are renamed and deleted
+    THEN check that name lookups follow the changes
+    """
+
+    store.update(3, 'chair', 25)
+    store.delete(2)
+
+    assert store.exists('chair')
+    assert not store.exists('book')
+
+    store.delete(3)
+
+    assert not store.exists('chair')
+
+    with pytest.raises(KeyError):
+        store.delete(3)
+
+
+def test_scan_after_cursor_skips_deleted(store):
+    """
+    GIVEN a store with many deleted items
+    WHEN it is scanned from a cursor
+    THEN check that only live items after the cursor are yielded, in id order
+    """
+
+    for i in range(200):
+        store.create('item{}'.format(i), i)
+    for id in range(4, 200):
+        store.delete(id)
+
+    assert [item['id'] for item in store.scan()] == [1, 2, 3, 200, 201, 202, 203]
+    assert [item['id'] for item in store.scan(2)] == [3, 200, 201, 202, 203]
+
+
+def test_value_index_matches_items(store):
+    """
+    GIVEN a store
+    WHEN items are created, revalued & deleted, singly and in a batch
+    THEN check that range, top-k & aggregate queries match a scan of the items
+    """
+
+    for i in range(50):
+        store.create('item{}'.format(i), (i * 37) % 101)
+    for id in range(4, 54, 3):
+        store.update(id, value=(id * 11) % 101)
+    store.apply_batch([('delete', id, None, None) for id in range(5, 54, 4)])
+
+    items = sorted(store, key=lambda item: (item['value'], item['id']))
+    values = [item['value'] for item in items]
+
+    assert store.by_value() == items
+    assert store.by_value(20, 60) == [item for item in items if 20 <= item['value'] <= 60]
+    assert store.by_value(20, 60, after=(items[5]['value'], items[5]['id'])) == \
+        [item for item in items[6:] if 20 <= item['value'] <= 60]
+    assert store.top(5) == items[::-1][:5]
+    assert store.stats() == {'count': len(items), 'sum': sum(values), 'min': min(values), 'max': max(values)}
+
+
+def test_stats_empty():
+    assert ItemStore().stats() == {'count': 0, 'sum': 0, 'min': None, 'max': None}
+
+
+def test_sorted_list_matches_sorted():
+    """
+    GIVEN a SortedList with small chunks
+    WHEN values are added & removed so chunks split and empty
+    THEN check that it iterates, ranges & indexes like a sorted list
+    """
+
+    rng = random.Random(7)
+    values = SortedList(load=4)
+    expected = []
+
+    for _ in range(2000):
+        if expected and rng.random() < 0.45:
+            value = rng.choice(expected)
+            expected.remove(value)
+            values.remove(value)
+        else:
+            value = rng.randrange(100)
+            expected.append(value)
+            values.add(value)
+        expected.sort()
+
+        assert len(values) == len(expected)
+
+    assert list(values) == expected
+    assert list(reversed(values)) == expected[::-1]
+    assert list(values.irange(20, 60)) == [v for v in expected if 20 <= v <= 60]
+    assert list(values.irange(20, 60, inclusive=False)) == [v for v in expected if 20 < v <= 60]
+    assert values[0] == expected[0] and values[-1] == expected[-1]
+    with pytest.raises(ValueError):
+        values.remove(1000)
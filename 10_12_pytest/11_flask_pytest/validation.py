@@ -0,0 +1,47 @@
+from codec import CREATE_ITEM, UPDATE_ITEM
+
+
+def create_fields(data):
+    """
+    returns the (name, value) of a new item, or None if either is missing or invalid
+    """
+    return CREATE_ITEM(data)
+
+
+def update_fields(data):
+    """
+    returns the (name, value) to update an item with, None meaning keep the
+    current one, or None if the update is invalid
+    """
+    return UPDATE_ITEM(data)
+
+
+def batch_operation(operation):
+    """
+    turns one entry of a batch into an (op, id, name, value) tuple for the
+    store, or None if it is malformed
+    """
+    if not isinstance(operation, dict):
+        return None
+    op = operation.get('op')
+    id = operation.get('id')
+
+    if op == 'create':
+        fields = create_fields(operation)
+        if fields is None:
+            return None
+        return ('create', None) + fields
+
+    if type(id) is not int:
+        return None
+
+    if op == 'delete':
+        return 'delete', id, None, None
+
+    if op == 'update':
+        fields = update_fields(operation)
+        if fields is None:
+            return None
+        return ('update', id) + fields
+
+    return None
@@ -0,0 +1,58 @@
+"""
+Times applying a list of changes to a cart with add & delete calls
+against applying it as one batch
+
+usage: python bench_batch.py [changes per run]
+"""
+import sys
+import time
+
+from columnar import ItemColumns
+from groceries import Groceries, Item
+
+SIZES = [100, 1000, 10000, 100000]
+
+
+def changes(size):
+    """adds size items, then deletes every other one"""
+    operations = [('add', Item(f'product-{i}', i % 100, False)) for i in range(size)]
+    operations += [('delete', f'product-{i}') for i in range(0, size, 2)]
+    return operations
+
+
+def one_by_one(cart, operations):
+    for operation, value in operations:
+        getattr(cart, operation)(value)
+
+
+def batched(cart, operations):
+    with cart.batch() as batch:
+        for operation, value in operations:
+            getattr(batch, operation)(value)
+
+
+def timed(apply, storage, operations, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        cart = Groceries(storage=storage)
+        start = time.perf_counter()
+        apply(cart, operations)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    sizes = [int(sys.argv[1])] if len(sys.argv) > 1 else SIZES
+    for storage in (list, ItemColumns):
+        for size in sizes:
+            operations = changes(size)
+            repeat = max(3, 100000 // size)
+            single = timed(one_by_one, storage, operations, repeat)
+            batch = timed(batched, storage, operations, repeat)
+            print('{:<12} {:>7} changes  one by one {:6.2f}us  batch {:6.2f}us per change  {:4.1f}x'.format(
+                storage.__name__, len(operations), single / len(operations) * 1e6,
+                batch / len(operations) * 1e6, single / batch))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+Times a checkout job over every cart, recomputing each cart's total and
+checking it for duplicate products from scratch, in one process and
+sharded across CartManager workers
+
+usage: python bench_cart_manager.py [carts] [items per cart] [processes,...]
+"""
+import multiprocessing
+import sys
+import time
+
+from cart_manager import CartManager
+from groceries import Groceries, Item
+
+BATCH = 50000
+
+
+def checkout(cart_id, cart):
+    items = list(cart)
+    assert len({item.product for item in items}) == len(items)
+    return sum(item.price for item in items)
+
+
+def add(total, due):
+    return total + due
+
+
+def operations(carts, items):
+    for cart_id in range(carts):
+        for i in range(items):
+            yield 'add', cart_id, Item(f'product-{i}', (cart_id + i) % 100, False)
+
+
+def load(manager, carts, items):
+    batch = []
+    for operation in operations(carts, items):
+        batch.append(operation)
+        if len(batch) == BATCH:
+            manager.bulk(batch)
+            batch = []
+    manager.bulk(batch)
+
+
+def main():
+    carts = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    items = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    process_counts = [int(n) for n in sys.argv[3].split(',')] if len(sys.argv) > 3 else [1, 2, 4, 8]
+    print(f'{carts} carts of {items} items, {multiprocessing.cpu_count()} CPUs')
+
+    local = {}
+    for _, cart_id, item in operations(carts, items):
+        local.setdefault(cart_id, Groceries()).add(item)
+    start = time.perf_counter()
+    total = 0
+    for cart_id, cart in local.items():
+        total = add(total, checkout(cart_id, cart))
+    single = time.perf_counter() - start
+    print('{:<16} checkout {:7.3f}s'.format('in process', single))
+    del local
+
+    for processes in process_counts:
+        with CartManager(processes) as manager:
+            start = time.perf_counter()
+            load(manager, carts, items)
+            loaded = time.perf_counter() - start
+
+            start = time.perf_counter()
+            assert manager.map_reduce(checkout, add, 0) == total
+            elapsed = time.perf_counter() - start
+        print('{:<16} checkout {:7.3f}s  speedup {:4.1f}x  (bulk load {:.1f}s)'.format(
+            f'{processes} processes', elapsed, single / elapsed, loaded))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+"""
+Times building a cart with add() and emptying it again with delete(), the
+time per item should stay flat as the cart grows
+
+usage: python bench_groceries.py [largest size]
+"""
+import sys
+import time
+
+from groceries import Groceries, Item
+
+
+def build(size):
+    cart = Groceries()
+    for i in range(size):
+        cart.add(Item(f'product-{i}', i % 100, False))
+    return cart
+
+
+def empty(cart, size):
+    # delete from the front, the worst case for a list that pops
+    for i in range(size):
+        cart.delete(f'product-{i}')
+
+
+def main():
+    largest = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    size = 1000
+
+    while size <= largest:
+        start = time.perf_counter()
+        cart = build(size)
+        built = time.perf_counter() - start
+
+        start = time.perf_counter()
+        empty(cart, size)
+        emptied = time.perf_counter() - start
+
+        print('{:>9} items  add {:6.2f}us/item  delete {:6.2f}us/item'.format(
+            size, built / size * 1e6, emptied / size * 1e6))
+        size *= 10
+
+
+if __name__ == '__main__':
+    main()
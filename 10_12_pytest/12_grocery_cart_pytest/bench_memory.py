@@ -0,0 +1,49 @@
+"""
+Reports the memory taken per item by each cart storage, on its own and
+inside a cart, measured with tracemalloc
+
+usage: python bench_memory.py [items]
+"""
+import sys
+import tracemalloc
+
+from columnar import ItemColumns
+from groceries import Groceries, Item
+
+STORAGES = [list, ItemColumns]
+
+
+def items(count):
+    for i in range(count):
+        yield Item(f'product-{i}', i % 1000, i % 50 == 0)
+
+
+def measure(build):
+    """returns the bytes still allocated by build() once it returns, and its result"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return used, result
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+
+    for storage in STORAGES:
+        used, _ = measure(lambda: storage(items(count)))
+        print('{:<12} storage only       {:6.1f} bytes/item'.format(storage.__name__, used / count))
+
+        # the cart allows MAX_CRAVINGS cravings, so load it without any
+        used, cart = measure(lambda: Groceries((item._replace(craving=False) for item in items(count)),
+                                               storage=storage))
+        print('{:<12} cart               {:6.1f} bytes/item'.format(storage.__name__, used / count))
+
+        used, _ = measure(lambda: list(cart.search('product-1')))
+        print('{:<12} plus search index  {:6.1f} bytes/item'.format(storage.__name__, used / count))
+        del cart
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+Times search() and autocomplete() on a catalog sized cart, against
+scanning every product for each query
+
+usage: python bench_search.py [products] [queries]
+"""
+import random
+import sys
+import time
+
+from groceries import Groceries, Item
+
+WORDS = ('organic whole skim milk butter cheddar brie bread rye sourdough apple pear '
+         'banana orange lemon lime tomato potato onion garlic carrot celery coffee tea '
+         'juice water soda chicken beef pork salmon tuna rice pasta flour sugar salt').split()
+
+
+def products(count, rng):
+    for i in range(count):
+        yield '{} {} {}'.format(rng.choice(WORDS).title(), rng.choice(WORDS), i)
+
+
+def queries(count, rng):
+    for _ in range(count):
+        word = rng.choice(WORDS)
+        start = rng.randrange(len(word) - 2)
+        yield word[start:start + rng.randrange(3, 7)]
+
+
+def timed(label, count, call):
+    start = time.perf_counter()
+    call()
+    elapsed = time.perf_counter() - start
+    print('{:<28} {:9.1f}us each  ({:.2f}s total)'.format(label, elapsed / count * 1e6, elapsed))
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+    rng = random.Random(1)
+    items = [Item(product, 1, False) for product in products(size, rng)]
+    searches = list(queries(count, rng))
+    prefixes = [query[:rng.randrange(1, 4)] for query in searches]
+
+    cart = Groceries()
+    timed('add (building the index)', size, lambda: [cart.add(item) for item in items])
+
+    # full results are returned, so rare queries show the index best
+    rare = ['{} {}'.format(query, rng.randrange(size)) for query in searches]
+    timed('search, rare', count, lambda: [list(cart.search(query)) for query in rare])
+    # common queries are slow, only time a sample of them
+    sample = max(1, count // 100)
+    timed('search, common', sample, lambda: [list(cart.search(query)) for query in searches[:sample]])
+    timed('autocomplete', sample, lambda: [cart.autocomplete(prefix) for prefix in prefixes[:sample]])
+
+    def scan(query):
+        return [item for item in cart if query in item.product.lower()]
+
+    scans = min(10, count)
+    timed('scan, rare', scans, lambda: [scan(query) for query in rare[:scans]])
+    timed('scan, common', scans, lambda: [scan(query) for query in searches[:scans]])
+
+
+if __name__ == '__main__':
+    main()
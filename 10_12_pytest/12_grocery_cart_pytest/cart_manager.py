@@ -0,0 +1,229 @@
+"""
+Runs many Groceries carts, one per customer, sharded across processes
+
+    with CartManager(processes=8) as carts:
+        carts.add('alice', Item('apples', 4, False))
+        carts.total_due()
+
+Each cart lives in the worker process its id hashes to. Calls are sent
+to that worker over a pipe, bulk() sends every worker its share of a
+list of operations in one message so the workers run them in parallel,
+and map_reduce() runs a function over every cart inside the workers.
+"""
+import multiprocessing
+import operator
+import pickle
+import zlib
+from multiprocessing.reduction import ForkingPickler
+
+from groceries import Groceries
+
+OPERATIONS = ('add', 'delete', 'search', 'due', 'items', 'drop')
+
+
+def _run(carts, storage, operation, cart_id, args):
+    if operation == 'add':
+        cart = carts.get(cart_id)
+        if cart is None:
+            cart = carts[cart_id] = Groceries(storage=storage)
+        return cart.add(*args)
+
+    cart = carts.get(cart_id)
+    if cart is None:
+        raise KeyError(f'no cart {cart_id!r}')
+    if operation == 'delete':
+        return cart.delete(*args)
+    if operation == 'search':
+        return list(cart.search(*args))
+    if operation == 'due':
+        return cart.due
+    if operation == 'items':
+        return list(cart)
+    if operation == 'drop':
+        del carts[cart_id]
+        return None
+    raise ValueError(f'unknown operation {operation!r}')
+
+
+def _picklable(result):
+    """returns result, or a PicklingError in its place if it can't be sent back"""
+    try:
+        ForkingPickler.dumps(result)
+    except Exception as e:
+        return pickle.PicklingError(f'could not send back a {type(result).__name__}: {e}')
+    return result
+
+
+def _serve(connection, storage):
+    """The worker loop, holding the carts of one shard"""
+    carts = {}
+    while True:
+        message = connection.recv()
+        if message[0] == 'bulk':
+            results = []
+            for operation, cart_id, args in message[1]:
+                try:
+                    results.append(_run(carts, storage, operation, cart_id, args))
+                except Exception as e:
+                    results.append(e)
+            try:
+                connection.send(results)
+            except Exception:
+                # nothing was written, send what can be sent instead of dying
+                connection.send([_picklable(result) for result in results])
+        elif message[0] == 'reduce':
+            _, mapper, reducer, initial = message
+            try:
+                result = initial
+                for cart_id, cart in carts.items():
+                    result = reducer(result, mapper(cart_id, cart))
+            except Exception as e:
+                result = e
+            try:
+                connection.send(result)
+            except Exception:
+                connection.send(_picklable(result))
+        elif message[0] == 'len':
+            connection.send(len(carts))
+        else:
+            connection.close()
+            return
+
+
+def _due(cart_id, cart):
+    return cart.due
+
+
+class CartManager:
+    """
+    Shards carts by id across a pool of worker processes
+
+    processes: the number of workers, defaults to the number of CPUs
+    storage: the storage each cart is created with, see Groceries
+
+    Mappers & reducers passed to map_reduce must be picklable, so defined
+    at module level, as they are sent to the workers.
+    """
+
+    def __init__(self, processes=None, storage=list):
+        self._connections = []
+        self._workers = []
+        for _ in range(processes or multiprocessing.cpu_count()):
+            connection, worker_connection = multiprocessing.Pipe()
+            worker = multiprocessing.Process(target=_serve, args=(worker_connection, storage), daemon=True)
+            worker.start()
+            worker_connection.close()
+            self._connections.append(connection)
+            self._workers.append(worker)
+
+    def _shard(self, cart_id):
+        # crc32 rather than hash() so a cart id maps to the same
+        # shard whatever the hash seed
+        return zlib.crc32(str(cart_id).encode()) % len(self._connections)
+
+    def _call(self, operation, cart_id, *args):
+        connection = self._connections[self._shard(cart_id)]
+        connection.send(('bulk', [(operation, cart_id, args)]))
+        result = connection.recv()[0]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def add(self, cart_id, item):
+        """Adds item to the cart, creating the cart if needed, raises
+           the same exceptions as Groceries.add"""
+        self._call('add', cart_id, item)
+
+    def delete(self, cart_id, product):
+        """Deletes product from the cart, raises IndexError if it is
+           not in the cart, KeyError if there is no such cart"""
+        self._call('delete', cart_id, product)
+
+    def search(self, cart_id, search):
+        """Returns a list of the cart's items matching search"""
+        return self._call('search', cart_id, search)
+
+    def due(self, cart_id):
+        return self._call('due', cart_id)
+
+    def items(self, cart_id):
+        return self._call('items', cart_id)
+
+    def drop(self, cart_id):
+        """Removes a cart, at the end of a session"""
+        self._call('drop', cart_id)
+
+    def bulk(self, operations):
+        """
+        Runs a list of (operation, cart_id, *args) tuples, where operation
+        is the name of one of the methods above, every worker running its
+        share at the same time
+
+        Operations on the same cart run in the order given, there is no
+        ordering between carts.
+
+        :return: a list with the result of each operation, or the
+            exception it raised
+        """
+        shards = [[] for _ in self._connections]
+        positions = [[] for _ in self._connections]
+        for position, (operation, cart_id, *args) in enumerate(operations):
+            if operation not in OPERATIONS:
+                raise ValueError(f'unknown operation {operation!r}')
+            shard = self._shard(cart_id)
+            shards[shard].append((operation, cart_id, args))
+            positions[shard].append(position)
+
+        busy = [shard for shard, batch in enumerate(shards) if batch]
+        for shard in busy:
+            self._connections[shard].send(('bulk', shards[shard]))
+
+        results = [None] * sum(map(len, shards))
+        for shard in busy:
+            for position, result in zip(positions[shard], self._connections[shard].recv()):
+                results[position] = result
+        return results
+
+    def map_reduce(self, mapper, reducer, initial):
+        """
+        Folds reducer over mapper(cart_id, cart) for every cart, each worker
+        reducing its own carts, starting from initial, before the workers'
+        results are reduced, again from initial
+
+        An exception raised by mapper or reducer in a worker is raised here,
+        once every worker has answered, and leaves the carts as they were.
+        """
+        for connection in self._connections:
+            connection.send(('reduce', mapper, reducer, initial))
+        # read every answer before raising, so no pipe is left out of step
+        results = [connection.recv() for connection in self._connections]
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+        result = initial
+        for shard_result in results:
+            result = reducer(result, shard_result)
+        return result
+
+    def total_due(self):
+        """The total due across every cart"""
+        return self.map_reduce(_due, operator.add, 0)
+
+    def __len__(self):
+        """The number of carts"""
+        for connection in self._connections:
+            connection.send(('len',))
+        return sum(connection.recv() for connection in self._connections)
+
+    def close(self):
+        for connection in self._connections:
+            connection.send(('close',))
+            connection.close()
+        for worker in self._workers:
+            worker.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,126 @@
+"""
+Compact, column oriented storage for very large Groceries carts
+
+    cart = Groceries(items, storage=ItemColumns)
+
+An ItemColumns behaves like the list of items a cart normally keeps, but
+holds each field in its own column: prices in an array of 64 bit ints,
+cravings in a bitset, and products in one table of UTF-8 encoded names
+that each entry points into. Item namedtuples are only built when an
+entry is read.
+"""
+import operator
+from array import array
+
+from groceries import Item
+
+
+class ItemColumns:
+    """
+    A list-like sequence of items, or None for the holes a cart leaves
+    when it deletes, with a fixed cost of 20 bytes and 2 bits per entry
+    plus the encoded product name
+
+    Overwriting an entry appends its new name to the table, the old name
+    stays there until the cart compacts and builds a new ItemColumns.
+
+    Prices must be ints that fit in 64 bits, anything else raises before
+    any column is changed, so a failed append or overwrite leaves no trace.
+    """
+
+    def __init__(self, items=()):
+        self._names = bytearray()
+        self._starts = array('q')
+        self._lengths = array('I')
+        self._prices = array('q')
+        self._cravings = bytearray()
+        self._live = bytearray()
+        for item in items:
+            self.append(item)
+
+    @staticmethod
+    def _set_bit(bits, i, value):
+        if value:
+            bits[i >> 3] |= 1 << (i & 7)
+        else:
+            bits[i >> 3] &= ~(1 << (i & 7))
+
+    @staticmethod
+    def _check(item):
+        """Returns the encoded name & the price of item, raising if they don't fit the columns"""
+        if item is None:
+            return None, None
+        price = operator.index(item.price)
+        if not -2 ** 63 <= price < 2 ** 63:
+            raise OverflowError(f'price {price} does not fit in 64 bits')
+        return item.product.encode(), price
+
+    def _set(self, i, item, name, price):
+        if item is None:
+            self._set_bit(self._live, i, False)
+            return
+        self._starts[i] = len(self._names)
+        self._lengths[i] = len(name)
+        self._names += name
+        self._prices[i] = price
+        self._set_bit(self._cravings, i, item.craving)
+        self._set_bit(self._live, i, True)
+
+    def _get(self, i):
+        bit = 1 << (i & 7)
+        if not self._live[i >> 3] & bit:
+            return None
+        start = self._starts[i]
+        product = self._names[start:start + self._lengths[i]].decode()
+        return Item(product, self._prices[i], bool(self._cravings[i >> 3] & bit))
+
+    def append(self, item):
+        name, price = self._check(item)
+        i = len(self._prices)
+        if not i & 7:
+            self._cravings.append(0)
+            self._live.append(0)
+        self._starts.append(0)
+        self._lengths.append(0)
+        self._prices.append(0)
+        self._set(i, item, name, price)
+
+    def _position(self, index):
+        size = len(self._prices)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError('ItemColumns index out of range')
+        return index
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._get(i) for i in range(*index.indices(len(self._prices)))]
+        return self._get(self._position(index))
+
+    def __setitem__(self, index, item):
+        i = self._position(index)
+        self._set(i, item, *self._check(item))
+
+    def extend(self, items):
+        for item in items:
+            self.append(item)
+
+    def __delitem__(self, index):
+        """Only a trailing slice, cart[i:], can be deleted"""
+        size = len(self._prices)
+        if not isinstance(index, slice) or index.indices(size)[1:] != (size, 1):
+            raise TypeError('ItemColumns can only delete a trailing slice')
+        start = index.indices(size)[0]
+        del self._starts[start:]
+        del self._lengths[start:]
+        del self._prices[start:]
+        del self._cravings[(start + 7) >> 3:]
+        del self._live[(start + 7) >> 3:]
+
+    def __len__(self):
+        return len(self._prices)
+
+    def __iter__(self):
+        for i in range(len(self._prices)):
+            yield self._get(i)
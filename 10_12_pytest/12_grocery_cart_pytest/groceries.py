@@ -1,9 +1,33 @@
+import csv
+import heapq
+import io
+import json
+import struct
+import sys
+from bisect import bisect_left, insort
 from collections import namedtuple
 
 MAX_CRAVINGS = 2
 
+# rows written per file write by the streaming writers
+CHUNK_SIZE = 1000
+
+# a binary snapshot is SNAPSHOT_MAGIC followed by one record per item:
+# price, craving & the length of the UTF-8 product, then the product
+SNAPSHOT_MAGIC = b'GROCERIES\x01'
+RECORD = struct.Struct('<qBI')
+
+# batches kept in the undo log, older ones can no longer be rolled back
+MAX_UNDO = 16
+
+# marks the start of a product name, so prefixes can be looked up
+# in the same index as substrings
+ANCHOR = '\x02'
+
 Item = namedtuple('Item', 'product price craving')
 
+CSV_FIELDS = Item._fields
+
 
 class DuplicateProduct(Exception):
     pass
@@ -13,65 +37,475 @@ class MaxCravingsReached(Exception):
     pass
 
 
+def _grams(product):
+    """The trigrams of a lowercased product, plus its anchored first
+       one & two characters for prefix lookups"""
+    name = product.lower()
+    grams = {name[i:i + 3] for i in range(len(name) - 2)}
+    grams.add(ANCHOR + name[:1])
+    grams.add(ANCHOR + name[:2])
+    return grams
+
+
+def _parse_craving(value):
+    return value.strip().lower() in ('1', 'true', 'yes')
+
+
+def _csv_items(f):
+    """Reads items from CSV text with a product,price,craving header"""
+    for row in csv.DictReader(f):
+        yield Item(row['product'], int(row['price']), _parse_craving(row['craving']))
+
+
+def _ndjson_items(f):
+    """Reads items from lines of JSON objects with product, price
+       & craving keys, skipping blank lines"""
+    for line in f:
+        if line.strip():
+            row = json.loads(line)
+            yield Item(row['product'], row['price'], row['craving'])
+
+
+def _snapshot_items(f):
+    """Reads items from a binary snapshot file object"""
+    if f.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+        raise ValueError('not a groceries snapshot')
+    while True:
+        header = f.read(RECORD.size)
+        if not header:
+            return
+        if len(header) < RECORD.size:
+            raise ValueError('truncated groceries snapshot')
+        price, craving, length = RECORD.unpack(header)
+        product = f.read(length)
+        if len(product) < length:
+            raise ValueError('truncated groceries snapshot')
+        yield Item(product.decode(), price, bool(craving))
+
+
+def _snapshot_record(item):
+    product = item.product.encode()
+    return RECORD.pack(item.price, bool(item.craving), len(product)) + product
+
+
+def _write_chunks(f, rows, chunk_size=CHUNK_SIZE):
+    """Writes the str or bytes rows to f, chunk_size rows per write"""
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            f.write(chunk[0][:0].join(chunk))
+            chunk = []
+    if chunk:
+        f.write(chunk[0][:0].join(chunk))
+
+
+def _query_grams(query, prefix=False):
+    """The grams every product containing (or starting with) the
+       lowercased query must have, None if the query is too short"""
+    grams = {query[i:i + 3] for i in range(len(query) - 2)}
+    if prefix:
+        grams.add(ANCHOR + query[:2])
+    return grams or None
+
+
 class Groceries:
+    """A shopping cart, with items kept in slots indexed by product, so
+       lookups, adds & deletes are O(1) and deletes leave holes that are
+       compacted away later"""
 
-    def __init__(self, items=None):
+    def __init__(self, items=None, storage=list):
         """This cart can be instantiated with a list of namedtuple
-           items, if not provided use an empty list"""
-        self._items = items if items is not None else []
+           items, if not provided use an empty list, raising
+           DuplicateProduct if a product is in it twice. storage is the
+           sequence type holding the items, a list, or ItemColumns for
+           very large carts."""
+        self._storage = storage
+        self._items = storage()
+        self._index = {}
+        self._holes = 0
+        # running totals, and the items bucketed by price with the
+        # distinct prices kept sorted, for the price queries
+        self._cravings = 0
+        self._due = 0
+        self._craving_due = 0
+        self._by_price = {}
+        self._prices = []
+        # gram -> products, the trigrams & anchored first characters of
+        # every product, built on the first search
+        self._grams = None
+        # a (first added slot, [(deleted slot, item)]) record per batch
+        self._undo = []
+        # the live slots, for indexing while holes can't be compacted
+        self._live = None
+        for item in items if items is not None else []:
+            if item.product in self._index:
+                raise DuplicateProduct(f'{item.product} already in items')
+            self._insert(item)
+
+    def _insert(self, item):
+        """Append an item and update the index & counters"""
+        slot = len(self._items)
+        self._items.append(item)
+        self._track(item, slot)
+
+    def _insert_many(self, items):
+        """Append a list of items in one go"""
+        start = len(self._items)
+        self._items.extend(items)
+        for slot, item in enumerate(items, start):
+            self._track(item, slot)
+
+    def _track(self, item, slot):
+        """Update the index & counters for an item now in slot"""
+        self._live = None
+        self._index[item.product] = slot
+        if item.craving:
+            self._cravings += 1
+            self._craving_due += item.price
+        self._due += item.price
+        bucket = self._by_price.get(item.price)
+        if bucket is None:
+            bucket = self._by_price[item.price] = {}
+            insort(self._prices, item.price)
+        bucket[item.product] = None
+        if self._grams is not None:
+            self._add_grams(item.product)
+
+    def _discard(self, slot):
+        """Remove the item in slot, leaving a hole, and update the counters"""
+        item = self._items[slot]
+        self._items[slot] = None
+        self._holes += 1
+        self._untrack(item)
+        return item
+
+    def _untrack(self, item):
+        """Update the counters for an item leaving the cart"""
+        self._live = None
+        if item.craving:
+            self._cravings -= 1
+            self._craving_due -= item.price
+        self._due -= item.price
+        bucket = self._by_price[item.price]
+        bucket.pop(item.product, None)
+        if not bucket:
+            del self._by_price[item.price]
+            del self._prices[bisect_left(self._prices, item.price)]
+        if self._grams is not None:
+            for gram in _grams(item.product):
+                products = self._grams[gram]
+                products.discard(item.product)
+                if not products:
+                    del self._grams[gram]
+
+    def _maybe_compact(self):
+        # compacting renumbers the slots the undo log points at and so
+        # empties it, while batches can be rolled back wait for more holes
+        limit = 0.75 if self._undo else 0.5
+        if self._holes > len(self._items) * limit:
+            self._compact()
+
+    def _compact(self):
+        """Drop the holes left by deletes and rebuild the index"""
+        self._items = self._storage(item for item in self._items if item is not None)
+        self._index = {}
+        for slot, item in enumerate(self._items):
+            self._index[item.product] = slot
+        self._holes = 0
+        self._undo.clear()
+        self._live = None
+
+    def _apply_batch(self, operations):
+        """Validate a batch of ('add', item) & ('delete', product)
+           operations against the indexes, then apply them all, or
+           none if one raises"""
+        index = self._index
+        deleted = {}
+        added = {}
+        cravings = self._cravings
+        for operation, value in operations:
+            if operation == 'add':
+                product = value.product
+                if product in added or (product in index and product not in deleted):
+                    raise DuplicateProduct(f'{product} already in items')
+                if value.craving:
+                    if cravings >= MAX_CRAVINGS:
+                        raise MaxCravingsReached(f'{MAX_CRAVINGS} allowed')
+                    cravings += 1
+                added[product] = value
+            else:
+                try:
+                    item = added.pop(value, None)
+                    if item is None:
+                        if value in deleted:
+                            raise KeyError(value)
+                        item = self._items[index[value]]
+                        deleted[value] = None
+                except (KeyError, TypeError):
+                    raise IndexError(f'{value} not in cart')
+                if item.craving:
+                    cravings -= 1
+
+        # compact before applying, compacting afterwards would empty the
+        # undo log of the record this batch is about to leave
+        self._maybe_compact()
+        index = self._index
+        removed = [(slot, self._discard(slot)) for slot in map(index.pop, deleted)]
+        self._undo.append((len(self._items), removed))
+        if len(self._undo) > MAX_UNDO:
+            del self._undo[0]
+        self._insert_many(list(added.values()))
+
+    def batch(self):
+        """Returns a context manager collecting adds & deletes, which
+           are applied together when the block exits, or not at all if
+           one of them would raise, or the block raises
+
+               with cart.batch() as batch:
+                   batch.add(item)
+                   batch.delete('apples')"""
+        return Batch(self)
+
+    def rollback(self):
+        """Undo the latest batch, raises IndexError when there is none
+           to undo. Batches can be rolled back until the cart is changed
+           by add or delete, or compacted"""
+        if not self._undo:
+            raise IndexError('no batch to roll back')
+        start, removed = self._undo.pop()
+        for item in self._items[start:]:
+            del self._index[item.product]
+            self._untrack(item)
+        del self._items[start:]
+        for slot, item in reversed(removed):
+            self._items[slot] = item
+            self._holes -= 1
+            self._track(item, slot)
+
+    @classmethod
+    def from_items(cls, items, storage=list):
+        """Builds a cart from an iterable of items in one pass, raising
+           the same exceptions add would for the first bad item"""
+        cart = cls(storage=storage)
+        index = cart._index
+        for item in items:
+            if item.product in index:
+                raise DuplicateProduct(f'{item.product} already in items')
+            if item.craving and cart._cravings >= MAX_CRAVINGS:
+                raise MaxCravingsReached(f'{MAX_CRAVINGS} allowed')
+            cart._insert(item)
+        return cart
+
+    @classmethod
+    def from_csv(cls, f, storage=list):
+        """Loads a cart from a CSV text file object with a
+           product,price,craving header"""
+        return cls.from_items(_csv_items(f), storage)
+
+    @classmethod
+    def from_ndjson(cls, f, storage=list):
+        """Loads a cart from a text file object holding one JSON
+           object per line"""
+        return cls.from_items(_ndjson_items(f), storage)
+
+    @classmethod
+    def from_snapshot(cls, f, storage=list):
+        """Loads a cart from a binary file object written by
+           write_snapshot"""
+        return cls.from_items(_snapshot_items(f), storage)
+
+    def write_csv(self, f):
+        """Writes the cart to a text file object as CSV, open it with
+           newline='' as the csv module expects"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(CSV_FIELDS)
+        for count, item in enumerate(self, 1):
+            writer.writerow((item.product, item.price, int(bool(item.craving))))
+            if count % CHUNK_SIZE == 0:
+                f.write(buffer.getvalue())
+                buffer.seek(0)
+                buffer.truncate()
+        f.write(buffer.getvalue())
+
+    def write_ndjson(self, f):
+        """Writes the cart to a text file object, one JSON object
+           per line"""
+        _write_chunks(f, (json.dumps(item._asdict()) + '\n' for item in self))
+
+    def write_snapshot(self, f):
+        """Writes the cart to a binary file object in the snapshot
+           format from_snapshot reads"""
+        f.write(SNAPSHOT_MAGIC)
+        _write_chunks(f, (_snapshot_record(item) for item in self))
+
+    def write_table(self, f):
+        """Writes a simple table of cart items with total at the end
+           to a text file object"""
+        def rows():
+            for item in self:
+                product = f'{item.product}'
+                if item.craving:
+                    product += ' (craving)'
+                yield f'{product:<30} | {item.price:>3}\n'
+            yield '-' * 36 + '\n'
+            yield f'{"Total":<30} | {self.due:>3}\n'
+
+        _write_chunks(f, rows())
 
     def show(self):
         """Print a simple table of cart items with total at the end"""
-        for item in self._items:
-            product = f'{item.product}'
-            if item.craving:
-                product += ' (craving)'
-            print(f'{product:<30} | {item.price:>3}')
-        print('-' * 36)
-        print(f'{"Total":<30} | {self.due:>3}')
+        self.write_table(sys.stdout)
 
     def add(self, new_item):
         """Add a new item to cart, raise exceptions if item already in
            cart, or when we exceed MAX_CRAVINGS"""
-        if any(item for item in self if item.product == new_item.product):
+        if new_item.product in self._index:
             raise DuplicateProduct(f'{new_item.product} already in items')
         if new_item.craving and self.num_cravings_reached:
             raise MaxCravingsReached(f'{MAX_CRAVINGS} allowed')
-        self._items.append(new_item)
+        self._undo.clear()
+        self._insert(new_item)
 
     def delete(self, product):
         """Delete item matching 'product', raises IndexError
            if no item matches"""
-        for i, item in enumerate(self):
-            if item.product == product:
-                self._items.pop(i)
-                break
-        else:
+        try:
+            slot = self._index.pop(product)
+        except (KeyError, TypeError):
             raise IndexError(f'{product} not in cart')
+        self._undo.clear()
+        self._discard(slot)
+        self._maybe_compact()
+
+    def _add_grams(self, product):
+        for gram in _grams(product):
+            self._grams.setdefault(gram, set()).add(product)
+
+    def _candidates(self, grams):
+        """The products holding every one of grams"""
+        if self._grams is None:
+            self._grams = {}
+            for product in self._index:
+                self._add_grams(product)
+        postings = []
+        for gram in grams:
+            products = self._grams.get(gram)
+            if products is None:
+                return set()
+            postings.append(products)
+        postings.sort(key=len)
+        return postings[0].intersection(*postings[1:])
 
     def search(self, search):
         """Case insensitive 'contains' search, this is a
            generator returning matching Item namedtuples"""
-        for item in self:
-            if search.lower() in item.product:
-                yield item
+        search = search.lower()
+        grams = _query_grams(search)
+        if grams is None:
+            # too short for the trigram index, and likely to match
+            # a good part of the cart anyway
+            matches = [item for item in self if search in item.product.lower()]
+        else:
+            slots = sorted(self._index[product] for product in self._candidates(grams)
+                           if search in product.lower())
+            matches = [self._items[slot] for slot in slots]
+        yield from matches
+
+    def autocomplete(self, prefix, limit=10):
+        """Returns up to limit items whose product starts with prefix,
+           ignoring case, in alphabetical order"""
+        prefix = prefix.lower()
+        if not prefix:
+            products = self._index
+        else:
+            grams = _query_grams(prefix, prefix=True)
+            products = [product for product in self._candidates(grams)
+                        if product.lower().startswith(prefix)]
+        return [self._items[self._index[product]]
+                for product in heapq.nsmallest(limit, products, key=str.lower)]
 
     @property
     def due(self):
-        """Calculate total due value of cart"""
-        return sum(item.price for item in self)
+        """Total due value of cart, kept as items are added & deleted"""
+        return self._due
+
+    def subtotal(self, craving):
+        """Total due of the craving items if craving is True, or of
+           the other items if it is False"""
+        return self._craving_due if craving else self._due - self._craving_due
+
+    def most_expensive(self, k):
+        """Returns the k most expensive items, highest price first, items
+           with the same price are in cart order"""
+        items = []
+        slot = self._index.__getitem__
+        for price in reversed(self._prices):
+            wanted = k - len(items)
+            if wanted <= 0:
+                break
+            # a rolled back delete rejoins its bucket at the end, so
+            # don't rely on the bucket being in cart order
+            for product in heapq.nsmallest(wanted, self._by_price[price], key=slot):
+                items.append(self._items[slot(product)])
+        return items
+
+    def price_histogram(self):
+        """Returns a dict of price -> number of items at that price,
+           ordered by price"""
+        return {price: len(self._by_price[price]) for price in self._prices}
+
+    @property
+    def num_cravings(self):
+        """Number of craving items in my cart"""
+        return self._cravings
 
     @property
     def num_cravings_reached(self):
         """Checks if I have too many cravings in my cart """
-        return len([item for item in self if item.craving]) >= MAX_CRAVINGS
+        return self._cravings >= MAX_CRAVINGS
 
     def __len__(self):
         """The len of cart"""
-        return len(self._items)
+        return len(self._items) - self._holes
+
+    def __iter__(self):
+        """Iterate the items in the order they were added"""
+        return (item for item in self._items if item is not None)
 
     def __getitem__(self, index):
         """Making the class iterable (cart = Groceries() -> cart[1] etc)
            without this dunder I would get 'TypeError: 'Cart' object does
            not support indexing' when trying to index it"""
-        return self._items[index]
\ No newline at end of file
+        if self._holes:
+            if not self._undo:
+                self._compact()
+                return self._items[index]
+            if self._live is None:
+                self._live = [slot for slot, item in enumerate(self._items) if item is not None]
+            if isinstance(index, slice):
+                return [self._items[slot] for slot in self._live[index]]
+            return self._items[self._live[index]]
+        return self._items[index]
+
+
+class Batch:
+    """Collects the adds & deletes of a Groceries.batch block"""
+
+    def __init__(self, cart):
+        self._cart = cart
+        self._operations = []
+
+    def add(self, new_item):
+        self._operations.append(('add', new_item))
+
+    def delete(self, product):
+        self._operations.append(('delete', product))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self._cart._apply_batch(self._operations)
@@ -0,0 +1,96 @@
+import operator
+import pickle
+import threading
+import pytest
+from cart_manager import CartManager
+from groceries import Item, DuplicateProduct, MaxCravingsReached
+
+@pytest.fixture(scope='module')
+def carts():
+
+    manager = CartManager(processes=3)
+
+    yield manager
+
+    manager.close()
+
+def test_add_search_delete(carts):
+
+    carts.add('alice', Item('apples', 4, False))
+    carts.add('alice', Item('green apples', 3, False))
+    carts.add('bob', Item('apples', 5, False))
+
+    assert [item.product for item in carts.search('alice', 'apple')] == ['apples', 'green apples']
+    assert carts.due('alice') == 7
+    assert carts.due('bob') == 5
+
+    carts.delete('alice', 'apples')
+    assert carts.items('alice') == [Item('green apples', 3, False)]
+
+    with pytest.raises(DuplicateProduct):
+        carts.add('bob', Item('apples', 5, False))
+    with pytest.raises(IndexError):
+        carts.delete('bob', 'pears')
+    with pytest.raises(KeyError):
+        carts.due('carol')
+
+    carts.drop('alice')
+    carts.drop('bob')
+    assert len(carts) == 0
+
+def test_bulk(carts):
+
+    operations = [('add', i, Item(f'product-{j}', j, False)) for i in range(100) for j in range(3)]
+    operations += [('add', 0, Item('chips', 1, True)), ('add', 0, Item('pop', 1, True)),
+                   ('add', 0, Item('candy', 1, True)), ('due', 0), ('search', 99, 'product-2')]
+
+    results = carts.bulk(operations)
+
+    assert results[:300] == [None] * 300
+    assert isinstance(results[-3], MaxCravingsReached)
+    assert results[-2] == 5
+    assert results[-1] == [Item('product-2', 2, False)]
+    assert len(carts) == 100
+    assert carts.total_due() == 302
+
+    with pytest.raises(ValueError):
+        carts.bulk([('checkout', 0)])
+
+    carts.bulk([('drop', i) for i in range(100)])
+    assert carts.total_due() == 0
+
+def _missing(cart_id, cart):
+
+    return cart.missing
+
+def test_map_reduce_error_keeps_shards(carts):
+
+    carts.add('a', Item('apples', 4, False))
+
+    with pytest.raises(AttributeError):
+        carts.map_reduce(_missing, operator.add, 0)
+
+    assert carts.due('a') == 4
+    assert carts.total_due() == 4
+
+    carts.drop('a')
+
+def _lock(cart_id, cart):
+
+    return threading.Lock()
+
+def _keep_last(result, value):
+
+    return value
+
+def test_map_reduce_unpicklable_result(carts):
+
+    carts.add('a', Item('apples', 4, False))
+
+    with pytest.raises(pickle.PicklingError):
+        carts.map_reduce(_lock, _keep_last, None)
+
+    assert carts.due('a') == 4
+    assert carts.total_due() == 4
+
+    carts.drop('a')
@@ -1,17 +1,27 @@
+import io
+import random
+from collections import Counter
+
 import pytest
+from columnar import ItemColumns
 from groceries import Groceries, Item, DuplicateProduct, MaxCravingsReached
 
+@pytest.fixture(params=[list, ItemColumns])
+def storage(request):
+
+    return request.param
+
 @pytest.fixture()
-def empty_grocery_cart():
+def empty_grocery_cart(storage):
 
-    cart = Groceries()
+    cart = Groceries(storage=storage)
 
     yield cart
 
 @pytest.fixture()
-def stocked_grocery_cart(items_list):
+def stocked_grocery_cart(items_list, storage):
 
-    cart = Groceries(items_list)
+    cart = Groceries(items_list, storage=storage)
 
     yield cart
 
@@ -95,3 +105,349 @@ def test_delete_item(stocked_grocery_cart):
                          ('e', 5)])
 def test_search_item(test_input, expected, stocked_grocery_cart):
     assert len(list(stocked_grocery_cart.search(test_input))) == expected
+
+def test_delete_keeps_order(stocked_grocery_cart):
+
+    stocked_grocery_cart.delete('water')
+    stocked_grocery_cart.delete('celery')
+
+    assert [item.product for item in stocked_grocery_cart] == ['apples', 'coffee', 'chicken', 'pizza']
+    assert stocked_grocery_cart[0].product == 'apples'
+    assert stocked_grocery_cart[-1].product == 'pizza'
+    assert stocked_grocery_cart.due == 19
+
+def test_add_after_delete(stocked_grocery_cart):
+
+    stocked_grocery_cart.delete('pizza')
+    assert stocked_grocery_cart.num_cravings_reached == False
+
+    pizza = Item(product='pizza', price=5, craving=True)
+    stocked_grocery_cart.add(pizza)
+
+    assert stocked_grocery_cart[-1] == pizza
+    assert stocked_grocery_cart.due == 23
+
+    with pytest.raises(IndexError):
+        stocked_grocery_cart.delete('pizza ')
+
+def test_delete_every_item(stocked_grocery_cart, items_list):
+
+    for item in items_list:
+        stocked_grocery_cart.delete(item.product)
+
+    assert len(stocked_grocery_cart) == 0
+    assert list(stocked_grocery_cart) == []
+    assert stocked_grocery_cart.due == 0
+
+def test_aggregates(stocked_grocery_cart):
+
+    assert stocked_grocery_cart.subtotal(craving=True) == 4
+    assert stocked_grocery_cart.subtotal(craving=False) == 18
+    assert stocked_grocery_cart.num_cravings == 1
+    assert [item.product for item in stocked_grocery_cart.most_expensive(3)] == ['chicken', 'coffee', 'apples']
+    assert stocked_grocery_cart.price_histogram() == {1: 1, 2: 1, 4: 2, 5: 1, 6: 1}
+
+    stocked_grocery_cart.delete('celery')
+    assert stocked_grocery_cart.price_histogram() == {2: 1, 4: 2, 5: 1, 6: 1}
+    assert len(stocked_grocery_cart.most_expensive(10)) == 5
+
+@pytest.mark.parametrize('seed', range(20))
+def test_aggregates_match_recomputing(seed, storage):
+    # a random run of adds & deletes, checking the aggregates after each step
+    rng = random.Random(seed)
+    cart = Groceries(storage=storage)
+
+    for _ in range(300):
+        if len(cart) and rng.random() < 0.4:
+            cart.delete(rng.choice(list(cart)).product)
+        else:
+            item = Item(f'product-{rng.randrange(100)}', rng.randrange(10), rng.random() < 0.1)
+            try:
+                cart.add(item)
+            except (DuplicateProduct, MaxCravingsReached):
+                pass
+
+        items = list(cart)
+        assert cart.due == sum(item.price for item in items)
+        assert cart.subtotal(craving=True) == sum(item.price for item in items if item.craving)
+        assert cart.subtotal(craving=False) == sum(item.price for item in items if not item.craving)
+        assert cart.num_cravings == len([item for item in items if item.craving])
+        assert cart.price_histogram() == dict(sorted(Counter(item.price for item in items).items()))
+        k = rng.randrange(len(items) + 2)
+        assert cart.most_expensive(k) == sorted(items, key=lambda item: -item.price)[:k]
+
+def test_search_ignores_product_case(stocked_grocery_cart):
+
+    stocked_grocery_cart.add(Item(product='Green Apples', price=3, craving=False))
+
+    assert [item.product for item in stocked_grocery_cart.search('APPLES')] == ['apples', 'Green Apples']
+    assert [item.product for item in stocked_grocery_cart.search('n a')] == ['Green Apples']
+
+def test_search_after_delete(stocked_grocery_cart):
+
+    stocked_grocery_cart.delete('chicken')
+    assert len(list(stocked_grocery_cart.search('chi'))) == 0
+
+    stocked_grocery_cart.add(Item(product='chickpeas', price=2, craving=False))
+    assert [item.product for item in stocked_grocery_cart.search('chi')] == ['chickpeas']
+
+@pytest.mark.parametrize('test_input, expected',
+                         [('', ['apples', 'celery', 'chicken', 'coffee', 'pizza', 'water']),
+                          ('c', ['celery', 'chicken', 'coffee']),
+                          ('CH', ['chicken']),
+                          ('pizz', ['pizza']),
+                          ('izz', []),
+                          ('pizzas', [])])
+def test_autocomplete(test_input, expected, stocked_grocery_cart):
+    assert [item.product for item in stocked_grocery_cart.autocomplete(test_input)] == expected
+
+def test_autocomplete_limit(stocked_grocery_cart):
+    assert [item.product for item in stocked_grocery_cart.autocomplete('c', limit=2)] == ['celery', 'chicken']
+
+@pytest.mark.parametrize('seed', range(5))
+def test_search_matches_scanning(seed, storage):
+    rng = random.Random(seed)
+    words = 'red green Sweet sour apple Apricot pear peach plum'.split()
+    cart = Groceries(storage=storage)
+
+    for _ in range(300):
+        product = ' '.join(rng.sample(words, 2))
+        if product in [item.product for item in cart]:
+            cart.delete(product)
+        else:
+            cart.add(Item(product, 1, False))
+
+        query = rng.choice(words)[:rng.randrange(1, 6)].swapcase()
+        assert list(cart.search(query)) == [item for item in cart if query.lower() in item.product.lower()]
+        assert cart.autocomplete(query, limit=5) == sorted(
+            (item for item in cart if item.product.lower().startswith(query.lower())),
+            key=lambda item: item.product.lower())[:5]
+
+def test_item_columns(items_list):
+
+    columns = ItemColumns(items_list)
+    columns[1] = None
+    columns.append(Item(product='chocolate', price=2, craving=True))
+
+    assert len(columns) == 7
+    assert columns[0] == items_list[0]
+    assert columns[1] is None
+    assert columns[-1] == Item('chocolate', 2, True)
+    assert columns[4:] == [items_list[4], items_list[5], Item('chocolate', 2, True)]
+    assert list(columns) == [items_list[0], None] + items_list[2:] + [Item('chocolate', 2, True)]
+
+    with pytest.raises(IndexError):
+        columns[7]
+
+@pytest.mark.parametrize('price, error', [(2.5, TypeError), ('2', TypeError), (2 ** 63, OverflowError)])
+def test_item_columns_bad_price(price, error):
+
+    cart = Groceries([Item('a', 1, False)], storage=ItemColumns)
+
+    with pytest.raises(error):
+        cart.add(Item('b', price, False))
+    with pytest.raises(error):
+        cart._items[0] = Item('b', price, False)
+
+    assert len(cart) == 1
+    assert list(cart) == [Item('a', 1, False)]
+    assert len(cart._items) == 1
+
+    cart.add(Item('b', 2, False))
+    assert list(cart) == [Item('a', 1, False), Item('b', 2, False)]
+    assert cart[1] == Item('b', 2, False)
+
+def test_show(stocked_grocery_cart, capsys):
+
+    stocked_grocery_cart.show()
+
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0] == f'{"celery":<30} |   1'
+    assert lines[5] == f'{"pizza (craving)":<30} |   4'
+    assert lines[6] == '-' * 36
+    assert lines[7] == f'{"Total":<30} |  22'
+
+@pytest.mark.parametrize('write, load, stream', [
+    ('write_csv', Groceries.from_csv, io.StringIO),
+    ('write_ndjson', Groceries.from_ndjson, io.StringIO),
+    ('write_snapshot', Groceries.from_snapshot, io.BytesIO)])
+def test_export_and_load(write, load, stream, stocked_grocery_cart, storage):
+
+    stocked_grocery_cart.delete('water')
+    f = stream()
+    getattr(stocked_grocery_cart, write)(f)
+    f.seek(0)
+
+    cart = load(f, storage=storage)
+
+    assert list(cart) == list(stocked_grocery_cart)
+    assert cart.due == 20
+    assert cart.num_cravings == 1
+
+def test_load_csv():
+
+    cart = Groceries.from_csv(io.StringIO('product,price,craving\napples,4,0\n"chips, salted",3,True\n'))
+
+    assert list(cart) == [Item('apples', 4, False), Item('chips, salted', 3, True)]
+
+def test_load_duplicate():
+
+    rows = '{"product": "apples", "price": 4, "craving": false}\n' * 2
+
+    with pytest.raises(DuplicateProduct):
+        Groceries.from_ndjson(io.StringIO(rows))
+
+def test_create_with_duplicate(storage):
+
+    with pytest.raises(DuplicateProduct):
+        Groceries([Item('a', 1, False), Item('b', 2, False), Item('a', 1, False)], storage=storage)
+
+def test_load_max_cravings(items_list):
+
+    items = items_list + [Item('chocolate', 2, True), Item('butter tart', 1, True)]
+
+    with pytest.raises(MaxCravingsReached):
+        Groceries.from_items(items)
+
+def test_load_bad_snapshot(stocked_grocery_cart):
+
+    with pytest.raises(ValueError):
+        Groceries.from_snapshot(io.BytesIO(b'product,price,craving\n'))
+
+    f = io.BytesIO()
+    stocked_grocery_cart.write_snapshot(f)
+
+    with pytest.raises(ValueError):
+        Groceries.from_snapshot(io.BytesIO(f.getvalue()[:-3]))
+
+def test_batch(stocked_grocery_cart):
+
+    with stocked_grocery_cart.batch() as batch:
+        batch.add(Item('chocolate', 2, True))
+        batch.delete('pizza')
+        batch.add(Item('butter tart', 1, True))
+        batch.delete('celery')
+        batch.add(Item('celery', 2, False))
+
+    assert [item.product for item in stocked_grocery_cart] == [
+        'apples', 'water', 'coffee', 'chicken', 'chocolate', 'butter tart', 'celery']
+    assert stocked_grocery_cart.due == 22
+    assert stocked_grocery_cart.num_cravings_reached == True
+
+def test_batch_is_atomic(stocked_grocery_cart, items_list):
+
+    with pytest.raises(MaxCravingsReached):
+        with stocked_grocery_cart.batch() as batch:
+            batch.delete('apples')
+            batch.add(Item('chocolate', 2, True))
+            batch.add(Item('butter tart', 1, True))
+
+    with pytest.raises(DuplicateProduct):
+        with stocked_grocery_cart.batch() as batch:
+            batch.add(Item('oranges', 3, False))
+            batch.add(Item('oranges', 3, False))
+
+    with pytest.raises(IndexError):
+        with stocked_grocery_cart.batch() as batch:
+            batch.delete('apples')
+            batch.delete('apples')
+
+    with pytest.raises(ZeroDivisionError):
+        with stocked_grocery_cart.batch() as batch:
+            batch.delete('apples')
+            1 / 0
+
+    assert list(stocked_grocery_cart) == items_list
+    assert stocked_grocery_cart.due == 22
+
+def test_rollback(stocked_grocery_cart, items_list):
+
+    with stocked_grocery_cart.batch() as batch:
+        batch.delete('water')
+        batch.delete('celery')
+        batch.add(Item('oranges', 3, False))
+    with stocked_grocery_cart.batch() as batch:
+        batch.delete('oranges')
+        batch.delete('pizza')
+        batch.add(Item('chocolate', 2, True))
+
+    assert stocked_grocery_cart[0].product == 'apples'
+    assert stocked_grocery_cart.most_expensive(2) == [Item('chicken', 6, False), Item('coffee', 5, False)]
+
+    stocked_grocery_cart.rollback()
+    assert [item.product for item in stocked_grocery_cart] == ['apples', 'coffee', 'chicken', 'pizza', 'oranges']
+
+    stocked_grocery_cart.rollback()
+    assert list(stocked_grocery_cart) == items_list
+    assert stocked_grocery_cart.due == 22
+    assert stocked_grocery_cart.most_expensive(3)[-1].product == 'apples'
+    assert [item.product for item in stocked_grocery_cart.search('e')] == [
+        'celery', 'apples', 'water', 'coffee', 'chicken']
+
+    with pytest.raises(IndexError):
+        stocked_grocery_cart.rollback()
+
+def test_index_while_batches_can_roll_back(stocked_grocery_cart):
+
+    with stocked_grocery_cart.batch() as batch:
+        batch.delete('celery')
+        batch.delete('coffee')
+        batch.add(Item('oranges', 3, False))
+
+    items = list(stocked_grocery_cart)
+    assert [stocked_grocery_cart[i] for i in range(len(items))] == items
+    assert stocked_grocery_cart[-1] == items[-1]
+    assert stocked_grocery_cart[1:3] == items[1:3]
+
+    stocked_grocery_cart.rollback()
+    items = list(stocked_grocery_cart)
+    assert [stocked_grocery_cart[i] for i in range(len(items))] == items
+
+def test_rollback_batch_deleting_everything(storage, items_list):
+
+    cart = Groceries(items_list[:4], storage=storage)
+    with cart.batch() as batch:
+        for item in items_list[:4]:
+            batch.delete(item.product)
+
+    assert len(cart) == 0
+    cart.rollback()
+    assert list(cart) == items_list[:4]
+    assert cart.due == sum(item.price for item in items_list[:4])
+
+def test_add_forgets_batches(stocked_grocery_cart):
+
+    with stocked_grocery_cart.batch() as batch:
+        batch.delete('water')
+
+    stocked_grocery_cart.add(Item('oranges', 3, False))
+
+    with pytest.raises(IndexError):
+        stocked_grocery_cart.rollback()
+
+@pytest.mark.parametrize('seed', range(10))
+def test_random_batches_roll_back(seed, storage):
+    rng = random.Random(seed)
+    cart = Groceries(storage=storage)
+    states = []
+
+    for _ in range(12):
+        states.append(list(cart))
+        products = [item.product for item in cart]
+        with cart.batch() as batch:
+            for _ in range(rng.randrange(20)):
+                if products and rng.random() < 0.3:
+                    batch.delete(products.pop(rng.randrange(len(products))))
+                else:
+                    product = f'product-{rng.randrange(10000)}'
+                    if product not in products:
+                        batch.add(Item(product, rng.randrange(10), False))
+                        products.append(product)
+        cart.search('product')
+
+    while states:
+        cart.rollback()
+        state = states.pop()
+        assert list(cart) == state
+        assert cart.due == sum(item.price for item in state)
+        assert list(cart.search('product-1')) == [item for item in state if 'product-1' in item.product]
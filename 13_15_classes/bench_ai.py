@@ -0,0 +1,80 @@
+"""
+Plays each computer player against scripted players, reporting its win
+rate (of the rounds that weren't draws) and its cost per move, the time
+to pick a roll & learn from the player's
+
+usage: python bench_ai.py [rounds]
+"""
+import random
+import sys
+import time
+
+from rng import SeededRandom
+from rock_paper_scissors_and_more import WIN, LOSE
+from simulate import load_rules
+from strategies import PREDICTORS, Predictive, make_predictor
+
+
+def constant(rolls, rng, round, last):
+    return rolls[0]
+
+
+def cycle(rolls, rng, round, last):
+    return rolls[round % len(rolls)]
+
+
+def biased(rolls, rng, round, last):
+    return rolls[0] if rng.random() < 0.5 else rng.choice(rolls)
+
+
+def beat_last(rolls, rng, round, last):
+    # play something that beats the computer's last roll
+    return rng.choice(rolls.winners_against(last)) if last else rng.choice(rolls)
+
+
+def uniform(rolls, rng, round, last):
+    return rng.choice(rolls)
+
+
+PLAYERS = [constant, cycle, biased, beat_last, uniform]
+
+
+def play(rolls, computer, player, rounds, seed=2):
+    rng = random.Random(seed)
+    last = None
+    wins = losses = 0
+    elapsed = 0.0
+    for round in range(rounds):
+        move = player(rolls, rng, round, last)
+        start = time.perf_counter()
+        last = computer.choice(rolls)
+        computer.observe(move)
+        elapsed += time.perf_counter() - start
+        outcome = rolls.outcome(last, move)
+        wins += outcome == WIN
+        losses += outcome == LOSE
+    return wins / max(1, wins + losses), elapsed / rounds
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+    for rules in ('three', 'more'):
+        rolls = load_rules(rules)
+        print('{} rules, {} rounds, computer win rate / cost per move'.format(rules, rounds))
+        print('{:<10}'.format('') + ''.join('{:>20}'.format(player.__name__) for player in PLAYERS))
+        for name in ['random'] + list(PREDICTORS):
+            cells = []
+            for player in PLAYERS:
+                if name == 'random':
+                    computer = SeededRandom(1)
+                else:
+                    computer = Predictive(rolls, make_predictor(name), seed=1)
+                win_rate, cost = play(rolls, computer, player, rounds)
+                cells.append('{:>9.1%} {:>6.2f}us'.format(win_rate, cost * 1e6))
+            print('{:<10}'.format(name) + ''.join('{:>20}'.format(cell) for cell in cells))
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,36 @@
+"""
+Times the same league on a growing number of worker processes
+
+usage: python bench_league.py [games per pairing] [workers,...]
+"""
+import os
+import sys
+import time
+
+from league import League
+
+STRATEGIES = ['uniform', 'fixed:rock', 'fixed:paper', 'weighted:rock=3,paper=1', 'weighted:paper=3,scissors=1',
+              'weighted:scissors=3,rock=1', 'weighted:rock=1,paper=1,scissors=2', 'weighted:rock=5,scissors=1']
+
+
+def main():
+    games = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    worker_counts = [int(n) for n in sys.argv[2].split(',')] if len(sys.argv) > 2 else [1, 2, 4, 8]
+    print('{} strategies, {} games per pairing, {} CPUs'.format(len(STRATEGIES), games, os.cpu_count()))
+
+    baseline = None
+    standings = None
+    for workers in worker_counts:
+        league = League(STRATEGIES, rules='three', games=games, seed=1)
+        start = time.perf_counter()
+        league.run(workers)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        # per pairing seeds make the result independent of the worker count
+        assert standings is None or league.standings() == standings
+        standings = league.standings()
+        print('{:>3} workers  {:7.2f}s  speedup {:4.1f}x'.format(workers, elapsed, baseline / elapsed))
+
+
+if __name__ == '__main__':
+    main()
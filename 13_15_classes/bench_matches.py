@@ -0,0 +1,118 @@
+"""
+Compares the memory per match and rounds per second of many first to 3
+matches held three ways:
+
+objects, dict: a pair of Player objects per match, with the instance
+    dicts Player & Roll had before __slots__, rounds resolved by looking
+    names up in wins_against & lose_against
+objects, slots: the same with the slotted Player & Roll of the game,
+    rounds resolved with the rolls' bit masks
+arrays: a MatchStates, advancing every match with one NumPy step
+
+usage: python bench_matches.py [matches]
+"""
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from rock_paper_scissors_and_more import Player
+from simulate import MatchStates, WINS_NEEDED, load_rules, outcome_matrix
+
+
+class DictRoll:
+    # Roll before __slots__ & masks
+    def __init__(self, name, wins_against, lose_against):
+        self.name = name
+        self.wins_against = wins_against
+        self.lose_against = lose_against
+
+
+class DictPlayer:
+    # Player before __slots__
+    def __init__(self, name):
+        self.name = name
+        self.wins = 0
+
+    def add_win(self):
+        self.wins += 1
+
+
+def play_dict_round(matches, active, rolls, ids1, ids2):
+    still_active = []
+    for i, id1, id2 in zip(active, ids1, ids2):
+        player1, player2 = matches[i]
+        roll1, roll2 = rolls[id1], rolls[id2]
+        if roll2.name in roll1.wins_against:
+            player1.add_win()
+        elif roll2.name in roll1.lose_against:
+            player2.add_win()
+        if player1.wins < WINS_NEEDED and player2.wins < WINS_NEEDED:
+            still_active.append(i)
+    return still_active
+
+
+def play_slots_round(matches, active, rolls, ids1, ids2):
+    still_active = []
+    for i, id1, id2 in zip(active, ids1, ids2):
+        player1, player2 = matches[i]
+        roll1 = rolls[id1]
+        if roll1.wins_mask >> id2 & 1:
+            player1.add_win()
+        elif roll1.lose_mask >> id2 & 1:
+            player2.add_win()
+        if player1.wins < WINS_NEEDED and player2.wins < WINS_NEEDED:
+            still_active.append(i)
+    return still_active
+
+
+def run_objects(player_class, play_round, rolls, count, rng):
+    tracemalloc.start()
+    matches = [(player_class('one'), player_class('two')) for _ in range(count)]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    active = list(range(count))
+    rounds = 0
+    start = time.perf_counter()
+    while active:
+        ids1 = rng.integers(len(rolls), size=len(active)).tolist()
+        ids2 = rng.integers(len(rolls), size=len(active)).tolist()
+        rounds += len(active)
+        active = play_round(matches, active, rolls, ids1, ids2)
+    return size, rounds, time.perf_counter() - start
+
+
+def run_arrays(outcomes, count, rng):
+    tracemalloc.start()
+    states = MatchStates(count)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    while states.active.size:
+        active = states.active.size
+        states.step(outcomes, rng.integers(len(outcomes), size=active), rng.integers(len(outcomes), size=active))
+    return size, int(states.rounds.sum()), time.perf_counter() - start
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    rolls = load_rules('more')
+    dict_rolls = [DictRoll(roll.name, roll.wins_against, roll.lose_against) for roll in rolls]
+
+    runs = [
+        ('objects, dict', lambda rng: run_objects(DictPlayer, play_dict_round, dict_rolls, count, rng)),
+        ('objects, slots', lambda rng: run_objects(Player, play_slots_round, rolls.rolls, count, rng)),
+        ('arrays', lambda rng: run_arrays(outcome_matrix(rolls), count, rng)),
+    ]
+
+    print('{} matches, {} rolls'.format(count, len(rolls)))
+    for name, run in runs:
+        size, rounds, elapsed = run(np.random.default_rng(1))
+        print('{:<16} {:>8.1f} bytes/match  {:>12,.0f} rounds/s'.format(name, size / count, rounds / elapsed))
+
+
+if __name__ == '__main__':
+    main()
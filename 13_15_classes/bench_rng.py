@@ -0,0 +1,37 @@
+"""
+Compares computer roll draws per second across the random sources
+
+usage: python bench_rng.py [draws]
+"""
+import random
+import sys
+import time
+
+from rng import MODES, make_rng
+from rps import build_the_three_rolls
+
+
+class PerCallSystemRandom:
+    # how get_computer_roll drew before rng.py, a new SystemRandom per roll
+    def choice(self, rolls):
+        return random.SystemRandom().choice(rolls)
+
+
+def main():
+    draws = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    rolls = build_the_three_rolls()
+
+    sources = [('secure, per call', PerCallSystemRandom())]
+    sources += [(mode, make_rng(mode, seed=1)) for mode in MODES]
+
+    for name, source in sources:
+        choice = source.choice
+        start = time.perf_counter()
+        for _ in range(draws):
+            choice(rolls)
+        elapsed = time.perf_counter() - start
+        print('{:<18} {:>12,.0f} draws/s'.format(name, draws / elapsed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmarks resolving rounds & looking up rolls on a 101 move battle table,
+with the compiled Rolls table against scanning lists of names
+
+usage: python bench_rolls.py [rounds]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+from rock_paper_scissors_and_more import WIN, LOSE, build_rolls
+
+MOVES = 101
+
+
+def write_battle_table(path, size):
+    """writes a balanced table, each move beats the next size // 2 moves round the circle"""
+    names = ['Move{}'.format(i) for i in range(size)]
+    with open(path, 'w') as f:
+        f.write(','.join(['Attacker'] + names) + '\n')
+        for i, name in enumerate(names):
+            cells = []
+            for j in range(size):
+                distance = (j - i) % size
+                cells.append('draw' if distance == 0 else 'win' if distance <= size // 2 else 'lose')
+            f.write(','.join([name] + cells) + '\n')
+
+
+def resolve_by_scanning(roll1, roll2):
+    # how game rounds were resolved before the outcome table
+    if roll1 == roll2:
+        return 0
+    if roll2.name in roll1.wins_against:
+        return WIN
+    return LOSE
+
+
+def find_by_scanning(rolls, move):
+    # how get_player_roll found a roll before the name index
+    roll = [r for r in rolls if r.name.lower() == move]
+    return roll[0] if roll else None
+
+
+def timed(label, count, call):
+    start = time.perf_counter()
+    call()
+    elapsed = time.perf_counter() - start
+    print('{:<32} {:8.3f}us each'.format(label, elapsed / count * 1e6))
+    return elapsed
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'battle-table.csv')
+        write_battle_table(path, MOVES)
+        rolls = build_rolls(path)
+
+    rng = random.Random(1)
+    pairs = [(rng.choice(rolls.rolls), rng.choice(rolls.rolls)) for _ in range(rounds)]
+    moves = [rng.choice(rolls.rolls).name.lower() for _ in range(rounds // 10)]
+
+    for roll1, roll2 in pairs[:1000]:
+        assert rolls.outcome(roll1, roll2) == resolve_by_scanning(roll1, roll2)
+
+    print('{} moves'.format(len(rolls)))
+    before = timed('resolve round, scanning names', rounds,
+                   lambda: [resolve_by_scanning(roll1, roll2) for roll1, roll2 in pairs])
+    after = timed('resolve round, outcome table', rounds,
+                  lambda: [rolls.outcome(roll1, roll2) for roll1, roll2 in pairs])
+    print('{:<32} {:8.1f}x'.format('', before / after))
+
+    before = timed('find roll, scanning rolls', len(moves), lambda: [find_by_scanning(rolls, move) for move in moves])
+    after = timed('find roll, name index', len(moves), lambda: [rolls.find(move) for move in moves])
+    print('{:<32} {:8.1f}x'.format('', before / after))
+
+
+if __name__ == '__main__':
+    main()
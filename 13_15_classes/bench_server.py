@@ -0,0 +1,123 @@
+"""
+Load test for server.py: connects many bots that queue, play matches with
+random rolls and queue again until enough matches are over, and reports
+the round latency, the time from a bot sending its ROLL to it reading the
+RESULT, which includes waiting for its opponent's roll
+
+Start the server first, e.g. python server.py &
+
+usage: python bench_server.py [--host HOST] [--port PORT] [--bots N] [--matches N]
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from rock_paper_scissors_and_more import build_rolls
+from server import BATTLE_TABLE, WINS_NEEDED, raise_file_limit
+
+# connections opened at the same time, beyond the listen backlog they get refused
+CONNECTING = 500
+
+
+class Load:
+    """
+    The state shared by the bots
+
+    names: the roll names to pick from
+    latencies: every round latency so far, in seconds
+    matches: the matches still to finish, counting each match once per bot
+    done: set when matches reaches 0
+    """
+
+    def __init__(self, names, matches, seed):
+        self.names = names
+        self.latencies = []
+        self.matches = matches
+        self.done = asyncio.Event()
+        self.connecting = asyncio.Semaphore(CONNECTING)
+        self.rng = random.Random(seed)
+
+
+async def bot(number, host, port, load):
+    """plays matches on one connection until the load is done, appending its round latencies"""
+    async with load.connecting:
+        reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while not load.done.is_set():
+            writer.write('PLAY bot{}\n'.format(number).encode())
+            line = await reader.readline()
+            if line.startswith(b'WAITING'):
+                line = await reader.readline()
+            if not line.startswith(b'MATCH'):
+                raise RuntimeError('expected MATCH, got {!r}'.format(line))
+
+            while True:
+                writer.write('ROLL {}\n'.format(load.rng.choice(load.names)).encode())
+                sent = time.perf_counter()
+                line = await reader.readline()
+                if not line.startswith(b'RESULT'):
+                    raise RuntimeError('expected RESULT, got {!r}'.format(line))
+                load.latencies.append(time.perf_counter() - sent)
+                if WINS_NEEDED in map(int, line.split()[3:5]):
+                    break
+            line = await reader.readline()
+            if not line.startswith(b'OVER'):
+                raise RuntimeError('expected OVER, got {!r}'.format(line))
+            load.matches -= 1
+            if load.matches <= 0:
+                load.done.set()
+    finally:
+        writer.close()
+
+
+def percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def run(host, port, bots, matches, seed):
+    load = Load([roll.name for roll in build_rolls(BATTLE_TABLE)], bots * matches, seed)
+
+    start = time.perf_counter()
+    tasks = [asyncio.create_task(bot(i, host, port, load)) for i in range(bots)]
+    results = asyncio.gather(*tasks, return_exceptions=True)
+    finished = asyncio.create_task(load.done.wait())
+    await asyncio.wait([results, finished], return_when=asyncio.FIRST_COMPLETED)
+    elapsed = time.perf_counter() - start
+    # bots still queued once enough matches are over may never be paired
+    finished.cancel()
+    for task in tasks:
+        task.cancel()
+    results = await results
+
+    failures = [result for result in results
+                if isinstance(result, BaseException) and not isinstance(result, asyncio.CancelledError)]
+    latencies = load.latencies
+    print('{} bots, {} matches each, {:.2f}s'.format(bots, matches, elapsed))
+    if failures:
+        print('  {} bots failed, e.g. {!r}'.format(len(failures), failures[0]))
+    if latencies:
+        latencies.sort()
+        print('  {} rounds, {:.0f} rounds/s'.format(len(latencies), len(latencies) / elapsed))
+        print('  round latency: p50 {:.1f}ms  p90 {:.1f}ms  p99 {:.1f}ms  max {:.1f}ms'.format(
+            *(1000 * percentile(latencies, fraction) for fraction in (0.5, 0.9, 0.99, 1.0))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--bots', type=int, default=10000)
+    parser.add_argument('--matches', type=int, default=3, help='matches played by each bot, on average')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    # a socket per bot, and a few more for the interpreter itself
+    limit = raise_file_limit(args.bots + 64)
+    if limit < args.bots + 64:
+        print('open file limit is {}, some bots may fail to connect'.format(limit))
+    asyncio.run(run(args.host, args.port, args.bots, args.matches, args.seed))
+
+
+if __name__ == '__main__':
+    main()
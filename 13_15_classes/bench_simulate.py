@@ -0,0 +1,33 @@
+"""
+Measures simulate.py throughput in matches per second, for both rule sets
+
+usage: python bench_simulate.py [matches]
+"""
+import sys
+import time
+
+import numpy as np
+
+from simulate import Uniform, load_rules, outcome_matrix, simulate
+
+SIZES = [10000, 100000, 1000000]
+
+
+def main():
+    sizes = [int(sys.argv[1])] if len(sys.argv) > 1 else SIZES
+
+    for rules in ('three', 'more'):
+        rolls = load_rules(rules)
+        outcomes = outcome_matrix(rolls)
+        strategy = Uniform(len(rolls))
+        for matches in sizes:
+            rng = np.random.default_rng(1)
+            start = time.perf_counter()
+            results = simulate(outcomes, strategy, strategy, matches, rng)
+            elapsed = time.perf_counter() - start
+            print('{:<6} {:>8} matches  {:>12,.0f} matches/s  {:>12,.0f} rounds/s'.format(
+                rules, matches, matches / elapsed, results.rounds.sum() / elapsed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+"""
+Measures the time to start python and load the battle table, with pandas,
+with the csv module, and from the on disk cache
+
+usage: python bench_startup.py [runs]
+"""
+import os
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+SCENARIOS = [
+    ('python only', 'pass'),
+    ('pandas, iterrows', 'import pandas as pd\n'
+                         'for _, row in pd.read_csv("battle-table.csv").iterrows():\n'
+                         '    list(row[row == "win"].index), list(row[row == "lose"].index)'),
+    ('pandas loader', 'import rock_paper_scissors_and_more as game\n'
+                      'game.build_rolls(engine="pandas", cache=False)'),
+    ('csv loader', 'import rock_paper_scissors_and_more as game\n'
+                   'game.build_rolls(cache=False)'),
+    ('csv loader, cached', 'import rock_paper_scissors_and_more as game\n'
+                           'game.build_rolls()'),
+]
+
+
+def run(code):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', code], cwd=HERE, check=True)
+    return time.perf_counter() - start
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    # fill the cache, and warm the OS file cache for every scenario
+    for _, code in SCENARIOS:
+        run(code)
+
+    for name, code in SCENARIOS:
+        best = min(run(code) for _ in range(runs))
+        print('{:<20} {:7.1f}ms'.format(name, best * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,194 @@
+"""
+Round-robin league between rock, paper, scissors strategies
+
+Every pair of strategies plays a series of matches with simulate.py, the
+pairings are spread across a process pool, and the standings are rated
+with Elo. Each pairing gets its own seed derived from the league seed and
+the pairing, so a league gives the same result however many workers run
+it. Finished pairings are saved to a checkpoint file as they complete, so
+rerunning an interrupted league only plays the pairings it is missing.
+
+usage: python league.py [--rules three|more] [--games N] [--workers N]
+                        [--seed N] [--checkpoint PATH] STRATEGY STRATEGY...
+"""
+import argparse
+import itertools
+import json
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from simulate import load_rules, make_strategy, outcome_matrix, simulate
+
+ELO_START = 1500
+ELO_SCALE = 400
+
+# the rules of the game, loaded once per worker process
+_rolls = None
+_outcomes = None
+
+
+def _init_worker(rolls):
+    global _rolls, _outcomes
+    _rolls = rolls
+    _outcomes = outcome_matrix(rolls)
+
+
+def play_pairing(spec1, spec2, games, seed):
+    """
+    plays one pairing in a worker
+
+    :param seed: the pairing's seed, a list of ints for numpy's SeedSequence
+    :return: the matches won by each strategy and the unfinished matches
+    """
+    rng = np.random.default_rng(np.random.SeedSequence(seed))
+    results = simulate(_outcomes, make_strategy(spec1, _rolls), make_strategy(spec2, _rolls), games, rng)
+    return results.wins[0], results.wins[1], results.unfinished
+
+
+def _pairing_key(spec1, spec2):
+    return '{} vs {}'.format(spec1, spec2)
+
+
+class League:
+    """
+    A round-robin league
+
+    strategies: the strategy specs, as make_strategy takes them
+    games: the matches played by each pair
+    seed: the league seed
+    checkpoint: a JSON file to save finished pairings to, or None
+    results: pairing key -> [wins of the first, wins of the second, unfinished]
+    """
+
+    def __init__(self, strategies, rules='more', games=10000, seed=0, checkpoint=None):
+        if len(set(strategies)) != len(strategies):
+            raise ValueError('strategies must be unique')
+        self.strategies = list(strategies)
+        self.rules = rules
+        self.games = games
+        self.seed = seed
+        self.checkpoint = checkpoint
+        self.results = {}
+        if checkpoint is not None and os.path.exists(checkpoint):
+            self._load_checkpoint()
+
+    def _settings(self):
+        return {'strategies': self.strategies, 'rules': self.rules, 'games': self.games, 'seed': self.seed}
+
+    def _load_checkpoint(self):
+        with open(self.checkpoint) as f:
+            saved = json.load(f)
+        if saved['settings'] != self._settings():
+            raise ValueError('{} was written by a different league'.format(self.checkpoint))
+        self.results = saved['results']
+
+    def _save_checkpoint(self):
+        # write a new file and swap it in, an interrupted write leaves the old one
+        temporary = self.checkpoint + '.tmp'
+        with open(temporary, 'w') as f:
+            json.dump({'settings': self._settings(), 'results': self.results}, f)
+        os.replace(temporary, self.checkpoint)
+
+    def pairings(self):
+        """yields (index of first, index of second) for every pairing"""
+        return itertools.combinations(range(len(self.strategies)), 2)
+
+    def run(self, workers=None):
+        """plays every pairing missing from the results"""
+        rolls = load_rules(self.rules)
+        pending = [(i, j) for i, j in self.pairings()
+                   if _pairing_key(self.strategies[i], self.strategies[j]) not in self.results]
+        if not pending:
+            return
+
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(rolls,)) as pool:
+            futures = {pool.submit(play_pairing, self.strategies[i], self.strategies[j], self.games,
+                                   [self.seed, i, j]): (i, j)
+                       for i, j in pending}
+            for future in as_completed(futures):
+                i, j = futures[future]
+                self.results[_pairing_key(self.strategies[i], self.strategies[j])] = list(future.result())
+                if self.checkpoint is not None:
+                    self._save_checkpoint()
+
+    def elo(self, iterations=200):
+        """
+        fits an Elo rating to every strategy from all the pairings at once,
+        rather than match by match, so the ratings don't depend on the
+        order the pairings were played in
+
+        :return: a list of ratings, in the order of strategies
+        """
+        ratings = [0.0] * len(self.strategies)
+        pairs = []
+        for i, j in self.pairings():
+            wins = self.results.get(_pairing_key(self.strategies[i], self.strategies[j]))
+            if wins and wins[0] + wins[1]:
+                pairs.append((i, j, wins[0], wins[1]))
+
+        for _ in range(iterations):
+            gradient = [0.0] * len(ratings)
+            counts = [0] * len(ratings)
+            for i, j, wins1, wins2 in pairs:
+                games = wins1 + wins2
+                expected = 1 / (1 + 10 ** ((ratings[j] - ratings[i]) / ELO_SCALE))
+                step = wins1 - games * expected
+                gradient[i] += step
+                gradient[j] -= step
+                counts[i] += games
+                counts[j] += games
+            for player, count in enumerate(counts):
+                if count:
+                    # a Newton step sized for the logistic curve at its steepest
+                    ratings[player] += gradient[player] / count * 4 * ELO_SCALE / math.log(10)
+
+        mean = sum(ratings) / len(ratings)
+        return [ELO_START + rating - mean for rating in ratings]
+
+    def standings(self):
+        """
+        :return: a list of (strategy, wins, losses, unfinished, elo), best first
+        """
+        totals = {spec: [0, 0, 0] for spec in self.strategies}
+        for i, j in self.pairings():
+            spec1, spec2 = self.strategies[i], self.strategies[j]
+            wins1, wins2, unfinished = self.results.get(_pairing_key(spec1, spec2), (0, 0, 0))
+            totals[spec1][0] += wins1
+            totals[spec1][1] += wins2
+            totals[spec2][0] += wins2
+            totals[spec2][1] += wins1
+            totals[spec1][2] += unfinished
+            totals[spec2][2] += unfinished
+
+        rows = [(spec, *totals[spec], rating) for spec, rating in zip(self.strategies, self.elo())]
+        return sorted(rows, key=lambda row: row[4], reverse=True)
+
+
+def print_standings(standings):
+    print('{:<30} {:>10} {:>10} {:>8} {:>7}'.format('strategy', 'won', 'lost', 'win %', 'elo'))
+    for spec, wins, losses, unfinished, rating in standings:
+        played = wins + losses + unfinished
+        print('{:<30} {:>10} {:>10} {:>8.2%} {:>7.0f}'.format(
+            spec, wins, losses, wins / played if played else 0, rating))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rules', choices=('three', 'more'), default='more')
+    parser.add_argument('--games', type=int, default=10000, help='matches played by each pair')
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--checkpoint')
+    parser.add_argument('strategies', nargs='+', metavar='STRATEGY')
+    args = parser.parse_args()
+
+    league = League(args.strategies, args.rules, args.games, args.seed, args.checkpoint)
+    league.run(args.workers)
+    print_standings(league.standings())
+
+
+if __name__ == '__main__':
+    main()
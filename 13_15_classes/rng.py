@@ -0,0 +1,86 @@
+"""
+Random sources for the computer's rolls
+
+secure: the operating system's random source, a syscall per roll
+seeded: a Mersenne Twister, reproducible from its seed
+batched: a seedable generator that draws rolls in blocks ahead of time
+
+A seed reproduces the rolls of its own mode, seeded & batched use
+different generators so they roll differently for the same seed.
+
+Every source has the same choice & observe methods, so the predictive
+players in strategies.py can be used in their place.
+"""
+import random
+
+BLOCK_SIZE = 4096
+
+
+class SecureRandom:
+    """Rolls from the operating system's random source, not reproducible"""
+
+    def __init__(self, seed=None):
+        self._random = random.SystemRandom()
+
+    def choice(self, rolls):
+        return self._random.choice(rolls)
+
+    def observe(self, roll):
+        """random rolls take no notice of the player's"""
+
+
+class SeededRandom:
+    """
+    Rolls from a Mersenne Twister
+
+    seed: the same seed gives the same rolls, None seeds from the OS
+    """
+
+    def __init__(self, seed=None):
+        self._random = random.Random(seed)
+
+    def choice(self, rolls):
+        return self._random.choice(rolls)
+
+    def observe(self, roll):
+        """random rolls take no notice of the player's"""
+
+
+class BatchedRandom:
+    """
+    Rolls from a NumPy generator, drawing block_size roll indices at a time
+    into a buffer that later calls pop from
+
+    seed: the same seed gives the same rolls, None seeds from the OS
+
+    A block is drawn for a given number of rolls, so switching to a game
+    with a different number of rolls discards the rest of the buffer.
+    """
+
+    def __init__(self, seed=None, block_size=BLOCK_SIZE):
+        import numpy as np
+        self._generator = np.random.default_rng(seed)
+        self.block_size = block_size
+        self._size = None
+        self._buffer = []
+
+    def choice(self, rolls):
+        if not self._buffer or len(rolls) != self._size:
+            self._size = len(rolls)
+            self._buffer = self._generator.integers(self._size, size=self.block_size).tolist()
+        return rolls[self._buffer.pop()]
+
+    def observe(self, roll):
+        """random rolls take no notice of the player's"""
+
+
+MODES = {'secure': SecureRandom, 'seeded': SeededRandom, 'batched': BatchedRandom}
+
+
+def make_rng(mode='secure', seed=None):
+    """
+    :param mode: secure, seeded or batched
+    :param seed: the seed of the seeded & batched modes
+    :raises KeyError: for an unknown mode
+    """
+    return MODES[mode](seed)
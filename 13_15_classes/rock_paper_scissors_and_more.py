@@ -1,5 +1,29 @@
-import random
-import pandas as pd
+import argparse
+import csv
+import hashlib
+import io
+import marshal
+import os
+
+from rng import MODES, SecureRandom, make_rng
+from strategies import PREDICTORS, Predictive, make_predictor
+
+# the outcome of one roll played against another
+DRAW = 0
+WIN = 1
+LOSE = 2
+
+OUTCOMES = {'draw': DRAW, 'win': WIN, 'lose': LOSE}
+MIRROR = {DRAW: DRAW, WIN: LOSE, LOSE: WIN}
+
+# bump when the layout of cached battle tables changes
+CACHE_VERSION = 1
+
+
+class BattleTableError(ValueError):
+    """
+    Raised for a battle table that is malformed or contradicts itself
+    """
 
 
 class Roll:
@@ -9,12 +33,101 @@ class Roll:
     name: the name of the roll
     wins_against: a list of roll names that this roll wins against
     lose_against: a list of roll names that this roll looses against
+    id: the position of the roll in its Rolls table
+    wins_mask: bit i is set if this roll wins against roll id i
+    lose_mask: bit i is set if this roll looses against roll id i
+
+    The masks are filled in by the Rolls table the roll is added to.
     """
 
-    def __init__(self, name, wins_against, lose_against):
+    __slots__ = ('name', 'wins_against', 'lose_against', 'id', 'wins_mask', 'lose_mask')
+
+    def __init__(self, name, wins_against, lose_against, id=None):
         self.name = name
         self.wins_against = wins_against
         self.lose_against = lose_against
+        self.id = id
+        self.wins_mask = 0
+        self.lose_mask = 0
+
+
+def _names(names):
+    # the three roll game lists a single name as a plain string
+    return {names} if isinstance(names, str) else set(names)
+
+
+class Rolls:
+    """
+    The valid rolls in a game, compiled for constant time lookups
+
+    rolls: the Roll objects in table order, each roll's id is its position
+    index: lower case roll name -> roll id
+    outcomes: a flat N x N table, outcomes[a * N + b] is the WIN, LOSE or
+        DRAW of roll id a played against roll id b
+
+    It can be used as the list of rolls it was built from.
+    """
+
+    def __init__(self, rolls, outcomes=None):
+        self.rolls = list(rolls)
+        self.index = {}
+
+        for id, roll in enumerate(self.rolls):
+            roll.id = id
+            self.index[roll.name.lower()] = id
+
+        if outcomes is None:
+            outcomes = self._compile()
+        self.outcomes = outcomes
+        self._set_masks()
+
+    def _compile(self):
+        size = len(self.rolls)
+        outcomes = bytearray(size * size)
+
+        for roll in self.rolls:
+            row = roll.id * size
+            for name in _names(roll.wins_against):
+                outcomes[row + self.index[name.lower()]] = WIN
+            for name in _names(roll.lose_against):
+                outcomes[row + self.index[name.lower()]] = LOSE
+
+        return bytes(outcomes)
+
+    def _set_masks(self):
+        size = len(self.rolls)
+        for roll in self.rolls:
+            row = self.outcomes[roll.id * size:(roll.id + 1) * size]
+            roll.wins_mask = sum(1 << id for id, outcome in enumerate(row) if outcome == WIN)
+            roll.lose_mask = sum(1 << id for id, outcome in enumerate(row) if outcome == LOSE)
+
+    def find(self, name):
+        """
+        :return: the roll with the given name, in any case, or None
+        """
+        id = self.index.get(name.lower())
+        return None if id is None else self.rolls[id]
+
+    def outcome(self, roll1, roll2):
+        """
+        :return: the WIN, LOSE or DRAW of roll1 played against roll2
+        """
+        return self.outcomes[roll1.id * len(self.rolls) + roll2.id]
+
+    def winners_against(self, roll):
+        """
+        :return: a list of the rolls that win against roll
+        """
+        return [other for other in self.rolls if self.outcome(other, roll) == WIN]
+
+    def __len__(self):
+        return len(self.rolls)
+
+    def __iter__(self):
+        return iter(self.rolls)
+
+    def __getitem__(self, index):
+        return self.rolls[index]
 
 
 class Player:
@@ -25,6 +138,8 @@ class Player:
     wins: the total number of wins this player has achieved.
     """
 
+    __slots__ = ('name', 'wins')
+
     def __init__(self, name):
         self.name = name
         self.wins = 0
@@ -33,30 +148,152 @@ class Player:
         self.wins += 1
 
 
-def build_rolls():
+def read_table(data):
     """
-    reads in roll rules from input file
+    parses a battle table with the csv module
 
-    :return: a list of valid rolls in the game
+    :param data: the bytes of the battle table
+    :return: the column names and the rows, each a list of cells
     """
 
-    rolls = []
+    lines = csv.reader(io.StringIO(data.decode('utf-8-sig'), newline=''))
+    rows = [row for row in lines if row]
 
-    rules = pd.read_csv('battle-table.csv')
+    if not rows:
+        raise BattleTableError('the battle table is empty')
 
+    return rows[0], rows[1:]
 
-    for idx, row in rules.iterrows():
 
-        attacker = row.Attacker
+def read_table_with_pandas(data):
+    """
+    parses a battle table with pandas, which is only imported when used
 
-        wins_against = list(row[row == 'win'].index)
-        lose_against = list(row[row == 'lose'].index)
+    :param data: the bytes of the battle table
+    :return: the column names and the rows, each a list of cells
+    """
 
-        roll = Roll(attacker, wins_against, lose_against)
+    import pandas as pd
 
-        rolls.append(roll)
+    if not data.strip():
+        raise BattleTableError('the battle table is empty')
 
-    return rolls
+    rules = pd.read_csv(io.BytesIO(data), dtype=str, keep_default_na=False)
+
+    return list(rules.columns), rules.values.tolist()
+
+
+def compile_table(columns, rows):
+    """
+    validates a parsed battle table and compiles its outcomes
+
+    Every roll needs a row, in the same order as the columns, with a win,
+    lose or draw cell for every roll. A roll must draw against itself, and
+    when one roll wins against another, the other must lose against it.
+
+    :param columns: the header, 'Attacker' followed by the roll names
+    :param rows: the roll name followed by its cells, for each roll
+    :return: a list of the roll names and the flat N x N outcomes bytes
+    :raises BattleTableError: if the table is malformed
+    """
+
+    names = [name.strip() for name in columns[1:]]
+    size = len(names)
+
+    if not size:
+        raise BattleTableError('the battle table has no rolls')
+    if len(set(name.lower() for name in names)) != size:
+        raise BattleTableError('roll names must be unique')
+    if [row[0].strip() for row in rows if row] != names:
+        raise BattleTableError('the rows must list the same rolls, in the same order, as the columns')
+
+    outcomes = bytearray(size * size)
+
+    for i, row in enumerate(rows):
+        if len(row) != size + 1:
+            raise BattleTableError('{} has {} cells, expected {}'.format(names[i], len(row) - 1, size))
+        for j, cell in enumerate(row[1:]):
+            outcome = OUTCOMES.get(cell.strip().lower())
+            if outcome is None:
+                raise BattleTableError('{} against {} is {!r}, expected win, lose or draw'.format(
+                    names[i], names[j], cell))
+            outcomes[i * size + j] = outcome
+
+    for i in range(size):
+        for j in range(i, size):
+            if outcomes[j * size + i] != MIRROR[outcomes[i * size + j]]:
+                raise BattleTableError('{} against {} does not mirror {} against {}'.format(
+                    names[i], names[j], names[j], names[i]))
+
+    return names, bytes(outcomes)
+
+
+def _cache_path(path, digest):
+    directory, filename = os.path.split(os.path.abspath(path))
+    return os.path.join(directory, '__pycache__', '{}.{}.marshal'.format(filename, digest[:16]))
+
+
+def _load_cached_table(cache_path):
+    try:
+        with open(cache_path, 'rb') as f:
+            version, names, outcomes = marshal.load(f)
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if version != CACHE_VERSION or len(outcomes) != len(names) ** 2:
+        return None
+    return names, outcomes
+
+
+def _save_cached_table(cache_path, names, outcomes):
+    # the cache is only a speed up, so a read only directory is fine
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        temporary = '{}.{}.tmp'.format(cache_path, os.getpid())
+        with open(temporary, 'wb') as f:
+            marshal.dump((CACHE_VERSION, names, outcomes), f)
+        os.replace(temporary, cache_path)
+    except OSError:
+        pass
+
+
+def build_rolls(path='battle-table.csv', engine='csv', cache=True):
+    """
+    reads in roll rules from input file
+
+    The compiled table is cached in a __pycache__ directory next to the
+    battle table, keyed by a hash of the file, so it is only parsed again
+    after the file changes.
+
+    :param path: the battle table, one row per attacking roll
+    :param engine: parse with 'csv' from the standard library or 'pandas'
+    :param cache: whether to use & update the on disk cache
+    :return: the valid rolls in the game
+    :raises BattleTableError: if the table is malformed
+    """
+
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    cache_path = _cache_path(path, hashlib.sha256(data).hexdigest())
+    table = _load_cached_table(cache_path) if cache else None
+
+    if table is None:
+        reader = read_table_with_pandas if engine == 'pandas' else read_table
+        table = compile_table(*reader(data))
+        if cache:
+            _save_cached_table(cache_path, *table)
+
+    names, outcomes = table
+    size = len(names)
+    rolls = []
+
+    for i, name in enumerate(names):
+        row = outcomes[i * size:(i + 1) * size]
+        wins_against = [names[j] for j in range(size) if row[j] == WIN]
+        lose_against = [names[j] for j in range(size) if row[j] == LOSE]
+        rolls.append(Roll(name, wins_against, lose_against))
+
+    return Rolls(rolls, outcomes)
 
 
 def get_players_name():
@@ -84,7 +321,7 @@ def get_player_roll(player, rolls):
     Retrieves the player's roll
 
     :param player: the current player
-    :param rolls: a list of valid rolls within the game
+    :param rolls: the valid rolls within the game
     :return: the payer's roll
     """
 
@@ -93,32 +330,32 @@ def get_player_roll(player, rolls):
     while True:
         move = input(prompt)
 
-        # convert to lower case
-        move = move.strip().lower()
-
         # check to see if the given roll exists
-        roll = [r for r in rolls if r.name.lower() == move]
+        roll = rolls.find(move.strip())
 
         # if the roll is valid return it, otherwise, reprompt for player roll
-        if len(roll) > 0:
-            return roll[0]
+        if roll is not None:
+            return roll
         else:
             prompt = '>> I do not understand that roll - please try again\n\n'
             prompt = prompt + '{}, it\'s your move (rock, paper, scissors): '.format(player.name.title())
 
 
-def get_computer_roll(player, rolls):
+def get_computer_roll(player, rolls, rng=None):
     """
     randomly selects a roll for the computer from the set of valid rolls
 
     :param player: the computer player
     :param rolls: a list of valid rolls
+    :param rng: the random source to use, see rng.py, secure by default
     :return: the computer's roll
     """
 
+    if rng is None:
+        rng = SecureRandom()
+
     # randomly select a roll
-    secure_random = random.SystemRandom()
-    roll = secure_random.choice(rolls)
+    roll = rng.choice(rolls)
 
     print('\n{} has selected {}.'.format(player.name.title(), roll.name))
 
@@ -181,7 +418,7 @@ def print_game_start(game_count):
     print(' Game #{}'.format(game_count))
     print('-' * 9)
 
-def print_game_end(player1, player1_move, player2, player2_move):
+def print_game_end(player1, player1_move, player2, player2_move, rolls):
     """
     print a summary of the game
 
@@ -189,14 +426,17 @@ def print_game_end(player1, player1_move, player2, player2_move):
     :param player1_move: the first players roll
     :param player2: the second player
     :param player2_move: the seoncd players roll
+    :param rolls: the valid rolls within the game
     """
 
+    outcome = rolls.outcome(player1_move, player2_move)
+
     # check & print game results
-    if player1_move == player2_move:
+    if outcome == DRAW:
         print('Its a tie - let\'s go again')
         return
 
-    if player2_move.name in player1_move.wins_against:
+    if outcome == WIN:
         print('{} wins this round.'.format(player1.name.title()))
         player1.add_win()
 
@@ -208,17 +448,21 @@ def print_game_end(player1, player1_move, player2, player2_move):
     print('{} - {}'.format(player2.name, player2.wins))
 
 
-def game_loop(player1, player2, rolls):
+def game_loop(player1, player2, rolls, rng=None):
     """
     Controls the game logic
 
     :param player1: the first player
     :param player2: the second player
-    :param rolls: a list of valid rolls in the game
+    :param rolls: the valid rolls in the game
+    :param rng: the computer's random source, or a predictive player
     """
 
     game_count = 1
 
+    if rng is None:
+        rng = SecureRandom()
+
     # while a player has not yet won
     while (player1.wins < 3) and (player2.wins < 3):
 
@@ -227,23 +471,50 @@ def game_loop(player1, player2, rolls):
 
         # get player rolls
         player1_move = get_player_roll(player1, rolls)
-        player2_move = get_computer_roll(player2, rolls)
+        player2_move = get_computer_roll(player2, rolls, rng)
+
+        # let the computer learn from the player's roll
+        rng.observe(player1_move)
 
         # spacing
         print()
 
         # end game
-        print_game_end(player1, player1_move, player2, player2_move)
+        print_game_end(player1, player1_move, player2, player2_move, rolls)
 
         # increase roll count
         game_count += 1
 
 
+def parse_args():
+    """
+    parses the command line options
+
+    :return: the parsed options
+    """
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rng', choices=sorted(MODES), default='secure',
+                        help='the computer\'s random source, seeded & batched can be reproduced with --seed')
+    parser.add_argument('--ai', choices=['random'] + sorted(PREDICTORS), default='random',
+                        help='how the computer picks its rolls, all but random predict yours')
+    parser.add_argument('--seed', type=int)
+
+    args = parser.parse_args()
+    # the secure source can't be seeded, don't let a seed be silently ignored
+    if args.seed is not None and args.ai == 'random' and args.rng == 'secure':
+        parser.error('--seed needs --rng seeded or batched, or an --ai that predicts')
+    return args
+
+
 def main():
     """
     main game logic
     """
 
+    # read options
+    args = parse_args()
+
     # build roll rules
     rolls = build_rolls()
 
@@ -257,8 +528,14 @@ def main():
     player1 = Player(name)
     player2 = Player('computer')
 
+    # pick the computer's rolls at random, or by predicting the player's
+    if args.ai == 'random':
+        computer = make_rng(args.rng, args.seed)
+    else:
+        computer = Predictive(rolls, make_predictor(args.ai), args.seed)
+
     # start game
-    game_loop(player1, player2, rolls)
+    game_loop(player1, player2, rolls, computer)
 
     # print game summary
     print_outro(player1, player2)
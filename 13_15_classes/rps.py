@@ -1,4 +1,8 @@
-import random
+import argparse
+
+from rng import MODES, SecureRandom, make_rng
+from rock_paper_scissors_and_more import Rolls
+from strategies import PREDICTORS, Predictive, make_predictor
 
 
 class Roll:
@@ -8,12 +12,20 @@ class Roll:
     name: the name of the roll
     wins_against: a list of roll names that this roll wins against
     lose_against: a list of roll names that this roll looses against
+
+    id & the wins & lose masks are filled in by the Rolls table the roll
+    is added to, see rock_paper_scissors_and_more.Roll.
     """
 
+    __slots__ = ('name', 'wins_against', 'lose_against', 'id', 'wins_mask', 'lose_mask')
+
     def __init__(self, name, wins_against, lose_against):
         self.name = name
         self.wins_against = wins_against
         self.lose_against = lose_against
+        self.id = None
+        self.wins_mask = 0
+        self.lose_mask = 0
 
 
 class Player:
@@ -24,6 +36,8 @@ class Player:
     wins: the total number of wins this player has achieved.
     """
 
+    __slots__ = ('name', 'wins')
+
     def __init__(self, name):
         self.name = name
         self.wins = 0
@@ -94,18 +108,21 @@ def get_player_roll(player, rolls):
             prompt = prompt + '{}, it\'s your move (rock, paper, scissors): '.format(player.name.title())
 
 
-def get_computer_roll(player, rolls):
+def get_computer_roll(player, rolls, rng=None):
     """
     randomly selects a roll for the computer from the set of valid rolls
 
     :param player: the computer player
     :param rolls: a list of valid rolls
+    :param rng: the random source to use, see rng.py, secure by default
     :return: the computer's roll
     """
 
+    if rng is None:
+        rng = SecureRandom()
+
     # randomly select a roll
-    secure_random = random.SystemRandom()
-    roll = secure_random.choice(rolls)
+    roll = rng.choice(rolls)
 
     print('\n{} has selected {}.'.format(player.name.title(), roll.name))
 
@@ -122,17 +139,21 @@ def print_score(player):
     print('{} - {}'.format(player.name, player.wins))
 
 
-def game_loop(player1, player2, rolls):
+def game_loop(player1, player2, rolls, rng=None):
     """
     Controls the game logic
 
     :param player1: the first player
     :param player2: the second player
     :param rolls: a list of valid rolls in the game
+    :param rng: the computer's random source, or a predictive player
     """
 
     game_count = 1
 
+    if rng is None:
+        rng = SecureRandom()
+
     # while a player has not yet won
     while (player1.wins < 3) and (player2.wins < 3):
 
@@ -144,7 +165,10 @@ def game_loop(player1, player2, rolls):
 
         # get player rolls
         player1_move = get_player_roll(player1, rolls)
-        player2_move = get_computer_roll(player2, rolls)
+        player2_move = get_computer_roll(player2, rolls, rng)
+
+        # let the computer learn from the player's roll
+        rng.observe(player1_move)
 
         # spacing
         print()
@@ -197,11 +221,35 @@ def print_game_outro(player1, player2):
     print('*' * 25)
 
 
+def parse_args():
+    """
+    parses the command line options
+
+    :return: the parsed options
+    """
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rng', choices=sorted(MODES), default='secure',
+                        help='the computer\'s random source, seeded & batched can be reproduced with --seed')
+    parser.add_argument('--ai', choices=['random'] + sorted(PREDICTORS), default='random',
+                        help='how the computer picks its rolls, all but random predict yours')
+    parser.add_argument('--seed', type=int)
+
+    args = parser.parse_args()
+    # the secure source can't be seeded, don't let a seed be silently ignored
+    if args.seed is not None and args.ai == 'random' and args.rng == 'secure':
+        parser.error('--seed needs --rng seeded or batched, or an --ai that predicts')
+    return args
+
+
 def main():
     """
     main game logic
     """
 
+    # read options
+    args = parse_args()
+
     # print game intro
     print_game_intro()
 
@@ -215,8 +263,14 @@ def main():
     player1 = Player(name)
     player2 = Player('computer')
 
+    # pick the computer's rolls at random, or by predicting the player's
+    if args.ai == 'random':
+        computer = make_rng(args.rng, args.seed)
+    else:
+        computer = Predictive(Rolls(rolls), make_predictor(args.ai), args.seed)
+
     # start game
-    game_loop(player1, player2, rolls)
+    game_loop(player1, player2, rolls, computer)
 
     # print game summary
     print_game_outro(player1, player2)
@@ -0,0 +1,255 @@
+"""
+Networked rock, paper, scissors and more, over a line based TCP protocol
+
+Players queue for a match, are paired in the order they arrive, and play
+first to 3 against each other with the battle table rules.
+
+client: PLAY <name>       join the queue, again after a match is over
+server: WAITING           queued
+server: MATCH <name>      paired against <name>
+client: ROLL <roll>       this round's roll
+server: RESULT <win|lose|draw> <their roll> <your wins> <their wins>
+server: OVER <win|lose> [forfeit]
+server: ERROR <reason>
+
+usage: python server.py [--host HOST] [--port PORT]
+"""
+import argparse
+import asyncio
+import os
+import resource
+from collections import deque
+
+from rock_paper_scissors_and_more import DRAW, WIN, LOSE, Player, build_rolls
+
+BATTLE_TABLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'battle-table.csv')
+
+WINS_NEEDED = 3
+
+# open files the server asks for, a socket per client
+MAX_CLIENTS = 20000
+
+
+class Session:
+    """
+    One client connection
+
+    player: the Player, None until the client asks to play
+    waiting: whether the session is in the matchmaking queue
+    match: the Match being played, or None
+    side: this session's index in match.sessions
+    """
+
+    __slots__ = ('writer', 'player', 'waiting', 'match', 'side')
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.player = None
+        self.waiting = False
+        self.match = None
+        self.side = 0
+
+    def send(self, line):
+        if not self.writer.is_closing():
+            self.writer.write(line.encode() + b'\n')
+
+    async def drain(self):
+        """
+        waits for the client to read what was sent, if any of it is still
+        buffered, ignoring a lost connection
+        """
+        if not self.writer.transport.get_write_buffer_size():
+            return
+        try:
+            await self.writer.drain()
+        except ConnectionError:
+            pass
+
+
+class Match:
+    """
+    A first to 3 match between two sessions
+
+    moves: each side's roll this round, None until it has rolled
+    """
+
+    __slots__ = ('sessions', 'moves')
+
+    def __init__(self, session1, session2):
+        self.sessions = (session1, session2)
+        self.moves = [None, None]
+        for side, session in enumerate(self.sessions):
+            session.player.wins = 0
+            session.match = self
+            session.side = side
+
+
+class GameServer:
+    """
+    Pairs queued players & plays their matches
+
+    rolls: the Rolls table of the game
+    matches: the number of matches being played
+    """
+
+    def __init__(self, rolls):
+        self.rolls = rolls
+        self.queue = deque()
+        self.matches = 0
+
+    def _enqueue(self, session):
+        # skip sessions that disconnected while waiting
+        while self.queue:
+            waiting = self.queue.popleft()
+            if waiting.waiting:
+                waiting.waiting = False
+                self._start(waiting, session)
+                return
+        session.waiting = True
+        self.queue.append(session)
+        session.send('WAITING')
+
+    def _start(self, session1, session2):
+        Match(session1, session2)
+        self.matches += 1
+        session1.send('MATCH {}'.format(session2.player.name))
+        session2.send('MATCH {}'.format(session1.player.name))
+
+    def _finish(self, match, winner, reason=''):
+        self.matches -= 1
+        for side, session in enumerate(match.sessions):
+            session.match = None
+            session.send('OVER {}{}'.format('win' if side == winner else 'lose', reason))
+
+    def _roll(self, session, name):
+        match = session.match
+        roll = self.rolls.find(name)
+        if match is None:
+            session.send('ERROR not in a match')
+            return
+        if roll is None:
+            session.send('ERROR unknown roll')
+            return
+        if match.moves[session.side] is not None:
+            session.send('ERROR already rolled')
+            return
+
+        match.moves[session.side] = roll
+        if None in match.moves:
+            return
+
+        first, second = match.sessions
+        move1, move2 = match.moves
+        match.moves = [None, None]
+        outcome = self.rolls.outcome(move1, move2)
+        if outcome == WIN:
+            first.player.add_win()
+        elif outcome == LOSE:
+            second.player.add_win()
+
+        if outcome == DRAW:
+            results = 'draw', 'draw'
+        elif outcome == WIN:
+            results = 'win', 'lose'
+        else:
+            results = 'lose', 'win'
+        first.send('RESULT {} {} {} {}'.format(results[0], move2.name, first.player.wins, second.player.wins))
+        second.send('RESULT {} {} {} {}'.format(results[1], move1.name, second.player.wins, first.player.wins))
+
+        if first.player.wins == WINS_NEEDED:
+            self._finish(match, 0)
+        elif second.player.wins == WINS_NEEDED:
+            self._finish(match, 1)
+
+    def _disconnect(self, session):
+        session.waiting = False
+        if session.match is not None:
+            self._finish(session.match, 1 - session.side, ' forfeit')
+
+    def _command(self, session, line):
+        command, _, argument = line.decode(errors='replace').strip().partition(' ')
+        if command == 'PLAY' and argument:
+            if session.match is not None or session.waiting:
+                session.send('ERROR already playing')
+            else:
+                session.player = Player(argument)
+                self._enqueue(session)
+        elif command == 'ROLL':
+            self._roll(session, argument)
+        else:
+            session.send('ERROR unknown command')
+
+    async def handle(self, reader, writer):
+        """serves one client until it disconnects"""
+        session = Session(writer)
+        try:
+            while True:
+                try:
+                    line = await reader.readuntil(b'\n')
+                except asyncio.IncompleteReadError as error:
+                    # the connection closed, maybe partway through a line
+                    line = error.partial
+                except asyncio.LimitOverrunError:
+                    session.send('ERROR line too long')
+                    await writer.drain()
+                    await skip_line(reader)
+                    continue
+                if not line:
+                    break
+                match = session.match
+                self._command(session, line)
+                # the opponent was written to as well, wait for it too so a
+                # slow reader holds back the match instead of buffering
+                for played in {match, session.match} - {None}:
+                    for other in played.sessions:
+                        if other is not session:
+                            await other.drain()
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self._disconnect(session)
+            writer.close()
+
+
+async def skip_line(reader):
+    """drops input up to and including the next newline, which may not have arrived yet"""
+    while True:
+        try:
+            await reader.readuntil(b'\n')
+            return
+        except asyncio.LimitOverrunError as error:
+            await reader.readexactly(error.consumed)
+        except asyncio.IncompleteReadError:
+            return
+
+
+def raise_file_limit(needed):
+    """raises the soft limit on open files towards needed, as far as the hard limit allows"""
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft == resource.RLIM_INFINITY or soft >= needed:
+        return soft
+    target = needed if hard == resource.RLIM_INFINITY else min(needed, hard)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+    return target
+
+
+async def serve(host, port, rolls):
+    game = GameServer(rolls)
+    server = await asyncio.start_server(game.handle, host, port, backlog=4096)
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    raise_file_limit(MAX_CLIENTS)
+    asyncio.run(serve(args.host, args.port, build_rolls(BATTLE_TABLE)))
+
+
+if __name__ == '__main__':
+    main()
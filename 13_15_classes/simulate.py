@@ -0,0 +1,247 @@
+"""
+Headless simulator for rock, paper, scissors matches
+
+Plays many first to 3 matches between two strategies at once: the matches
+are kept in MatchStates arrays, and each round draws the rolls of every
+unfinished match in one NumPy call and resolves them all with one lookup
+into the outcome table of the game's rules.
+
+usage: python simulate.py [--rules three|more] [--matches N] [--seed N] STRATEGY STRATEGY
+
+a strategy is uniform, fixed:<roll> or weighted:<roll>=<weight>,...
+"""
+import argparse
+import math
+import os
+
+import numpy as np
+
+from rock_paper_scissors_and_more import WIN, LOSE, Rolls, build_rolls
+from rps import build_the_three_rolls
+
+BATTLE_TABLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'battle-table.csv')
+
+WINS_NEEDED = 3
+
+# matches still going after this many rounds are counted as unfinished,
+# two players always throwing the same roll would otherwise never finish
+MAX_ROUNDS = 1000
+
+
+def load_rules(name):
+    """
+    :param name: 'three' for rock, paper, scissors, 'more' for the battle table
+    :return: the Rolls of the game
+    """
+    if name == 'three':
+        return Rolls(build_the_three_rolls())
+    return build_rolls(BATTLE_TABLE)
+
+
+def outcome_matrix(rolls):
+    """returns the outcome table of rolls as an N x N NumPy array"""
+    size = len(rolls)
+    return np.frombuffer(rolls.outcomes, dtype=np.int8).reshape(size, size)
+
+
+class Uniform:
+    """Picks every roll with the same probability"""
+
+    def __init__(self, size):
+        self.size = size
+
+    def draw(self, rng, count):
+        return rng.integers(self.size, size=count)
+
+
+class Fixed:
+    """Always throws the same roll"""
+
+    def __init__(self, id):
+        self.id = id
+
+    def draw(self, rng, count):
+        return np.full(count, self.id)
+
+
+class Weighted:
+    """Picks rolls with the given relative weights, one per roll id"""
+
+    def __init__(self, weights):
+        weights = np.asarray(weights, dtype=float)
+        if (weights < 0).any() or not weights.sum() > 0:
+            raise ValueError('weights must not be negative and must not all be zero')
+        self.cumulative = np.cumsum(weights / weights.sum())
+
+    def draw(self, rng, count):
+        ids = np.searchsorted(self.cumulative, rng.random(count), side='right')
+        return np.minimum(ids, len(self.cumulative) - 1)
+
+
+def make_strategy(spec, rolls):
+    """
+    builds a strategy from its command line spec
+
+    :param spec: uniform, fixed:<roll> or weighted:<roll>=<weight>,...
+    :param rolls: the Rolls of the game
+    :raises ValueError: for an unknown strategy or roll, or bad weights
+    """
+    kind, _, argument = spec.partition(':')
+
+    def roll_id(name):
+        roll = rolls.find(name)
+        if roll is None:
+            raise ValueError('unknown roll {!r}'.format(name))
+        return roll.id
+
+    if kind == 'uniform':
+        return Uniform(len(rolls))
+    if kind == 'fixed':
+        return Fixed(roll_id(argument))
+    if kind == 'weighted':
+        weights = [0.0] * len(rolls)
+        for pair in argument.split(','):
+            name, _, weight = pair.partition('=')
+            weights[roll_id(name)] = float(weight)
+        return Weighted(weights)
+    raise ValueError('unknown strategy {!r}'.format(spec))
+
+
+class Results:
+    """
+    The outcome of a simulation
+
+    wins: the number of matches won by each strategy
+    unfinished: matches cut off at MAX_ROUNDS
+    rounds: the number of rounds each match lasted
+    """
+
+    def __init__(self, wins, unfinished, rounds):
+        self.wins = wins
+        self.unfinished = unfinished
+        self.rounds = rounds
+
+    @property
+    def matches(self):
+        return len(self.rounds)
+
+    def win_rate(self, player):
+        return self.wins[player] / self.matches
+
+    def confidence_interval(self, player, z=1.96):
+        """the Wilson score interval of a strategy's win rate, 95% by default"""
+        n = self.matches
+        p = self.win_rate(player)
+        centre = (p + z * z / (2 * n)) / (1 + z * z / n)
+        spread = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / (1 + z * z / n)
+        return max(0.0, centre - spread), min(1.0, centre + spread)
+
+    def length_distribution(self):
+        """returns a dict of match length in rounds -> number of matches"""
+        counts = np.bincount(self.rounds)
+        return {length: int(count) for length, count in enumerate(counts) if count}
+
+
+class MatchStates:
+    """
+    The state of many matches between two players, as arrays with one entry
+    per match rather than an object per match
+
+    wins: a 2 x matches array of each player's wins
+    rounds: the number of rounds each match has played
+    active: the indices of the unfinished matches
+    """
+
+    def __init__(self, matches, wins_needed=WINS_NEEDED):
+        self.wins_needed = wins_needed
+        self.wins = np.zeros((2, matches), dtype=np.int16)
+        self.rounds = np.zeros(matches, dtype=np.int32)
+        self.active = np.arange(matches)
+
+    def __len__(self):
+        return len(self.rounds)
+
+    @property
+    def nbytes(self):
+        return self.wins.nbytes + self.rounds.nbytes + self.active.nbytes
+
+    def step(self, outcomes, rolls1, rolls2):
+        """
+        plays a round of every unfinished match
+
+        :param outcomes: the N x N outcome table from outcome_matrix
+        :param rolls1: the first player's roll ids, one per active match
+        :param rolls2: the second player's roll ids, one per active match
+        """
+        active = self.active
+        wins1, wins2 = self.wins
+        results = outcomes[rolls1, rolls2]
+        wins1[active] += results == WIN
+        wins2[active] += results == LOSE
+        self.rounds[active] += 1
+        self.active = active[(wins1[active] < self.wins_needed) & (wins2[active] < self.wins_needed)]
+
+    def won(self, player):
+        """the number of matches won by a player, 0 or 1"""
+        return int(np.count_nonzero(self.wins[player] >= self.wins_needed))
+
+
+def simulate(outcomes, strategy1, strategy2, matches, rng, wins_needed=WINS_NEEDED):
+    """
+    plays matches between two strategies, all at the same time
+
+    :param outcomes: the N x N outcome table from outcome_matrix
+    :param rng: a numpy Generator
+    :return: the Results
+    """
+    states = MatchStates(matches, wins_needed)
+
+    for _ in range(MAX_ROUNDS):
+        count = states.active.size
+        if not count:
+            break
+        states.step(outcomes, strategy1.draw(rng, count), strategy2.draw(rng, count))
+
+    return Results((states.won(0), states.won(1)), states.active.size, states.rounds)
+
+
+def print_results(names, results):
+    print('{} matches'.format(results.matches))
+    for player, name in enumerate(names):
+        low, high = results.confidence_interval(player)
+        print('  {:<30} wins {:7.3%}  (95% CI {:.3%} - {:.3%})'.format(
+            name, results.win_rate(player), low, high))
+    if results.unfinished:
+        print('  {:<30} {}'.format('unfinished', results.unfinished))
+
+    rounds = results.rounds
+    print('  match length: mean {:.2f}, median {:.0f}, p99 {:.0f} rounds'.format(
+        rounds.mean(), np.median(rounds), np.percentile(rounds, 99)))
+    for length, count in results.length_distribution().items():
+        print('  {:>4} rounds {:>9}  {}'.format(length, count, '#' * round(50 * count / results.matches)))
+
+
+def positive_int(text):
+    """an argparse type for a count of at least 1"""
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError('must be at least 1, got {}'.format(value))
+    return value
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rules', choices=('three', 'more'), default='more')
+    parser.add_argument('--matches', type=positive_int, default=1000000)
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('strategies', nargs=2, metavar='STRATEGY')
+    args = parser.parse_args()
+
+    rolls = load_rules(args.rules)
+    strategies = [make_strategy(spec, rolls) for spec in args.strategies]
+    results = simulate(outcome_matrix(rolls), *strategies, args.matches, np.random.default_rng(args.seed))
+    print_results(args.strategies, results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,191 @@
+"""
+Predictive computer players for rock, paper, scissors
+
+A predictor watches the player's rolls and guesses their next one, and
+Predictive plays a roll that beats the guess. Each predictor only
+remembers a fixed window of recent rolls in a ring buffer, and keeps its
+counts up to date as rolls enter & leave the window, so a move costs the
+same however long the game has run:
+
+frequency: the player's most common recent roll
+markov: the roll that most often followed the player's last few rolls
+mixture: whichever of the above has guessed best recently
+"""
+import random
+
+WINDOW = 64
+
+
+class RingBuffer:
+    """
+    Holds the last capacity values pushed
+
+    push returns the value that fell out to make room, or None
+    """
+
+    def __init__(self, capacity):
+        self._values = [None] * capacity
+        self._next = 0
+
+    def push(self, value):
+        evicted = self._values[self._next]
+        self._values[self._next] = value
+        self._next = (self._next + 1) % len(self._values)
+        return evicted
+
+
+class CountTable:
+    """
+    Counts of roll ids, with the most common one found in constant time
+
+    Ids are kept in buckets by their count, and counts only change by one
+    at a time, so the highest bucket never needs to be searched for.
+    """
+
+    def __init__(self):
+        self._counts = {}
+        self._buckets = {}
+        self._top = 0
+
+    def _move(self, id, count, new_count):
+        if count:
+            bucket = self._buckets[count]
+            del bucket[id]
+            if not bucket:
+                del self._buckets[count]
+        if new_count:
+            self._buckets.setdefault(new_count, {})[id] = None
+            self._counts[id] = new_count
+        else:
+            del self._counts[id]
+
+    def add(self, id):
+        count = self._counts.get(id, 0)
+        self._move(id, count, count + 1)
+        if count + 1 > self._top:
+            self._top = count + 1
+
+    def remove(self, id):
+        count = self._counts[id]
+        self._move(id, count, count - 1)
+        if count == self._top and self._top not in self._buckets:
+            self._top -= 1
+
+    def most_common(self):
+        """the id with the highest count, the earliest to reach it on a tie, or None"""
+        if not self._top:
+            return None
+        return next(iter(self._buckets[self._top]))
+
+
+class Frequency:
+    """Predicts the player's most common roll in the last window rolls"""
+
+    def __init__(self, window=WINDOW):
+        self._history = RingBuffer(window)
+        self._counts = CountTable()
+
+    def predict(self):
+        return self._counts.most_common()
+
+    def update(self, id):
+        evicted = self._history.push(id)
+        if evicted is not None:
+            self._counts.remove(evicted)
+        self._counts.add(id)
+
+
+class Markov:
+    """
+    Predicts the roll that most often followed the player's last order rolls,
+    over the last window transitions
+    """
+
+    def __init__(self, order=1, window=WINDOW):
+        self.order = order
+        self._recent = ()
+        self._history = RingBuffer(window)
+        self._tables = {}
+
+    def predict(self):
+        table = self._tables.get(self._recent)
+        return None if table is None else table.most_common()
+
+    def update(self, id):
+        if len(self._recent) == self.order:
+            evicted = self._history.push((self._recent, id))
+            if evicted is not None:
+                context, next_id = evicted
+                table = self._tables[context]
+                table.remove(next_id)
+                if table.most_common() is None:
+                    del self._tables[context]
+            self._tables.setdefault(self._recent, CountTable()).add(id)
+        self._recent = (self._recent + (id,))[-self.order:]
+
+
+class Mixture:
+    """
+    Predicts with whichever expert guessed right most often in the last
+    window rolls, each expert being another predictor
+    """
+
+    def __init__(self, experts, window=WINDOW):
+        self.experts = experts
+        self._guesses = [None] * len(experts)
+        self._hits = [RingBuffer(window) for _ in experts]
+        self._scores = [0] * len(experts)
+
+    def predict(self):
+        self._guesses = [expert.predict() for expert in self.experts]
+        best = max(range(len(self.experts)), key=self._scores.__getitem__)
+        return self._guesses[best]
+
+    def update(self, id):
+        for i, expert in enumerate(self.experts):
+            hit = self._guesses[i] == id
+            self._scores[i] += hit - bool(self._hits[i].push(hit))
+            expert.update(id)
+
+
+class Predictive:
+    """
+    A computer player that beats what its predictor expects the player to
+    roll, with the same choice & observe methods as the random sources in
+    rng.py so it can be passed to game_loop as one
+
+    rolls: the Rolls table of the game
+    predictor: a Frequency, Markov or Mixture
+    seed: seeds the choice between rolls that beat the guess, and the
+        random rolls made before there is a guess
+    """
+
+    def __init__(self, rolls, predictor, seed=None):
+        self.predictor = predictor
+        self._random = random.Random(seed)
+        self._counters = [rolls.winners_against(roll) for roll in rolls]
+
+    def choice(self, rolls):
+        guess = self.predictor.predict()
+        if guess is None or not self._counters[guess]:
+            return self._random.choice(rolls)
+        return self._random.choice(self._counters[guess])
+
+    def observe(self, roll):
+        self.predictor.update(roll.id)
+
+
+PREDICTORS = {
+    'frequency': lambda window: Frequency(window),
+    'markov': lambda window: Markov(1, window),
+    'markov2': lambda window: Markov(2, window),
+    'mixture': lambda window: Mixture([Frequency(window), Markov(1, window), Markov(2, window)], window),
+}
+
+
+def make_predictor(name, window=WINDOW):
+    """
+    :param name: frequency, markov, markov2 (on the last two rolls) or mixture
+    :raises KeyError: for an unknown name
+    """
+    return PREDICTORS[name](window)
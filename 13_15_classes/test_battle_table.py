@@ -0,0 +1,159 @@
+import marshal
+import os
+
+import pytest
+
+import rock_paper_scissors_and_more as game
+from rock_paper_scissors_and_more import (BattleTableError, DRAW, WIN, LOSE, build_rolls, compile_table,
+                                          read_table, read_table_with_pandas)
+
+BATTLE_TABLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'battle-table.csv')
+
+THREE = (b'Attacker,Rock,Paper,Scissors\n'
+         b'Rock,draw,lose,win\n'
+         b'Paper,win,draw,lose\n'
+         b'Scissors,lose,win,draw\n')
+
+
+@pytest.fixture(scope='function')
+def table(tmp_path):
+    """
+    returns the path of a copy of the three roll battle table
+    """
+    path = tmp_path / 'battle-table.csv'
+    path.write_bytes(THREE)
+    return str(path)
+
+
+def cached_files(path):
+    directory = os.path.join(os.path.dirname(path), '__pycache__')
+    return sorted(os.listdir(directory)) if os.path.isdir(directory) else []
+
+
+def test_compile_table():
+    """
+    GIVEN the three roll battle table
+    WHEN it is compiled
+    THEN check that every pairing gets its outcome
+    """
+
+    names, outcomes = compile_table(*read_table(THREE))
+
+    assert names == ['Rock', 'Paper', 'Scissors']
+    assert outcomes == bytes([DRAW, LOSE, WIN, WIN, DRAW, LOSE, LOSE, WIN, DRAW])
+
+
+@pytest.mark.parametrize('data, message', [
+    (b'', 'is empty'),
+    (b'Attacker\n', 'has no rolls'),
+    (b'Attacker,Rock,rock\nRock,draw,draw\nrock,draw,draw\n', 'must be unique'),
+    (b'Attacker,Rock,Paper\nPaper,draw,win\nRock,lose,draw\n', 'same order'),
+    # pandas pads a short row with empty cells rather than passing it on short
+    (b'Attacker,Rock,Paper\nRock,draw\nPaper,win,draw\n', "Rock has 1 cells, expected 2|Rock against Paper is ''"),
+    (b'Attacker,Rock,Paper\nRock,draw,beats\nPaper,win,draw\n', "'beats', expected win, lose or draw"),
+    (b'Attacker,Rock,Paper\nRock,draw,win\nPaper,win,draw\n', 'does not mirror'),
+    (b'Attacker,Rock,Paper\nRock,win,lose\nPaper,win,draw\n', 'does not mirror'),
+])
+@pytest.mark.parametrize('reader', [read_table, read_table_with_pandas])
+def test_malformed_table(reader, data, message):
+    """
+    GIVEN a malformed battle table
+    WHEN it is parsed with either engine and compiled
+    THEN check that a BattleTableError explains what is wrong
+    """
+
+    with pytest.raises(BattleTableError, match=message):
+        compile_table(*reader(data))
+
+
+def test_engines_agree():
+    """
+    GIVEN the battle table
+    WHEN it is parsed with the csv module and with pandas
+    THEN check that both compile to the same rolls & outcomes
+    """
+
+    with open(BATTLE_TABLE, 'rb') as f:
+        data = f.read()
+
+    assert compile_table(*read_table(data)) == compile_table(*read_table_with_pandas(data))
+
+    by_csv = build_rolls(BATTLE_TABLE, engine='csv', cache=False)
+    by_pandas = build_rolls(BATTLE_TABLE, engine='pandas', cache=False)
+    assert [roll.name for roll in by_csv] == [roll.name for roll in by_pandas]
+    assert by_csv.outcomes == by_pandas.outcomes
+
+
+def test_cache_hit(table, monkeypatch):
+    """
+    GIVEN a battle table that has been built once
+    WHEN it is built again
+    THEN check that it comes from the cache without being parsed
+    """
+
+    first = build_rolls(table)
+    assert len(cached_files(table)) == 1
+
+    def fail(data):
+        raise AssertionError('parsed a cached table')
+
+    monkeypatch.setattr(game, 'read_table', fail)
+    second = build_rolls(table)
+
+    assert [roll.name for roll in second] == [roll.name for roll in first]
+    assert second.outcomes == first.outcomes
+    assert second.find('rock').wins_mask == 1 << second.find('scissors').id
+
+
+def test_cache_invalidated_by_change(table):
+    """
+    GIVEN a cached battle table
+    WHEN the file changes
+    THEN check that the new table is parsed and cached alongside the old one
+    """
+
+    build_rolls(table)
+    with open(table, 'wb') as f:
+        f.write(THREE.replace(b'Scissors', b'Shears'))
+
+    rolls = build_rolls(table)
+
+    assert rolls.find('shears') is not None
+    assert rolls.find('scissors') is None
+    assert len(cached_files(table)) == 2
+
+
+@pytest.mark.parametrize('contents', [b'', b'not marshal data', None])
+def test_bad_cache_is_rebuilt(table, contents):
+    """
+    GIVEN a cache file that is empty, corrupt or from another cache version
+    WHEN the table is built
+    THEN check that it is parsed again and the cache rewritten
+    """
+
+    build_rolls(table)
+    cache_path = os.path.join(os.path.dirname(table), '__pycache__', cached_files(table)[0])
+    if contents is None:
+        contents = marshal.dumps((game.CACHE_VERSION + 1, ['Rock'], b'\x00'))
+    with open(cache_path, 'wb') as f:
+        f.write(contents)
+
+    rolls = build_rolls(table)
+
+    assert [roll.name for roll in rolls] == ['Rock', 'Paper', 'Scissors']
+    assert game._load_cached_table(cache_path) == (['Rock', 'Paper', 'Scissors'], rolls.outcomes)
+
+
+def test_bad_table_is_not_cached(table):
+    """
+    GIVEN a battle table that doesn't mirror
+    WHEN it is built
+    THEN check that it raises and nothing is cached
+    """
+
+    with open(table, 'wb') as f:
+        f.write(THREE.replace(b'Rock,draw,lose,win', b'Rock,draw,win,win'))
+
+    with pytest.raises(BattleTableError):
+        build_rolls(table)
+    assert cached_files(table) == []
@@ -0,0 +1,71 @@
+import json
+
+import pytest
+
+from league import League
+
+STRATEGIES = ['uniform', 'fixed:rock', 'weighted:rock=2,paper=1']
+
+
+@pytest.fixture(scope='module')
+def uninterrupted():
+    """
+    returns a league played in one go, without a checkpoint
+    """
+    league = League(STRATEGIES, rules='three', games=2000, seed=5)
+    league.run(workers=2)
+    return league
+
+
+def test_resume_from_checkpoint(uninterrupted, tmp_path):
+    """
+    GIVEN a league checkpoint holding only some of the pairings
+    WHEN the league is run again from it
+    THEN check that only the missing pairings are played and the standings
+         match a league played without interruption
+    """
+
+    checkpoint = str(tmp_path / 'league.json')
+    League(STRATEGIES, rules='three', games=2000, seed=5, checkpoint=checkpoint).run(workers=2)
+
+    # cut the checkpoint back to one pairing, as if the run had been interrupted
+    with open(checkpoint) as f:
+        saved = json.load(f)
+    kept = next(iter(saved['results']))
+    saved['results'] = {kept: saved['results'][kept]}
+    with open(checkpoint, 'w') as f:
+        json.dump(saved, f)
+
+    resumed = League(STRATEGIES, rules='three', games=2000, seed=5, checkpoint=checkpoint)
+    assert list(resumed.results) == [kept]
+
+    resumed.run(workers=1)
+
+    assert resumed.results == uninterrupted.results
+    assert resumed.standings() == uninterrupted.standings()
+    with open(checkpoint) as f:
+        assert json.load(f)['results'] == uninterrupted.results
+
+
+@pytest.mark.parametrize('changes', [{'games': 1000}, {'seed': 6}, {'rules': 'more'},
+                                     {'strategies': STRATEGIES[:2]}])
+def test_checkpoint_from_other_settings(uninterrupted, tmp_path, changes):
+    """
+    GIVEN a checkpoint written by a league
+    WHEN a league with different settings is started from it
+    THEN check that it refuses with a ValueError
+    """
+
+    checkpoint = str(tmp_path / 'league.json')
+    league = League(STRATEGIES, rules='three', games=2000, seed=5, checkpoint=checkpoint)
+    league.results = dict(uninterrupted.results)
+    league._save_checkpoint()
+
+    settings = {'strategies': STRATEGIES, 'rules': 'three', 'games': 2000, 'seed': 5, **changes}
+    with pytest.raises(ValueError):
+        League(checkpoint=checkpoint, **settings)
+
+
+def test_duplicate_strategies():
+    with pytest.raises(ValueError):
+        League(['uniform', 'uniform'])
@@ -0,0 +1,69 @@
+import sys
+
+import pytest
+
+import rock_paper_scissors_and_more
+import rps
+from rng import BatchedRandom, MODES, SecureRandom, make_rng
+
+ROLLS = ['rock', 'paper', 'scissors']
+
+
+@pytest.mark.parametrize('mode', ['seeded', 'batched'])
+def test_same_seed_same_rolls(mode):
+    """
+    GIVEN two seeded or batched random sources with the same seed
+    WHEN they roll many times
+    THEN check that they roll the same, and differently from another seed
+    """
+
+    first, second, other = make_rng(mode, 5), make_rng(mode, 5), make_rng(mode, 6)
+
+    rolls = [first.choice(ROLLS) for _ in range(200)]
+
+    assert rolls == [second.choice(ROLLS) for _ in range(200)]
+    assert rolls != [other.choice(ROLLS) for _ in range(200)]
+    assert set(rolls) == set(ROLLS)
+
+
+def test_batched_refills():
+    """
+    GIVEN a batched random source with a small block
+    WHEN it rolls past its block, and then for a game with fewer rolls
+    THEN check that it draws a new block each time, so every roll is valid
+    """
+
+    source = BatchedRandom(seed=1, block_size=4)
+
+    assert all(source.choice(ROLLS) in ROLLS for _ in range(10))
+    assert [source.choice(['rock']) for _ in range(10)] == ['rock'] * 10
+
+
+def test_make_rng():
+    assert isinstance(make_rng(), SecureRandom)
+    assert all(isinstance(make_rng(mode, 1), source) for mode, source in MODES.items())
+    with pytest.raises(KeyError):
+        make_rng('dice')
+
+
+@pytest.mark.parametrize('game', [rps, rock_paper_scissors_and_more])
+@pytest.mark.parametrize('argv', [['--seed', '1'], ['--rng', 'secure', '--seed', '1']])
+def test_secure_seed_rejected(monkeypatch, game, argv):
+    """
+    GIVEN either game
+    WHEN it is started with a seed for the secure random source
+    THEN check that it refuses rather than ignore the seed
+    """
+
+    monkeypatch.setattr(sys, 'argv', ['game'] + argv)
+
+    with pytest.raises(SystemExit):
+        game.parse_args()
+
+
+@pytest.mark.parametrize('game', [rps, rock_paper_scissors_and_more])
+@pytest.mark.parametrize('argv', [['--rng', 'seeded', '--seed', '1'], ['--ai', 'markov', '--seed', '1'], []])
+def test_seed_accepted(monkeypatch, game, argv):
+    monkeypatch.setattr(sys, 'argv', ['game'] + argv)
+
+    assert game.parse_args().seed == (1 if argv else None)
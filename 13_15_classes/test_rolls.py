@@ -0,0 +1,60 @@
+import pytest
+
+from rock_paper_scissors_and_more import DRAW, WIN, LOSE, Roll, Rolls
+from rps import build_the_three_rolls
+
+
+@pytest.fixture(scope='function')
+def rolls():
+    """
+    returns the Rolls of rock, paper, scissors, built from single name strings
+    """
+    return Rolls(build_the_three_rolls())
+
+
+def test_find(rolls):
+    assert rolls.find('paper') is rolls[1]
+    assert rolls.find('PaPeR') is rolls[1]
+    assert rolls.find('lizard') is None
+
+
+@pytest.mark.parametrize('roll1, roll2, outcome', [('rock', 'scissors', WIN), ('rock', 'paper', LOSE),
+                                                   ('paper', 'rock', WIN), ('paper', 'scissors', LOSE),
+                                                   ('scissors', 'paper', WIN), ('scissors', 'rock', LOSE),
+                                                   ('rock', 'rock', DRAW), ('paper', 'paper', DRAW),
+                                                   ('scissors', 'scissors', DRAW)])
+def test_three_roll_outcomes(rolls, roll1, roll2, outcome):
+    """
+    GIVEN the three roll game, whose rolls name what they beat as plain strings
+    WHEN one roll is played against another
+    THEN check that the outcome is the one of rock, paper, scissors
+    """
+
+    assert rolls.outcome(rolls.find(roll1), rolls.find(roll2)) == outcome
+
+
+def test_winners_against(rolls):
+    assert [roll.name for roll in rolls.winners_against(rolls.find('rock'))] == ['paper']
+    assert [roll.name for roll in rolls.winners_against(rolls.find('scissors'))] == ['rock']
+
+
+def test_lists_of_names():
+    """
+    GIVEN rolls that beat & lose to lists of names, in any case
+    WHEN they are compiled
+    THEN check that every pairing gets its outcome and the masks follow
+    """
+
+    rolls = Rolls([Roll('Rock', ['Lizard', 'scissors'], ['paper']),
+                   Roll('Paper', ['rock'], ['Scissors', 'lizard']),
+                   Roll('Scissors', ['paper', 'lizard'], ['rock']),
+                   Roll('Lizard', ['paper'], ['rock', 'scissors'])])
+    rock, paper, scissors, lizard = rolls
+
+    assert rolls.outcome(rock, lizard) == WIN
+    assert rolls.outcome(lizard, paper) == WIN
+    assert rolls.outcome(paper, lizard) == LOSE
+    assert rolls.outcome(lizard, lizard) == DRAW
+    assert [roll.name for roll in rolls.winners_against(lizard)] == ['Rock', 'Scissors']
+    assert rock.wins_mask == 1 << scissors.id | 1 << lizard.id
+    assert rock.lose_mask == 1 << paper.id
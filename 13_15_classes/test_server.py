@@ -0,0 +1,136 @@
+import asyncio
+
+from rock_paper_scissors_and_more import Rolls
+from rps import build_the_three_rolls
+from server import GameServer
+
+
+async def start_server():
+    game = GameServer(Rolls(build_the_three_rolls()))
+    server = await asyncio.start_server(game.handle, '127.0.0.1', 0)
+    return game, server, server.sockets[0].getsockname()[1]
+
+
+async def connect(port):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+
+    async def request(line):
+        writer.write(line.encode() + b'\n')
+        return await reply()
+
+    async def reply():
+        return (await asyncio.wait_for(reader.readline(), 5)).decode().strip()
+
+    return request, reply, writer
+
+
+async def pair(port):
+    request1, reply1, writer1 = await connect(port)
+    request2, reply2, writer2 = await connect(port)
+    assert await request1('PLAY ann') == 'WAITING'
+    assert await request2('PLAY bob') == 'MATCH ann'
+    assert await reply1() == 'MATCH bob'
+    return (request1, reply1, writer1), (request2, reply2, writer2)
+
+
+def test_match():
+    """
+    GIVEN two clients queued on the server
+    WHEN they play a match to the end
+    THEN check that each sees the rounds & result from their side
+    """
+
+    async def play():
+        game, server, port = await start_server()
+        async with server:
+            (request1, reply1, writer1), (request2, reply2, writer2) = await pair(port)
+            assert game.matches == 1
+
+            writer1.write(b'ROLL rock\n')
+            assert await request2('ROLL rock') == 'RESULT draw rock 0 0'
+            assert await reply1() == 'RESULT draw rock 0 0'
+
+            for wins in range(1, 4):
+                writer1.write(b'ROLL Rock\n')
+                assert await request2('ROLL scissors') == 'RESULT lose rock 0 {}'.format(wins)
+                assert await reply1() == 'RESULT win scissors {} 0'.format(wins)
+
+            assert await reply1() == 'OVER win'
+            assert await reply2() == 'OVER lose'
+            assert game.matches == 0
+
+            assert await request1('ROLL rock') == 'ERROR not in a match'
+            writer1.close()
+            writer2.close()
+
+    asyncio.run(play())
+
+
+def test_forfeit():
+    """
+    GIVEN a match in progress
+    WHEN one client disconnects
+    THEN check that the other wins by forfeit and can queue again
+    """
+
+    async def play():
+        game, server, port = await start_server()
+        async with server:
+            (request1, reply1, writer1), (request2, reply2, writer2) = await pair(port)
+
+            assert await request1('ROLL lizard') == 'ERROR unknown roll'
+            writer1.write(b'ROLL paper\n')
+            assert await request1('ROLL paper') == 'ERROR already rolled'
+            writer2.close()
+
+            assert await reply1() == 'OVER win forfeit'
+            assert game.matches == 0
+            assert await request1('PLAY ann') == 'WAITING'
+            writer1.close()
+
+    asyncio.run(play())
+
+
+def test_bad_lines():
+    """
+    GIVEN a connected client
+    WHEN it sends an unknown command or a line over the reader's limit
+    THEN check that it gets an error and the connection keeps working
+    """
+
+    async def play():
+        game, server, port = await start_server()
+        async with server:
+            request, reply, writer = await connect(port)
+
+            assert await request('JUMP') == 'ERROR unknown command'
+            assert await request('PLAY ' + 'x' * 100000) == 'ERROR line too long'
+            assert await request('PLAY ann') == 'WAITING'
+            assert await request('PLAY ann') == 'ERROR already playing'
+            writer.close()
+
+    asyncio.run(play())
+
+
+def test_long_line_in_pieces():
+    """
+    GIVEN a connected client
+    WHEN it sends a line over the reader's limit in two writes
+    THEN check that the whole line gets one error and none of it runs
+    """
+
+    async def play():
+        game, server, port = await start_server()
+        async with server:
+            request, reply, writer = await connect(port)
+
+            writer.write(b'PLAY ' + b'x' * 70000)
+            await writer.drain()
+            await asyncio.sleep(0.1)
+            writer.write(b'x' * 1000 + b'\nROLL rock\n')
+            assert await reply() == 'ERROR line too long'
+            assert await reply() == 'ERROR not in a match'
+            assert await request('PLAY ann') == 'WAITING'
+            writer.close()
+
+    asyncio.run(play())
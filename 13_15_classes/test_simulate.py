@@ -0,0 +1,145 @@
+import numpy as np
+import pytest
+
+from rock_paper_scissors_and_more import DRAW, WIN, LOSE
+from simulate import (Fixed, MatchStates, Results, Uniform, Weighted, load_rules, main, make_strategy,
+                      outcome_matrix, simulate)
+
+
+@pytest.fixture(scope='module')
+def three():
+    """
+    returns the rolls & outcome table of rock, paper, scissors
+    """
+    rolls = load_rules('three')
+    return rolls, outcome_matrix(rolls)
+
+
+def test_outcome_matrix(three):
+    rolls, outcomes = three
+    rock, paper, scissors = (rolls.find(name).id for name in ('rock', 'paper', 'scissors'))
+
+    assert outcomes[rock, scissors] == WIN
+    assert outcomes[rock, paper] == LOSE
+    assert outcomes[paper, paper] == DRAW
+
+
+def test_step(three):
+    """
+    GIVEN three matches, one of them a win away from over
+    WHEN a round is played with a win, a loss and a draw
+    THEN check that the wins & rounds follow and the finished match stops
+    """
+
+    rolls, outcomes = three
+    rock, paper, scissors = (rolls.find(name).id for name in ('rock', 'paper', 'scissors'))
+    states = MatchStates(3)
+    states.wins[0, 0] = 2
+
+    states.step(outcomes, np.array([rock, rock, paper]), np.array([scissors, paper, paper]))
+
+    assert states.wins.tolist() == [[3, 0, 0], [0, 1, 0]]
+    assert states.rounds.tolist() == [1, 1, 1]
+    assert states.active.tolist() == [1, 2]
+    assert states.won(0) == 1
+
+    # only the active matches roll from now on
+    states.step(outcomes, np.array([scissors, rock]), np.array([paper, rock]))
+
+    assert states.wins.tolist() == [[3, 1, 0], [0, 1, 0]]
+    assert states.rounds.tolist() == [1, 2, 2]
+
+
+def test_known_matchup(three):
+    """
+    GIVEN a player always throwing rock and one always throwing scissors
+    WHEN they play many matches
+    THEN check that rock wins every match 3-0 in 3 rounds
+    """
+
+    rolls, outcomes = three
+    rock, scissors = make_strategy('fixed:rock', rolls), make_strategy('fixed:scissors', rolls)
+
+    results = simulate(outcomes, rock, scissors, 1000, np.random.default_rng(1))
+
+    assert results.wins == (1000, 0)
+    assert results.unfinished == 0
+    assert results.length_distribution() == {3: 1000}
+
+
+def test_seeded_simulation(three):
+    """
+    GIVEN two uniform strategies
+    WHEN the same simulation is run twice with the same seed
+    THEN check that the results are the same and every match is accounted for
+    """
+
+    rolls, outcomes = three
+    runs = [simulate(outcomes, Uniform(3), Uniform(3), 2000, np.random.default_rng(7)) for _ in range(2)]
+
+    assert runs[0].wins == runs[1].wins
+    assert runs[0].rounds.tolist() == runs[1].rounds.tolist()
+    assert sum(runs[0].wins) + runs[0].unfinished == 2000
+    assert sum(runs[0].length_distribution().values()) == 2000
+
+
+def test_confidence_interval():
+    """
+    GIVEN the results of 100 matches
+    WHEN the win rates' confidence intervals are taken
+    THEN check that they are the Wilson score intervals, kept within 0 - 1
+    """
+
+    results = Results((50, 0), 50, np.full(100, 3))
+
+    low, high = results.confidence_interval(0)
+    assert low == pytest.approx(0.4038, abs=1e-4)
+    assert high == pytest.approx(0.5962, abs=1e-4)
+
+    low, high = results.confidence_interval(1)
+    assert low == 0.0
+    assert high == pytest.approx(0.0370, abs=1e-4)
+
+
+def test_length_distribution():
+    results = Results((4, 1), 0, np.array([3, 5, 3, 4, 3]))
+
+    assert results.length_distribution() == {3: 3, 4: 1, 5: 1}
+
+
+@pytest.mark.parametrize('spec, kind', [('uniform', Uniform), ('fixed:Paper', Fixed),
+                                        ('weighted:rock=2,paper=1', Weighted)])
+def test_make_strategy(three, spec, kind):
+    rolls, outcomes = three
+
+    assert isinstance(make_strategy(spec, rolls), kind)
+
+
+@pytest.mark.parametrize('spec', ['psychic', 'fixed:lizard', 'weighted:rock=two',
+                                  'weighted:rock=0,paper=0', 'weighted:rock=-1,paper=2'])
+def test_bad_strategy(three, spec):
+    with pytest.raises(ValueError):
+        make_strategy(spec, three[0])
+
+
+def test_weighted_draw(three):
+    """
+    GIVEN a weighted strategy that never picks scissors
+    WHEN it draws many rolls
+    THEN check that they follow the weights
+    """
+
+    rolls, outcomes = three
+    strategy = make_strategy('weighted:rock=3,paper=1', rolls)
+
+    counts = np.bincount(strategy.draw(np.random.default_rng(3), 40000), minlength=3)
+
+    assert counts[rolls.find('scissors').id] == 0
+    assert counts[rolls.find('rock').id] / 40000 == pytest.approx(0.75, abs=0.01)
+
+
+def test_zero_matches_rejected(monkeypatch):
+    monkeypatch.setattr('sys.argv', ['simulate.py', '--matches', '0', 'uniform', 'uniform'])
+
+    with pytest.raises(SystemExit):
+        main()
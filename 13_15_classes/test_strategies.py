@@ -0,0 +1,217 @@
+import random
+from collections import Counter
+
+import pytest
+
+from rock_paper_scissors_and_more import Rolls
+from rps import build_the_three_rolls
+from strategies import CountTable, Frequency, Markov, Mixture, Predictive, RingBuffer, make_predictor
+
+
+class Fixed:
+    """a predictor that always guesses the same id"""
+
+    def __init__(self, guess):
+        self.guess = guess
+
+    def predict(self):
+        return self.guess
+
+    def update(self, id):
+        pass
+
+
+def recounted_most_common(steps):
+    """
+    replays (id, change) steps from scratch, returning the id with the
+    highest count, the earliest to reach its count on a tie, or None
+    """
+    counts = {}
+    reached = {}
+    for time, (id, change) in enumerate(steps):
+        counts[id] = counts.get(id, 0) + change
+        reached[id] = time
+    top = max(counts.values(), default=0)
+    if not top:
+        return None
+    return min((reached[id], id) for id, count in counts.items() if count == top)[1]
+
+
+def test_ring_buffer():
+    """
+    GIVEN a ring buffer
+    WHEN more values are pushed than it holds
+    THEN check that each push past its capacity evicts the oldest value
+    """
+
+    buffer = RingBuffer(3)
+
+    assert [buffer.push(value) for value in range(1, 7)] == [None, None, None, 1, 2, 3]
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_count_table_fuzz(seed):
+    """
+    GIVEN a count table
+    WHEN random ids are added & removed
+    THEN check that most_common matches the counts recomputed from every step
+    """
+
+    rng = random.Random(seed)
+    table = CountTable()
+    steps = []
+    assert table.most_common() is None
+
+    counts = Counter()
+    for _ in range(500):
+        present = [id for id, count in counts.items() if count]
+        if present and rng.random() < 0.45:
+            id = rng.choice(present)
+            table.remove(id)
+            steps.append((id, -1))
+        else:
+            id = rng.randrange(5)
+            table.add(id)
+            steps.append((id, 1))
+        counts[id] += steps[-1][1]
+        assert table.most_common() == recounted_most_common(steps)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_frequency_fuzz(seed):
+    """
+    GIVEN a frequency predictor over a short window
+    WHEN it watches random rolls
+    THEN check that it guesses a roll that is the most common in the window
+    """
+
+    rng = random.Random(seed)
+    predictor = Frequency(window=8)
+    history = []
+    assert predictor.predict() is None
+
+    for _ in range(500):
+        id = rng.choice([0, 0, 1, 2])
+        predictor.update(id)
+        history.append(id)
+        counts = Counter(history[-8:])
+        assert counts[predictor.predict()] == max(counts.values())
+
+
+def test_markov_window_eviction():
+    """
+    GIVEN a markov predictor with a window of two transitions
+    WHEN it watches more transitions than that
+    THEN check that it forgets what followed a roll once it leaves the window
+    """
+
+    predictor = Markov(1, window=2)
+    for id in (0, 1, 2):
+        predictor.update(id)
+    assert predictor.predict() is None
+
+    predictor.update(0)
+    # 0 was followed by 1, but that transition has left the window
+    assert predictor.predict() is None
+    assert (0,) not in predictor._tables
+
+    predictor.update(2)
+    predictor.update(0)
+    assert predictor.predict() == 2
+
+
+@pytest.mark.parametrize('order', [1, 2])
+@pytest.mark.parametrize('seed', range(3))
+def test_markov_fuzz(order, seed):
+    """
+    GIVEN a markov predictor
+    WHEN it watches random rolls
+    THEN check that it guesses the roll that most often followed the last
+         rolls, recomputed from the transitions in the window
+    """
+
+    rng = random.Random(seed)
+    predictor = Markov(order, window=16)
+    history = []
+
+    for _ in range(500):
+        id = rng.choice([0, 0, 1, 2, 2])
+        predictor.update(id)
+        history.append(id)
+        transitions = [(tuple(history[i - order:i]), history[i]) for i in range(order, len(history))][-16:]
+        recent = tuple(history[-order:])
+        followers = Counter(next_id for context, next_id in transitions if context == recent)
+
+        guess = predictor.predict()
+        if followers:
+            assert followers[guess] == max(followers.values())
+        else:
+            assert guess is None
+
+
+def test_mixture_scoring():
+    """
+    GIVEN a mixture of two experts that always guess the same rolls
+    WHEN the player keeps rolling what one of them guesses, then the other
+    THEN check that the mixture follows whichever guessed right in the window
+    """
+
+    mixture = Mixture([Fixed(0), Fixed(1)], window=2)
+
+    assert mixture.predict() == 0
+    mixture.update(1)
+    assert mixture.predict() == 1
+    mixture.update(1)
+    assert mixture.predict() == 1
+
+    mixture.update(0)
+    # one hit each in the window, the tie goes to the first expert
+    assert mixture.predict() == 0
+    mixture.update(0)
+    assert mixture.predict() == 0
+
+
+@pytest.mark.parametrize('name', ['frequency', 'markov', 'markov2', 'mixture'])
+def test_make_predictor(name):
+    predictor = make_predictor(name, window=4)
+    for id in (0, 1, 0, 1, 0):
+        predictor.update(id)
+
+    assert predictor.predict() in (0, 1)
+
+
+def test_unknown_predictor():
+    with pytest.raises(KeyError):
+        make_predictor('psychic')
+
+
+def test_predictive_choice():
+    """
+    GIVEN a predictive player
+    WHEN it has a guess, and when it has none
+    THEN check that it beats the guess, and otherwise rolls at random
+    """
+
+    rolls = Rolls(build_the_three_rolls())
+    rock = rolls.find('rock')
+
+    player = Predictive(rolls, Fixed(rock.id), seed=1)
+    assert {player.choice(rolls).name for _ in range(20)} == {'paper'}
+
+    player = Predictive(rolls, Fixed(None), seed=1)
+    assert {player.choice(rolls).name for _ in range(50)} == {'rock', 'paper', 'scissors'}
+
+
+def test_predictive_learns():
+    """
+    GIVEN a predictive player with a frequency predictor
+    WHEN it observes a player who mostly rolls rock
+    THEN check that it plays paper
+    """
+
+    rolls = Rolls(build_the_three_rolls())
+    player = Predictive(rolls, Frequency(), seed=1)
+    for name in ('rock', 'rock', 'scissors', 'rock'):
+        player.observe(rolls.find(name))
+
+    assert player.choice(rolls).name == 'paper'